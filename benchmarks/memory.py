@@ -0,0 +1,83 @@
+"""Perfil de memória por etapa (tracemalloc) e comparação entre versões.
+
+Exemplos:
+    python -m benchmarks.memory perfil --size 100k --saida perfil_atual.json
+    python -m benchmarks.memory comparar perfil_anterior.json perfil_atual.json --tolerance 0.1
+"""
+import argparse
+import gc
+import sys
+from benchmarks.run import STAGES, build_context, _silence_streamlit
+from benchmarks.synthetic import parse_size
+from utils import perf, memory_profile
+# Importados antes do tracemalloc para que as alocações de import não entrem nas etapas
+import components.kanban  # noqa: F401
+import components.analytics  # noqa: F401
+
+# Etapas perfiladas por padrão (a ingestão tem benchmark próprio e domina o tempo)
+ETAPAS_PADRAO = ['prepare', 'filter_kanban', 'filter_analytics', 'render_kanban', 'render_analytics']
+
+def profile_stages(size, etapas, seed):
+    """Executa as etapas sobre dados sintéticos com o perfil de memória ativo"""
+    ctx = build_context(parse_size(size), seed)
+    gc.collect()
+    perf.start_rerun(perfil_memoria=True)
+    try:
+        for nome in etapas:
+            func, entrada = STAGES[nome]
+            with perf.stage(nome, ctx[entrada]) as etapa:
+                # Saída viva até o fim da etapa, para aparecer como memória retida
+                saida = etapa.set_output(func(ctx))
+            del saida
+            gc.collect()
+    finally:
+        registro = perf.finish_rerun()
+    return memory_profile.build_report(registro, descricao=f"{size} linhas sintéticas (seed {seed})")
+
+def cmd_perfil(args):
+    relatorio = profile_stages(args.size, args.stages, args.seed)
+    for etapa in relatorio['etapas']:
+        print(f"\n{etapa['etapa']:<34} pico {etapa['pico_bytes'] / 1024 ** 2:>9.1f} MB"
+              f"   retido {etapa['retido_bytes'] / 1024 ** 2:>8.1f} MB")
+        for local in etapa['principais_locais'][:args.top]:
+            print(f"    {local['bytes'] / 1024 ** 2:>9.2f} MB  {local['local']}")
+    if args.saida:
+        memory_profile.write_report(relatorio, args.saida)
+        print(f"\nRelatório gravado em {args.saida}")
+    return 0
+
+def cmd_comparar(args):
+    comparacao = memory_profile.compare_reports(memory_profile.load_report(args.anterior),
+                                                memory_profile.load_report(args.atual))
+    print(comparacao.to_string())
+    regressoes = comparacao[comparacao['razao_pico'] > 1 + args.tolerance]
+    if len(regressoes):
+        print(f"\n⚠ Pico de memória acima da tolerância ({args.tolerance:.0%}): {', '.join(regressoes.index)}")
+        return 1
+    return 0
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Perfil de memória das etapas do dashboard")
+    subparsers = parser.add_subparsers(dest='comando', required=True)
+
+    perfil = subparsers.add_parser('perfil', help="Perfila as etapas com dados sintéticos")
+    perfil.add_argument('--size', default='100k', help="Tamanho do dataset sintético (10k, 100k, 1m ou número)")
+    perfil.add_argument('--stages', nargs='+', default=ETAPAS_PADRAO, choices=list(STAGES))
+    perfil.add_argument('--seed', type=int, default=42)
+    perfil.add_argument('--top', type=int, default=5, help="Locais exibidos por etapa")
+    perfil.add_argument('--saida', help="Grava o relatório em JSON")
+    perfil.set_defaults(func=cmd_perfil)
+
+    comparar = subparsers.add_parser('comparar', help="Compara dois relatórios JSON")
+    comparar.add_argument('anterior')
+    comparar.add_argument('atual')
+    comparar.add_argument('--tolerance', type=float, default=0.1, help="Aumento de pico tolerado (0.1 = 10%%)")
+    comparar.set_defaults(func=cmd_comparar)
+
+    args = parser.parse_args(argv)
+    _silence_streamlit()
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
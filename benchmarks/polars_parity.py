@@ -0,0 +1,81 @@
+"""Compara o caminho em pandas com o backend Polars na ingestão e na preparação.
+
+Para cada tamanho, gera as duas planilhas sintéticas, verifica que as saídas dos dois
+backends são idênticas (mesmas linhas, colunas, tipos e índice) e mede o tempo de cada um.
+
+Exemplo:
+    python -m benchmarks.polars_parity --sizes 10k 100k 1m
+"""
+import argparse
+import sys
+import time
+import pandas as pd
+from benchmarks.synthetic import generate_exports, parse_size
+from utils.ingest import process_data_original_logic
+from utils.data_processor import prepare_data_with_real_status
+from utils import polars_backend
+
+def _ingerir(ctx):
+    return process_data_original_logic(ctx['df_req'], ctx['df_req_minha'])
+
+def _preparar(ctx):
+    return prepare_data_with_real_status(ctx['df_store'].copy(), ctx['fim'])
+
+# Etapa -> função medida
+ETAPAS = {
+    'ingest': _ingerir,
+    'prepare': _preparar,
+}
+
+def _medir(func, ctx, repeat):
+    """Saída e menor tempo (ms) em `repeat` execuções"""
+    tempos = []
+    for _ in range(repeat):
+        inicio = time.perf_counter()
+        saida = func(ctx)
+        tempos.append(time.perf_counter() - inicio)
+    return saida, min(tempos) * 1000
+
+def run(sizes, repeat, seed):
+    """Mede e compara os dois backends; retorna False se alguma saída for diferente"""
+    iguais = True
+    fim = pd.Timestamp.now().normalize()
+    for rotulo in sizes:
+        n = parse_size(rotulo)
+        df_req, df_req_minha = generate_exports(n, seed, fim)
+        ctx = {'df_req': df_req, 'df_req_minha': df_req_minha, 'fim': fim}
+        print(f"\n=== {rotulo} ({n:,} linhas) ===")
+        for nome, func in ETAPAS.items():
+            polars_backend.configure('pandas')
+            esperado, tempo_pandas = _medir(func, ctx, repeat)
+            polars_backend.configure('polars')
+            obtido, tempo_polars = _medir(func, ctx, repeat)
+            try:
+                pd.testing.assert_frame_equal(esperado, obtido)
+                situacao = "idêntico"
+            except AssertionError as erro:
+                iguais = False
+                situacao = f"DIFERENTE: {str(erro).splitlines()[0]}"
+            print(f"  {nome:<8} pandas {tempo_pandas:9.1f} ms   polars {tempo_polars:9.1f} ms   {situacao}")
+            if nome == 'ingest':
+                # A preparação parte do parquet consolidado (a saída da ingestão)
+                ctx['df_store'] = esperado
+    polars_backend.configure()
+    return iguais
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Paridade e tempo: pandas vs backend Polars")
+    parser.add_argument('--sizes', nargs='+', default=['10k', '100k'], help="Tamanhos (ex.: 10k 1m)")
+    parser.add_argument('--repeat', type=int, default=1)
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args(argv)
+
+    try:
+        polars_backend.load_polars()
+    except RuntimeError as erro:
+        print(f"❌ {erro}", file=sys.stderr)
+        return 1
+    return 0 if run(args.sizes, args.repeat, args.seed) else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,254 @@
+"""Benchmark das etapas de ingestão, preparação, filtros e renderização.
+
+Exemplos:
+    python -m benchmarks.run --sizes 10k 100k
+    python -m benchmarks.run --sizes 10k 100k --save-baseline
+    python -m benchmarks.run --sizes 1m 5m --stages ingest prepare --repeat 1
+    python -m benchmarks.run --sizes 10k --startup
+"""
+import argparse
+import gc
+import json
+import os
+import platform
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+import pandas as pd
+from benchmarks.synthetic import generate_exports, generate_dataset, dirty_exports, parse_size
+from benchmarks.startup import measure_startup, print_startup
+from utils.ingest import process_data_original_logic, merge_exports
+from utils.data_processor import prepare_data_with_real_status
+from utils.week_metrics import filter_kanban_week, filter_target_week, compute_week_summary
+
+BASELINE_PATH = os.path.join(os.path.dirname(__file__), "baseline.json")
+
+def _stage_ingest(ctx):
+    return process_data_original_logic(ctx['df_req'].copy(), ctx['df_req_minha'].copy())
+
+def _stage_merge(ctx):
+    return merge_exports(ctx['df_req'], ctx['df_req_minha'])
+
+def _stage_merge_dirty(ctx):
+    # Chaves em texto na planilha da equipe e 1% de linhas repetidas: normalização + remoção antes do merge
+    return merge_exports(ctx['df_req_sujo'], ctx['df_req_minha_sujo'])
+
+def _stage_prepare(ctx):
+    return prepare_data_with_real_status(ctx['df_store'].copy(), ctx['fim'])
+
+def _stage_filter_kanban(ctx):
+    return filter_kanban_week(ctx['df'], ctx['ano'], ctx['semana'])
+
+def _stage_filter_analytics(ctx):
+    return filter_target_week(ctx['df'], ctx['ano'], ctx['semana'])
+
+def _stage_week_summary(ctx):
+    return compute_week_summary(ctx['df'], ctx['ano'], ctx['semana'])[1]
+
+def _stage_render_kanban(ctx):
+    from components.kanban import create_kanban_view
+    create_kanban_view(ctx['df'], ctx['ano'], ctx['semana'], 'Todos', 'Todos')
+
+def _stage_render_analytics(ctx):
+    from components.analytics import create_analytics
+    create_analytics(ctx['df'], ctx['ano'], ctx['semana'], 'Todos', 'Todos')
+
+def _stage_render_analytics_cold(ctx):
+    # Mesma renderização, mas montando todas as figuras (cache de figuras vazio)
+    from utils import figure_cache
+    figure_cache.clear()
+    _stage_render_analytics(ctx)
+
+def _stage_long_trends(ctx):
+    # Contagens de todo o histórico (sem o cache por versão), séries, redução LTTB e figuras (sem o cache de figuras)
+    from components.analytics import _fig_sla_historico, _fig_volume_historico
+    from utils.trends import trend_counts, volume_from_counts, sla_rate_from_counts, downsample
+    contagens = trend_counts(ctx['df'])
+    volume = volume_from_counts(contagens)
+    _fig_sla_historico.__wrapped__(downsample(sla_rate_from_counts(contagens)))
+    _fig_volume_historico.__wrapped__(downsample(volume['Abertos']), downsample(volume['Resolvidos']))
+    return volume
+
+def _stage_backlog_timeline(ctx):
+    # Matriz de backlog diário (eventos + soma acumulada) e a série de todos os responsáveis
+    from utils.backlog import BacklogTimeline
+    return BacklogTimeline(ctx['df']).series()
+
+def _stage_lead_time(ctx):
+    # Sketches semanais do tempo até a resolução e os percentis de 12 semanas por dimensão
+    from utils.lead_time import build_sketches, lead_time_percentiles, DIMENSOES
+    sketches = build_sketches(ctx['df'])
+    inicio = ctx['fim'] - timedelta(weeks=12)
+    return [lead_time_percentiles(sketches, dimensao, inicio, ctx['fim']) for dimensao in DIMENSOES]
+
+# Nome da etapa -> (função, chave do DataFrame de entrada no contexto)
+STAGES = {
+    'ingest': (_stage_ingest, 'df_req'),
+    'merge': (_stage_merge, 'df_req'),
+    'merge_dirty': (_stage_merge_dirty, 'df_req_sujo'),
+    'prepare': (_stage_prepare, 'df_store'),
+    'filter_kanban': (_stage_filter_kanban, 'df'),
+    'filter_analytics': (_stage_filter_analytics, 'df'),
+    'week_summary': (_stage_week_summary, 'df'),
+    'render_kanban': (_stage_render_kanban, 'df'),
+    'render_analytics': (_stage_render_analytics, 'df'),
+    'render_analytics_cold': (_stage_render_analytics_cold, 'df'),
+    'long_trends': (_stage_long_trends, 'df'),
+    'backlog_timeline': (_stage_backlog_timeline, 'df'),
+    'lead_time': (_stage_lead_time, 'df'),
+}
+
+def _silence_streamlit():
+    """Renderização em modo 'bare': descarta os avisos do Streamlit fora de um servidor"""
+    try:
+        from streamlit import config
+        from streamlit.logger import set_log_level
+    except ImportError:
+        return
+    # Fixar a opção antes do primeiro uso, senão a leitura da config restaura o nível padrão
+    config.set_option('logger.level', 'error')
+    set_log_level('error')
+
+def build_context(n, seed):
+    """Gera os dados sintéticos e a semana usada nos filtros"""
+    fim = pd.Timestamp(datetime.now().date())
+    df_req, df_req_minha = generate_exports(n, seed, fim)
+    df_store = generate_dataset(n, seed, fim)
+    df_req_sujo, df_req_minha_sujo = dirty_exports(df_req, df_req_minha, seed=seed)
+    referencia = (fim - timedelta(days=7)).isocalendar()
+    return {
+        'df_req': df_req,
+        'df_req_minha': df_req_minha,
+        'df_req_sujo': df_req_sujo,
+        'df_req_minha_sujo': df_req_minha_sujo,
+        'df_store': df_store,
+        # Data de referência fixa: as colunas que dependem de "hoje" não mudam entre medições
+        'df': prepare_data_with_real_status(df_store.copy(), fim),
+        'fim': fim,
+        'ano': referencia.year,
+        'semana': referencia.week,
+    }
+
+def measure(func, ctx, entrada, repeat):
+    """Mede tempo (melhor e mediana de `repeat` execuções) e pico de memória (tracemalloc)"""
+    tempos = []
+    saida = None
+    for _ in range(repeat):
+        gc.collect()
+        inicio = time.perf_counter()
+        saida = func(ctx)
+        tempos.append(time.perf_counter() - inicio)
+
+    # Pico de memória em uma execução separada, para não distorcer os tempos
+    gc.collect()
+    tracemalloc.start()
+    func(ctx)
+    _, pico = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    tempos.sort()
+    return {
+        'tempo_s': round(tempos[0], 6),
+        'mediana_s': round(tempos[len(tempos) // 2], 6),
+        'pico_mb': round(pico / 1024 ** 2, 3),
+        'linhas_entrada': len(ctx[entrada]),
+        'linhas_saida': len(saida) if saida is not None else None,
+    }
+
+def run(sizes, stages, repeat, seed):
+    """Executa as etapas selecionadas para cada tamanho de dataset"""
+    resultados = {}
+    for size in sizes:
+        n = parse_size(size)
+        print(f"\n=== {size} ({n:,} linhas) ===")
+        ctx = build_context(n, seed)
+        resultados[size] = {}
+        for nome in stages:
+            func, entrada = STAGES[nome]
+            resultado = measure(func, ctx, entrada, repeat)
+            resultados[size][nome] = resultado
+            print(f"  {nome:<22} {resultado['tempo_s'] * 1000:>10.1f} ms   pico {resultado['pico_mb']:>9.1f} MB")
+        del ctx
+        gc.collect()
+    return resultados
+
+def compare(resultados, baseline, tolerancia):
+    """Compara com o baseline e retorna a lista de regressões acima da tolerância"""
+    regressoes = []
+    print(f"\n=== Comparação com baseline (tolerância {tolerancia:.0%}) ===")
+    for size, etapas in resultados.items():
+        for nome, atual in etapas.items():
+            base = baseline.get('results', {}).get(size, {}).get(nome)
+            if base is None:
+                continue
+            razao_tempo = atual['tempo_s'] / base['tempo_s'] if base['tempo_s'] else float('inf')
+            # Medições de inicialização não têm pico de memória
+            if atual['pico_mb'] is None or base.get('pico_mb') is None:
+                razao_pico = 1.0
+            else:
+                razao_pico = atual['pico_mb'] / base['pico_mb'] if base['pico_mb'] else float('inf')
+            marca = ''
+            if razao_tempo > 1 + tolerancia or razao_pico > 1 + tolerancia:
+                marca = '  ⚠ REGRESSÃO'
+                regressoes.append((size, nome, razao_tempo, razao_pico))
+            print(f"  {size:<5} {nome:<22} tempo x{razao_tempo:.2f}   pico x{razao_pico:.2f}{marca}")
+    return regressoes
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark do dashboard de chamados")
+    parser.add_argument('--sizes', nargs='+', default=['10k', '100k'],
+                        help="Tamanhos do dataset sintético (10k, 100k, 1m, 5m ou número)")
+    parser.add_argument('--stages', nargs='+', default=list(STAGES), choices=list(STAGES))
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--baseline', default=BASELINE_PATH, help="Arquivo de baseline para comparação")
+    parser.add_argument('--save-baseline', action='store_true', help="Grava os resultados como novo baseline")
+    parser.add_argument('--output', help="Grava os resultados desta execução em JSON")
+    parser.add_argument('--tolerance', type=float, default=0.2, help="Regressão tolerada (0.2 = 20%%)")
+    parser.add_argument('--startup', action='store_true',
+                        help="Mede também import de main e primeira exibição (processos novos)")
+    args = parser.parse_args(argv)
+
+    _silence_streamlit()
+    resultados = run(args.sizes, args.stages, args.repeat, args.seed)
+    detalhes_startup = None
+    if args.startup:
+        resultados['startup'], detalhes_startup = measure_startup(args.repeat, seed=args.seed)
+        print_startup(resultados['startup'], detalhes_startup)
+    documento = {
+        'meta': {
+            'data': datetime.now().isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'pandas': pd.__version__,
+            'plataforma': platform.platform(),
+            'repeat': args.repeat,
+            'seed': args.seed,
+        },
+        'results': resultados,
+    }
+    if detalhes_startup is not None:
+        documento['startup'] = detalhes_startup
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as arquivo:
+            json.dump(documento, arquivo, indent=2, ensure_ascii=False)
+
+    if args.save_baseline:
+        with open(args.baseline, 'w', encoding='utf-8') as arquivo:
+            json.dump(documento, arquivo, indent=2, ensure_ascii=False)
+        print(f"\nBaseline gravado em {args.baseline}")
+        return 0
+
+    if os.path.exists(args.baseline):
+        with open(args.baseline, encoding='utf-8') as arquivo:
+            baseline = json.load(arquivo)
+        if compare(resultados, baseline, args.tolerance):
+            return 1
+    else:
+        print(f"\nSem baseline em {args.baseline} (use --save-baseline para criar)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
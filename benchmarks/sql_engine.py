@@ -0,0 +1,69 @@
+"""Compara o caminho em pandas com o motor SQL (DuckDB) nas agregações de todo o histórico.
+
+Para cada tamanho, verifica que as saídas são idênticas e mede o tempo dos dois caminhos.
+
+Exemplo:
+    python -m benchmarks.sql_engine --sizes 10k 100k 1m
+"""
+import argparse
+import sys
+import time
+import pandas as pd
+from benchmarks.synthetic import generate_dataset, parse_size
+from utils.data_processor import prepare_data_with_real_status
+from utils import sql_engine
+from utils.trends import daily_volume, weekly_sla_rate
+
+# Agregação -> (função, comparação das saídas)
+AGREGACOES = {
+    'daily_volume': (daily_volume, pd.testing.assert_frame_equal),
+    'weekly_sla_rate': (weekly_sla_rate, pd.testing.assert_series_equal),
+}
+
+def _medir(func, df, repeat):
+    """Saída e menor tempo (ms) em `repeat` execuções"""
+    tempos = []
+    for _ in range(repeat):
+        inicio = time.perf_counter()
+        saida = func(df)
+        tempos.append(time.perf_counter() - inicio)
+    return saida, min(tempos) * 1000
+
+def run(sizes, repeat, seed):
+    """Mede e compara os dois motores; retorna False se alguma saída for diferente"""
+    iguais = True
+    for rotulo in sizes:
+        n = parse_size(rotulo)
+        df = prepare_data_with_real_status(generate_dataset(n, seed))
+        print(f"\n=== {rotulo} ({n:,} linhas) ===")
+        for nome, (func, comparar) in AGREGACOES.items():
+            sql_engine.configure('pandas')
+            esperado, tempo_pandas = _medir(func, df, repeat)
+            sql_engine.configure('duckdb')
+            obtido, tempo_sql = _medir(func, df, repeat)
+            try:
+                comparar(esperado, obtido)
+                situacao = "idêntico"
+            except AssertionError as erro:
+                iguais = False
+                situacao = f"DIFERENTE: {str(erro).splitlines()[0]}"
+            print(f"  {nome:<18} pandas {tempo_pandas:8.1f} ms   duckdb {tempo_sql:8.1f} ms   {situacao}")
+    sql_engine.configure()
+    return iguais
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Paridade e tempo: pandas vs motor SQL (DuckDB)")
+    parser.add_argument('--sizes', nargs='+', default=['10k', '100k'], help="Tamanhos (ex.: 10k 1m)")
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args(argv)
+
+    try:
+        sql_engine.connect().close()
+    except RuntimeError as erro:
+        print(f"❌ {erro}", file=sys.stderr)
+        return 1
+    return 0 if run(args.sizes, args.repeat, args.seed) else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
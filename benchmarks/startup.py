@@ -0,0 +1,128 @@
+"""Tempo de importação e de primeira exibição do dashboard, sempre em processos novos.
+
+Exemplo:
+    python -m benchmarks.startup --repeat 5
+"""
+import argparse
+import json
+import os
+import re
+import subprocess
+import sys
+import tempfile
+import time
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MAIN = os.path.join(RAIZ, "main.py")
+
+# Módulos cujo carregamento queremos acompanhar no import de main
+MODULOS_PESADOS = ['plotly.express', 'plotly.graph_objects', 'openpyxl', 'pyarrow', 'pandas', 'numpy', 'streamlit']
+
+_CODIGO_IMPORT = """
+import json, sys, time
+inicio = time.perf_counter()
+import main
+tempo = time.perf_counter() - inicio
+print(json.dumps({'tempo_s': tempo, 'carregados': [m for m in %r if m in sys.modules]}))
+""" % (MODULOS_PESADOS,)
+
+# A primeira execução roda com o painel de desempenho ativo para obter o fim de cada etapa
+_CODIGO_PRIMEIRA_EXECUCAO = """
+import json, time
+from benchmarks.run import _silence_streamlit
+_silence_streamlit()
+from streamlit.testing.v1 import AppTest
+app = AppTest.from_file(%r, default_timeout=600)
+app.session_state['perf_painel'] = True
+inicio = time.time()
+app.run()
+total = time.time() - inicio
+registro = app.session_state['perf_historico'][-1]
+atraso = registro.inicio - inicio
+kanban = [e.fim_s for e in registro.etapas if e.nome == 'create_kanban_view']
+print(json.dumps({
+    'primeira_execucao': total,
+    'kanban_visivel': atraso + kanban[0] if kanban else None,
+    'erros': [str(e.value) for e in app.exception],
+}))
+""" % (MAIN,)
+
+def _executar(codigo, cwd=RAIZ, extra_args=()):
+    env = dict(os.environ, PYTHONPATH=RAIZ + os.pathsep + os.environ.get('PYTHONPATH', ''))
+    resultado = subprocess.run([sys.executable, *extra_args, '-c', codigo], cwd=cwd, env=env,
+                               capture_output=True, text=True, check=True)
+    return resultado
+
+def _ultima_linha_json(saida):
+    return json.loads(saida.strip().splitlines()[-1])
+
+def import_breakdown():
+    """Tempo cumulativo (ms) de cada módulo pesado no import de main (python -X importtime)"""
+    resultado = _executar("import main", extra_args=('-X', 'importtime'))
+    tempos = {}
+    for linha in resultado.stderr.splitlines():
+        partes = re.match(r"import time:\s+\d+ \|\s+(\d+) \|\s+(\S+)", linha)
+        if partes and partes.group(2) in MODULOS_PESADOS:
+            tempos[partes.group(2)] = round(int(partes.group(1)) / 1000, 1)
+    return tempos
+
+def _resumo(tempos):
+    tempos = sorted(tempos)
+    return {'tempo_s': round(tempos[0], 6), 'mediana_s': round(tempos[len(tempos) // 2], 6), 'pico_mb': None}
+
+def measure_startup(repeat=3, linhas=10_000, seed=42):
+    """Mede import de main, primeira execução completa e instante em que o Kanban fica pronto"""
+    from benchmarks.synthetic import generate_dataset
+    from utils.store import DATA_PATH, write_dataset
+
+    importacoes = [_ultima_linha_json(_executar(_CODIGO_IMPORT).stdout) for _ in range(repeat)]
+
+    primeiras = []
+    with tempfile.TemporaryDirectory(prefix="startup_") as pasta:
+        write_dataset(generate_dataset(linhas, seed), os.path.join(pasta, DATA_PATH))
+        for _ in range(repeat):
+            medicao = _ultima_linha_json(_executar(_CODIGO_PRIMEIRA_EXECUCAO, cwd=pasta).stdout)
+            if medicao['erros']:
+                raise RuntimeError(f"Erro na primeira execução: {medicao['erros']}")
+            primeiras.append(medicao)
+
+    resultados = {
+        'import_main': _resumo([m['tempo_s'] for m in importacoes]),
+        'primeira_execucao': _resumo([m['primeira_execucao'] for m in primeiras]),
+    }
+    if all(m['kanban_visivel'] is not None for m in primeiras):
+        resultados['kanban_visivel'] = _resumo([m['kanban_visivel'] for m in primeiras])
+    detalhes = {
+        'carregados_no_import': importacoes[0]['carregados'],
+        'import_ms': import_breakdown(),
+        'linhas': linhas,
+    }
+    return resultados, detalhes
+
+def print_startup(resultados, detalhes):
+    print(f"\n=== Inicialização ({detalhes['linhas']:,} linhas na primeira execução) ===")
+    for nome, resultado in resultados.items():
+        print(f"  {nome:<22} {resultado['tempo_s'] * 1000:>10.1f} ms")
+    print(f"  Módulos carregados por 'import main': {', '.join(detalhes['carregados_no_import'])}")
+    for modulo, ms in detalhes['import_ms'].items():
+        print(f"    {modulo:<22} {ms:>8.1f} ms (cumulativo)")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Tempo de inicialização do dashboard")
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--rows', type=int, default=10_000, help="Linhas do dataset sintético da primeira execução")
+    parser.add_argument('--output', help="Grava os resultados em JSON")
+    args = parser.parse_args(argv)
+
+    inicio = time.perf_counter()
+    resultados, detalhes = measure_startup(args.repeat, args.rows)
+    print_startup(resultados, detalhes)
+    print(f"\n({time.perf_counter() - inicio:.1f}s)")
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as arquivo:
+            json.dump({'results': {'startup': resultados}, 'detalhes': detalhes}, arquivo, indent=2, ensure_ascii=False)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
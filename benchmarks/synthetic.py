@@ -0,0 +1,130 @@
+"""Gerador de chamados sintéticos com o mesmo esquema das exportações reais."""
+import numpy as np
+import pandas as pd
+
+# Distribuição aproximada dos status observada nas exportações reais
+STATUS_PESOS = {
+    'Fechado': 0.66,
+    'Cancelado': 0.28,
+    'Resolvido': 0.03,
+    'Em Andamento': 0.005,
+    'Designado': 0.005,
+    'Pausa Equipe SCADA': 0.004,
+    'Pendente Agendamento': 0.004,
+    'Pendente Aprovação': 0.003,
+    'Pendente Fornecedor': 0.004,
+    'Pendente Tarefa de TI': 0.003,
+    'Pendente Usuário': 0.002,
+}
+
+RESUMOS = [
+    'Desenvolvimento SCADA', 'Correção / Ajuste SCADA', 'Comissionamento / Integração / Retrofit SCADA',
+    'Correção ou ajuste SCADA', 'Comissionamento, integração ou retrofit SCADA', 'Apoio Operacional',
+    'Configuração de Equipamento', 'Cadastro de Ponto', 'Parametrização de Relé', 'Atualização de Base',
+]
+
+SIZES = {'10k': 10_000, '100k': 100_000, '1m': 1_000_000, '5m': 5_000_000}
+
+def parse_size(valor):
+    """Converte '10k', '1m' ou '2500' em número de linhas"""
+    valor = str(valor).lower()
+    if valor in SIZES:
+        return SIZES[valor]
+    if valor.endswith('k'):
+        return int(float(valor[:-1]) * 1_000)
+    if valor.endswith('m'):
+        return int(float(valor[:-1]) * 1_000_000)
+    return int(valor)
+
+def generate_exports(n, seed=42, fim=None, anos=3):
+    """Gera as duas planilhas cruas (Relatório de Requisições e Requisições da Minha Equipe)"""
+    rng = np.random.default_rng(seed)
+    fim = pd.Timestamp(fim) if fim is not None else pd.Timestamp.now().normalize()
+    inicio = fim - pd.Timedelta(days=365 * anos)
+
+    responsaveis = np.array([f"Responsavel {i:02d} Sobrenome{i:02d}" for i in range(46)], dtype=object)
+    empresas = np.array([f"EMPRESA-{i:03d}" for i in range(21)], dtype=object)
+    cidades = np.array([f"UF - CIDADE {i:03d}" for i in range(500)], dtype=object)
+    solicitantes = np.array([f"Solicitante {i:03d}" for i in range(580)], dtype=object)
+    status_nomes = np.array(list(STATUS_PESOS), dtype=object)
+    status_pesos = np.array(list(STATUS_PESOS.values()))
+    status_pesos = status_pesos / status_pesos.sum()
+
+    num_chamado = np.arange(30_000_000, 30_000_000 + n, dtype='int64')
+    segundos = rng.integers(0, int((fim - inicio).total_seconds()), n)
+    abertura = inicio + pd.to_timedelta(segundos, unit='s')
+
+    prazo = pd.to_timedelta(rng.choice([2, 5, 10, 14, 14, 14], n) * 86400 + rng.integers(0, 3600, n), unit='s')
+    prev_solucao = abertura + prazo
+    quebra_sla = pd.Series(prev_solucao).where(rng.random(n) < 0.23)
+
+    status = rng.choice(status_nomes, n, p=status_pesos)
+    finalizado = np.isin(status, ['Resolvido', 'Fechado'])
+    duracao = pd.to_timedelta(rng.exponential(6.0, n) * 86400, unit='s')
+    resolucao = pd.Series(abertura + duracao).where(finalizado)
+    fechamento = resolucao.where(status == 'Fechado') + pd.Timedelta(days=2)
+    sla_violado = finalizado & (rng.random(n) < 0.026)
+
+    df_req = pd.DataFrame({
+        'NUM_CHAMADO': num_chamado,
+        'DATA_ABERTURA': abertura,
+        'DATA_PREV_SOLUCAO': prev_solucao,
+        'DATA_QUEBRA_SLA': quebra_sla.values,
+        'SLA_VIOLADO': sla_violado,
+        'DATA_RESOLUCAO': resolucao.values,
+        'DATA_FECHAMENTO': fechamento.values,
+        'Status': status,
+        'TITULO': rng.choice(np.array(RESUMOS, dtype=object), n),
+        'SOLICITANTE': rng.choice(solicitantes, n),
+        'RESPONSAVEL': rng.choice(responsaveis, n),
+        'EMPRESA_SOLICITANTE': rng.choice(empresas, n),
+        'CLIENTE_CIDADE': rng.choice(cidades, n),
+        'CLIENTE_UF': 'UF - Estado',
+        'RESOLVEDOR_PADRAO': 'AUTOMAÇÃO TELECOM',
+    })
+
+    # Planilha da equipe: cerca de 2/3 dos chamados, com Data Esperada em parte deles
+    minha = df_req[rng.random(n) < 0.66]
+    m = len(minha)
+    data_esperada = (minha['DATA_ABERTURA'] + pd.to_timedelta(rng.integers(1, 15, m), unit='D')).dt.normalize()
+    df_req_minha = pd.DataFrame({
+        'Requisição de Serviço': minha['NUM_CHAMADO'].values,
+        'Data Esperada': data_esperada.where(rng.random(m) < 0.6).values,
+        'Resumo': minha['TITULO'].values,
+        'Status': minha['Status'].values,
+        'Proprietário': minha['RESPONSAVEL'].values,
+        'Cliente': minha['SOLICITANTE'].values,
+        'Criado em': minha['DATA_ABERTURA'].values,
+        'Resolvido em': minha['DATA_RESOLUCAO'].values,
+        'SLA - Data Prevista Solução': minha['DATA_PREV_SOLUCAO'].values,
+        'SLA - Data Quebra': minha['DATA_QUEBRA_SLA'].values,
+    })
+
+    return df_req, df_req_minha
+
+def dirty_exports(df_req, df_req_minha, repetidas=0.01, seed=42):
+    """Versão "suja" das planilhas: número do chamado como texto na planilha da equipe e linhas repetidas"""
+    rng = np.random.default_rng(seed)
+    df_req_minha = df_req_minha.assign(**{'Requisição de Serviço': df_req_minha['Requisição de Serviço'].astype('str')})
+    partes = []
+    for df in (df_req, df_req_minha):
+        extras = df.iloc[rng.choice(len(df), int(len(df) * repetidas), replace=False)]
+        partes.append(pd.concat([df, extras], ignore_index=True))
+    return partes[0], partes[1]
+
+def generate_dataset(n, seed=42, fim=None, anos=3):
+    """Gera o parquet já consolidado (esquema de requisicoes_data.parquet) sem passar pelo merge"""
+    df_req, df_req_minha = generate_exports(n, seed, fim, anos)
+    minha = df_req_minha.set_index('Requisição de Serviço')
+
+    df = df_req.drop(columns=['RESOLVEDOR_PADRAO']).rename(columns={
+        'NUM_CHAMADO': 'REQUISICAO', 'Status': 'STATUS', 'TITULO': 'RESUMO',
+    })
+    df['Data Esperada'] = minha['Data Esperada'].reindex(df['REQUISICAO']).values
+    df['STATUS_MINHA'] = minha['Status'].reindex(df['REQUISICAO']).values
+
+    # DATA_ALVO = Data Esperada > DATA_QUEBRA_SLA > DATA_PREV_SOLUCAO (mesma regra do merge)
+    df['DATA_ALVO'] = (df['Data Esperada']
+                       .fillna(df['DATA_QUEBRA_SLA'])
+                       .fillna(df['DATA_PREV_SOLUCAO']))
+    return df
@@ -0,0 +1,268 @@
+"""Linha de comando para processar as exportações e gerar resumos sem abrir o Streamlit.
+
+Exemplos:
+    python cli.py processar --req "Relatório de Requisições.xlsx" --minha "Requisições da Minha Equipe.xlsx"
+    python cli.py resumo --ano 2025 --semana 49 --formato json
+    python cli.py relatorio --ano 2025 --semana 49 --todos --pasta relatorios
+    python cli.py historico --data 2025-11-30 --saida estado_2025-11-30.csv
+    python cli.py tempo --inicio 2025-10-01 --fim 2025-12-31 --por RESUMO
+    python cli.py observar --pasta exportacoes
+    python cli.py consulta "SELECT RESPONSAVEL, count(*) AS chamados FROM chamados GROUP BY ALL ORDER BY 2 DESC"
+"""
+import argparse
+import json
+import logging
+import os
+import sys
+import time
+import pandas as pd
+from utils.ingest import ingest_exports, describe_key_report
+from utils.data_processor import prepare_data_with_real_status
+from utils.store import DATA_PATH, AGGREGATES_PATH, HISTORY_PATH, LEAD_TIME_PATH, write_dataset, write_team_dataset, \
+    write_ticket_dataset, read_team_dataset
+from config.settings import EQUIPE_PADRAO, PASTA_ENTRADA, PASTA_ENTRADA_INTERVALO
+from utils import history, sql_engine
+from utils.drop_folder import DropFolderWatcher
+from utils.lead_time import build_sketches, sketches_table, read_sketches, lead_time_percentiles, DIMENSOES
+from utils.week_metrics import build_weekly_aggregates, compute_week_summary
+from utils.weekly_report import build_weekly_report, write_weekly_report, generate_weekly_reports, report_file_name
+
+def cmd_processar(args):
+    """Processa as duas planilhas, grava o parquet, os agregados semanais e os sketches do tempo até a resolução"""
+    inicio = time.perf_counter()
+    relatorio = {}
+    df_final = ingest_exports(args.req, args.minha, relatorio)
+    for aviso in describe_key_report(relatorio):
+        print(f"⚠️ {aviso}", file=sys.stderr)
+    write_ticket_dataset(df_final, args.saida)
+    print(f"✅ {len(df_final):,} chamados gravados em {args.saida} ({time.perf_counter() - inicio:.1f}s)")
+
+    if not args.sem_historico:
+        inicio = time.perf_counter()
+        alteracoes = history.record_snapshot(df_final, args.historico)
+        print(f"✅ {alteracoes:,} alterações registradas no histórico em {args.historico} "
+              f"({time.perf_counter() - inicio:.1f}s)")
+
+    if args.sem_agregados:
+        return 0
+
+    inicio = time.perf_counter()
+    df_preparado = prepare_data_with_real_status(df_final)
+    # Agregados e sketches separados por equipe (coluna EQUIPE), como o parquet dos chamados
+    equipes = df_preparado.groupby('EQUIPE', sort=True)
+    agregados = pd.concat([build_weekly_aggregates(parte).assign(EQUIPE=equipe) for equipe, parte in equipes],
+                          ignore_index=True)
+    write_team_dataset(agregados, args.agregados)
+    print(f"✅ {len(agregados):,} linhas de agregados gravadas em {args.agregados} ({time.perf_counter() - inicio:.1f}s)")
+
+    inicio = time.perf_counter()
+    sketches = pd.concat([sketches_table(build_sketches(parte)).assign(EQUIPE=equipe) for equipe, parte in equipes],
+                         ignore_index=True)
+    write_team_dataset(sketches, args.tempo_resolucao)
+    print(f"✅ {len(sketches):,} linhas de sketches do tempo até a resolução gravadas em {args.tempo_resolucao} "
+          f"({time.perf_counter() - inicio:.1f}s)")
+    return 0
+
+def cmd_resumo(args):
+    """Emite o resumo de uma semana (métricas, taxa SLA, programados/extras) em CSV ou JSON"""
+    df = prepare_data_with_real_status(read_team_dataset(args.dados, args.equipe))
+    metricas, dias = compute_week_summary(df, args.ano, args.semana, args.responsavel)
+
+    if args.formato == 'json':
+        dias = dias.assign(Data=dias['Data'].astype(str))
+        conteudo = json.dumps({'metricas': metricas, 'dias': dias.to_dict(orient='records')},
+                              ensure_ascii=False, indent=2)
+    else:
+        total = {'Data': 'TOTAL', 'Chamados': metricas['total'],
+                 'Programados': metricas['programados'], 'Extras': metricas['extras']}
+        conteudo = pd.concat([dias, pd.DataFrame([total])], ignore_index=True).to_csv(index=False)
+
+    if args.saida:
+        with open(args.saida, 'w', encoding='utf-8') as arquivo:
+            arquivo.write(conteudo)
+        print(f"✅ Resumo gravado em {args.saida}")
+    else:
+        sys.stdout.write(conteudo + ('\n' if not conteudo.endswith('\n') else ''))
+    return 0
+
+def cmd_relatorio(args):
+    """Gera o Relatório Semanal em Excel (um responsável ou, com --todos, a equipe e cada responsável)"""
+    inicio = time.perf_counter()
+    df = prepare_data_with_real_status(read_team_dataset(args.dados, args.equipe))
+
+    if args.todos:
+        arquivos = generate_weekly_reports(df, args.ano, args.semana, args.pasta, args.processos)
+        print(f"✅ {len(arquivos)} relatórios gravados em {args.pasta} ({time.perf_counter() - inicio:.1f}s)")
+        return 0
+
+    saida = args.saida or os.path.join(args.pasta, report_file_name(args.ano, args.semana, args.responsavel))
+    os.makedirs(os.path.dirname(saida) or '.', exist_ok=True)
+    write_weekly_report(build_weekly_report(df, args.ano, args.semana, args.responsavel), saida)
+    print(f"✅ Relatório gravado em {saida} ({time.perf_counter() - inicio:.1f}s)")
+    return 0
+
+def cmd_historico(args):
+    """Estado dos chamados em uma data ou tempo em cada status, a partir do histórico"""
+    if args.compactar:
+        caminho = history.compact(args.pasta)
+        print(f"✅ Histórico compactado em {caminho}" if caminho else "Nada a compactar")
+        return 0
+
+    log = history.read_log(args.pasta, args.data)
+    if args.tempo_status:
+        periodos = history.time_in_status(ate=args.data, log=log)
+        tabela = history.time_in_status_summary(periodos)
+    else:
+        tabela = history.state_as_of(args.data, log=log)
+
+    if not args.saida:
+        print(tabela.to_string(index=False))
+    elif args.saida.endswith('.parquet'):
+        write_dataset(tabela, args.saida)
+    else:
+        tabela.to_csv(args.saida, index=False)
+    if args.saida:
+        print(f"✅ {len(tabela):,} linhas gravadas em {args.saida}")
+    return 0
+
+def cmd_tempo(args):
+    """Percentis do tempo até a resolução em um período, somando os sketches semanais gravados"""
+    if not os.path.exists(args.sketches):
+        print(f"❌ {args.sketches} não encontrado: rode 'processar' antes", file=sys.stderr)
+        return 1
+
+    tabela = lead_time_percentiles(read_sketches(args.sketches, args.equipe), args.por, args.inicio, args.fim)
+    for coluna in tabela.columns[2:]:
+        tabela[coluna] = (tabela[coluna] / 24).round(2)
+    tabela = tabela.rename(columns={coluna: f"{coluna}_dias" for coluna in tabela.columns[2:]})
+
+    if not args.saida:
+        print(tabela.to_string(index=False))
+    else:
+        tabela.to_csv(args.saida, index=False)
+        print(f"✅ {len(tabela):,} linhas gravadas em {args.saida}")
+    return 0
+
+def cmd_consulta(args):
+    """Consulta SQL (DuckDB) direto sobre o parquet processado, exposto como a tabela `chamados`"""
+    try:
+        conexao = sql_engine.connect()
+    except RuntimeError as erro:
+        print(f"❌ {erro}", file=sys.stderr)
+        return 1
+
+    with conexao:
+        try:
+            tabela = sql_engine.query(args.sql, conexao=conexao, chamados=args.dados)
+        except Exception as erro:
+            print(f"❌ Erro na consulta: {erro}", file=sys.stderr)
+            return 1
+    if not args.saida:
+        print(tabela.to_string(index=False))
+    elif args.saida.endswith('.parquet'):
+        write_dataset(tabela, args.saida)
+    else:
+        tabela.to_csv(args.saida, index=False)
+    if args.saida:
+        print(f"✅ {len(tabela):,} linhas gravadas em {args.saida}")
+    return 0
+
+def cmd_observar(args):
+    """Monitora a pasta e processa as exportações que chegarem (Ctrl+C para parar)"""
+    if not args.pasta:
+        print("❌ Informe a pasta com --pasta ou DASHBOARD_PASTA_ENTRADA", file=sys.stderr)
+        return 1
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(message)s", datefmt="%d/%m %H:%M:%S")
+    watcher = DropFolderWatcher(args.pasta, args.saida, None if args.sem_historico else args.historico,
+                                args.intervalo)
+    if args.uma_vez:
+        # Duas verificações: a primeira só registra os arquivos, a segunda confirma que a cópia terminou
+        watcher.check()
+        time.sleep(args.intervalo)
+        watcher.check()
+        return 1 if watcher.ultimo is not None and watcher.ultimo.status == 'erro' else 0
+    try:
+        watcher.run()
+    except KeyboardInterrupt:
+        watcher.stop()
+    return 0
+
+def build_parser():
+    """Monta o parser de argumentos da linha de comando"""
+    parser = argparse.ArgumentParser(description="Processamento e relatórios dos chamados fora do Streamlit")
+    subparsers = parser.add_subparsers(dest='comando', required=True)
+
+    processar = subparsers.add_parser('processar', help="Processa as planilhas e grava o parquet")
+    processar.add_argument('--req', required=True, help="Relatório de Requisições.xlsx")
+    processar.add_argument('--minha', required=True, help="Requisições da Minha Equipe.xlsx")
+    processar.add_argument('--saida', default=DATA_PATH, help="Parquet de saída")
+    processar.add_argument('--agregados', default=AGGREGATES_PATH, help="Parquet de agregados semanais")
+    processar.add_argument('--sem-agregados', action='store_true', help="Não calcular agregados semanais e sketches")
+    processar.add_argument('--tempo-resolucao', default=LEAD_TIME_PATH, help="Parquet de sketches do tempo até a resolução")
+    processar.add_argument('--historico', default=HISTORY_PATH, help="Pasta do histórico de alterações")
+    processar.add_argument('--sem-historico', action='store_true', help="Não registrar o snapshot no histórico")
+    processar.set_defaults(func=cmd_processar)
+
+    resumo = subparsers.add_parser('resumo', help="Emite o resumo de uma semana")
+    resumo.add_argument('--ano', type=int, required=True)
+    resumo.add_argument('--semana', type=int, required=True)
+    resumo.add_argument('--responsavel', default='Todos')
+    resumo.add_argument('--formato', choices=['json', 'csv'], default='json')
+    resumo.add_argument('--dados', default=DATA_PATH, help="Parquet processado")
+    resumo.add_argument('--saida', help="Arquivo de saída (padrão: stdout)")
+    resumo.add_argument('--equipe', default=EQUIPE_PADRAO, help="Equipe (RESOLVEDOR_PADRAO)")
+    resumo.set_defaults(func=cmd_resumo)
+
+    relatorio = subparsers.add_parser('relatorio', help="Gera o Relatório Semanal em Excel")
+    relatorio.add_argument('--ano', type=int, required=True)
+    relatorio.add_argument('--semana', type=int, required=True)
+    relatorio.add_argument('--responsavel', default='Todos')
+    relatorio.add_argument('--todos', action='store_true', help="Equipe e cada responsável, em processos paralelos")
+    relatorio.add_argument('--processos', type=int, help="Processos em paralelo com --todos (padrão: núcleos da máquina)")
+    relatorio.add_argument('--pasta', default='relatorios', help="Pasta de saída")
+    relatorio.add_argument('--saida', help="Arquivo .xlsx de saída (sem --todos)")
+    relatorio.add_argument('--dados', default=DATA_PATH, help="Parquet processado")
+    relatorio.add_argument('--equipe', default=EQUIPE_PADRAO, help="Equipe (RESOLVEDOR_PADRAO)")
+    relatorio.set_defaults(func=cmd_relatorio)
+
+    historico = subparsers.add_parser('historico', help="Consulta o histórico de alterações dos chamados")
+    historico.add_argument('--data', help="Data/hora de referência (padrão: último snapshot)")
+    historico.add_argument('--tempo-status', action='store_true', help="Resumo do tempo em cada status")
+    historico.add_argument('--compactar', action='store_true', help="Reúne os deltas em um único log")
+    historico.add_argument('--pasta', default=HISTORY_PATH, help="Pasta do histórico")
+    historico.add_argument('--saida', help="Arquivo .csv ou .parquet de saída (padrão: imprime na tela)")
+    historico.set_defaults(func=cmd_historico)
+
+    tempo = subparsers.add_parser('tempo', help="Percentis do tempo até a resolução em um período")
+    tempo.add_argument('--inicio', help="Primeiro dia do período (semana da resolução; padrão: desde o início)")
+    tempo.add_argument('--fim', help="Último dia do período (padrão: até o fim)")
+    tempo.add_argument('--por', choices=list(DIMENSOES), default='RESPONSAVEL', help="Dimensão do agrupamento")
+    tempo.add_argument('--sketches', default=LEAD_TIME_PATH, help="Parquet de sketches gravado pelo 'processar'")
+    tempo.add_argument('--saida', help="Arquivo .csv de saída (padrão: imprime na tela)")
+    tempo.add_argument('--equipe', default=EQUIPE_PADRAO, help="Equipe (RESOLVEDOR_PADRAO)")
+    tempo.set_defaults(func=cmd_tempo)
+
+    observar = subparsers.add_parser('observar', help="Processa automaticamente as exportações deixadas em uma pasta")
+    observar.add_argument('--pasta', default=PASTA_ENTRADA, help="Pasta monitorada (padrão: DASHBOARD_PASTA_ENTRADA)")
+    observar.add_argument('--saida', default=DATA_PATH, help="Parquet de saída")
+    observar.add_argument('--historico', default=HISTORY_PATH, help="Pasta do histórico de alterações")
+    observar.add_argument('--sem-historico', action='store_true', help="Não registrar o snapshot no histórico")
+    observar.add_argument('--intervalo', type=float, default=PASTA_ENTRADA_INTERVALO, help="Segundos entre verificações")
+    observar.add_argument('--uma-vez', action='store_true', help="Verifica a pasta uma vez e sai")
+    observar.set_defaults(func=cmd_observar)
+
+    consulta = subparsers.add_parser('consulta', help="Consulta SQL (DuckDB) sobre o parquet processado")
+    consulta.add_argument('sql', help="Consulta; o parquet é a tabela `chamados`")
+    consulta.add_argument('--dados', default=DATA_PATH, help="Parquet processado")
+    consulta.add_argument('--saida', help="Arquivo .csv ou .parquet de saída (padrão: imprime na tela)")
+    consulta.set_defaults(func=cmd_consulta)
+
+    return parser
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,15 +1,28 @@
 import streamlit as st
-import plotly.express as px
-import plotly.graph_objects as go
 import pandas as pd
+from functools import partial
 from components.kanban import get_week_dates
+from utils.date_logic import compute_display_dates
+from utils.week_metrics import (filter_target_week, count_programados_extras, status_distribution,
+                                empresa_distribution, resumo_distribution, sla_violated_tickets, count_values)
+from utils import perf
+from utils.figure_cache import cached_figure
+from utils.export import FORMATOS, export_bytes, export_file_name
+from utils.trends import long_horizon_series, downsample, lttb_indices, PONTOS_MAX, LIMITE_WEBGL
+from utils.backlog import get_timeline
+from utils.lead_time import get_sketches, lead_time_percentiles, weekly_lead_time, DIMENSOES, QUANTIS
+
+# plotly é importado dentro das funções de gráfico: só é carregado quando uma aba com gráfico é desenhada.
+# As figuras são montadas por funções _fig_* a partir dos dados já agregados e ficam em cache
+# (utils.figure_cache) enquanto esses dados e os parâmetros do gráfico não mudarem.
 
 def create_analytics(df, ano, semana, responsavel, status_filtrados):
     """Cria análises focadas na DATA_ALVO com gráfico de barras empilhadas"""
     st.subheader("📊 Análise de Dados")
     
     # Filtrar dados
-    df_filtered = _filter_analytics_data(df, ano, semana, responsavel, status_filtrados)
+    with perf.stage("analytics: filtro", df) as etapa:
+        df_filtered = etapa.set_output(_filter_analytics_data(df, ano, semana, responsavel, status_filtrados))
     
     if len(df_filtered) == 0:
         st.info("Nenhum dado para análise com os filtros selecionados.")
@@ -18,45 +31,34 @@ def create_analytics(df, ano, semana, responsavel, status_filtrados):
     # Criar abas para diferentes análises
     tab1, tab2, tab3, tab4, tab5, tab6 = st.tabs(["📈 Por Data Alvo", "🎯 Análise SLA", "👥 Por Responsável", "📊 Programados vs Extras", "📋 Lista Detalhada", "📑 Resumo Detalhado"])
     
-    with tab1:
+    with tab1, perf.stage("analytics: Por Data Alvo", df_filtered):
         _create_data_alvo_analysis(df_filtered, ano, semana)
     
-    with tab2:
+    with tab2, perf.stage("analytics: Análise SLA", df_filtered):
         _create_sla_analysis(df_filtered, responsavel, status_filtrados, df)
         _create_sla_violated_table(df_filtered)
+        with perf.stage("analytics: Tendência de Longo Prazo", df):
+            _create_long_horizon_trends(df, responsavel, status_filtrados)
     
-    with tab3:
+    with tab3, perf.stage("analytics: Por Responsável", df_filtered):
         _create_responsavel_analysis(df_filtered, responsavel, ano, semana)
+        with perf.stage("analytics: Backlog ao Longo do Tempo", df):
+            _create_backlog_timeline(df, responsavel)
+        with perf.stage("analytics: Tempo até a Resolução", df):
+            _create_lead_time_analysis(df, responsavel)
     
-    with tab4:
+    with tab4, perf.stage("analytics: Programados vs Extras", df_filtered):
         _create_programados_extras_analysis(df_filtered, ano, semana)
     
-    with tab5:
+    with tab5, perf.stage("analytics: Lista Detalhada", df_filtered):
         _create_detailed_list(df_filtered)
     
-    with tab6:
+    with tab6, perf.stage("analytics: Resumo Detalhado", df_filtered):
         _create_resumo_detalhado(df_filtered, ano, semana)
 
 def _filter_analytics_data(df, ano, semana, responsavel, status_filtrados):
     """Filtra dados para análise - APENAS chamados com DATA_ALVO nesta semana"""
-    
-    # 🔧 CORREÇÃO CRÍTICA: Análise deve mostrar APENAS chamados com DATA_ALVO nesta semana
-    # NÃO incluir chamados resolvidos em outra semana (isso distorce os gráficos)
-    
-    # Filtrar APENAS por DATA_ALVO
-    df_filtered = df[
-        (df['ANO_ALVO'] == ano) & 
-        (df['SEMANA_ALVO'] == semana)
-    ].copy()
-    
-    # Aplicar filtros adicionais
-    if responsavel != 'Todos':
-        df_filtered = df_filtered[df_filtered['RESPONSAVEL'] == responsavel]
-    
-    if status_filtrados != 'Todos':
-        df_filtered = df_filtered[df_filtered['STATUS'].isin(status_filtrados)]
-    
-    return df_filtered
+    return filter_target_week(df, ano, semana, responsavel, status_filtrados)
 
 def _create_data_alvo_analysis(df_filtered, ano, semana):
     """Cria análise por data alvo"""
@@ -73,18 +75,9 @@ def _create_data_alvo_analysis(df_filtered, ano, semana):
 
 def _create_stacked_bar_chart(df_filtered, ano, semana):
     """Cria gráfico de barras empilhadas"""
-    def get_display_date_analytics(row):
-        """Mesma lógica do get_display_date do Kanban"""
-        status_clean = str(row.get('STATUS', '')).strip()
-        
-        if status_clean.lower() in ['resolvido', 'fechado'] and pd.notna(row.get('DATA_RESOLUCAO')):
-            return row['DATA_RESOLUCAO'].date()
-        else:
-            return row['DATA_ALVO_DATE']
-    
-    # Aplicar get_display_date nos dados filtrados
+    # Aplicar get_display_date (vetorizado) nos dados filtrados
     df_analytics = df_filtered.copy()
-    df_analytics['DATA_DISPLAY'] = df_analytics.apply(get_display_date_analytics, axis=1)
+    df_analytics['DATA_DISPLAY'] = compute_display_dates(df_analytics)
     
     # Obter datas da semana para filtrar apenas chamados que aparecem no Kanban
     week_dates = get_week_dates(ano, semana)
@@ -95,67 +88,69 @@ def _create_stacked_bar_chart(df_filtered, ano, semana):
     # Gráfico de barras empilhadas por DATA_DISPLAY
     if len(df_kanban_visible) > 0:
         grouped_data = df_kanban_visible.groupby(['DATA_DISPLAY', 'STATUS']).size().reset_index(name='Quantidade')
-        
-        fig = px.bar(
-            grouped_data, 
-            x='DATA_DISPLAY', 
-            y='Quantidade',
-            color='STATUS',
-            title=f"Chamados Visíveis no Kanban - Semana {semana}/{ano}",
-            color_discrete_map=_get_status_colors(),
-            labels={'DATA_DISPLAY': 'Data de Exibição no Kanban', 'Quantidade': 'Quantidade de Chamados'}
-        )
-        
-        fig.update_layout(
-            xaxis_title="Data de Exibição no Kanban",
-            yaxis_title="Quantidade de Chamados",
-            legend_title="Status",
-            hovermode='x unified'
-        )
-        
-        fig.update_traces(
-            hovertemplate='<b>%{fullData.name}</b><br>Data: %{x}<br>Quantidade: %{y}<extra></extra>'
-        )
-        
+        fig = _fig_stacked_bar(grouped_data, ano, semana)
         st.plotly_chart(fig, use_container_width=True, key="chart_stacked_bar")
     else:
         st.info("Não há dados suficientes para o gráfico empilhado.")
 
+@cached_figure
+def _fig_stacked_bar(grouped_data, ano, semana):
+    import plotly.express as px
+    fig = px.bar(
+        grouped_data, 
+        x='DATA_DISPLAY', 
+        y='Quantidade',
+        color='STATUS',
+        title=f"Chamados Visíveis no Kanban - Semana {semana}/{ano}",
+        color_discrete_map=_get_status_colors(),
+        labels={'DATA_DISPLAY': 'Data de Exibição no Kanban', 'Quantidade': 'Quantidade de Chamados'}
+    )
+    
+    fig.update_layout(
+        xaxis_title="Data de Exibição no Kanban",
+        yaxis_title="Quantidade de Chamados",
+        legend_title="Status",
+        hovermode='x unified'
+    )
+    
+    fig.update_traces(
+        hovertemplate='<b>%{fullData.name}</b><br>Data: %{x}<br>Quantidade: %{y}<extra></extra>'
+    )
+    return fig
+
 def _create_status_pie_chart(df_filtered, ano, semana):
     """Cria gráfico pizza de distribuição por status"""
     # Aplicar mesma lógica para consistência
     df_analytics = df_filtered.copy()
-    df_analytics['DATA_DISPLAY'] = df_analytics.apply(lambda row: row['DATA_RESOLUCAO'].date() 
-                                                     if str(row.get('STATUS', '')).strip().lower() in ['resolvido', 'fechado'] 
-                                                        and pd.notna(row.get('DATA_RESOLUCAO'))
-                                                     else row['DATA_ALVO_DATE'], axis=1)
+    df_analytics['DATA_DISPLAY'] = compute_display_dates(df_analytics)
     
     week_dates = get_week_dates(ano, semana)
     df_kanban_visible = df_analytics[df_analytics['DATA_DISPLAY'].isin(week_dates)]
     
     if len(df_kanban_visible) > 0:
-        status_counts = df_kanban_visible['STATUS'].value_counts().head(10)
-        
-        fig_pie = px.pie(
-            values=status_counts.values, 
-            names=status_counts.index,
-            title=f"Status dos Chamados Visíveis - Semana {semana}/{ano}",
-            color_discrete_map=_get_status_colors()
-        )
+        status_counts = count_values(df_kanban_visible['STATUS']).head(10)
+        fig_pie = _fig_status_pie(status_counts, ano, semana)
         st.plotly_chart(fig_pie, use_container_width=True, key="chart_status_dist_1")
     else:
         st.info("Não há dados para o gráfico de distribuição.")
 
+@cached_figure
+def _fig_status_pie(status_counts, ano, semana):
+    import plotly.express as px
+    return px.pie(
+        values=status_counts.values, 
+        names=status_counts.index,
+        title=f"Status dos Chamados Visíveis - Semana {semana}/{ano}",
+        color_discrete_map=_get_status_colors()
+    )
+
 def _create_summary_table(df_filtered, ano, semana):
     """Cria tabela resumo por data e status"""
     st.subheader(f"Resumo dos Chamados Visíveis no Kanban - Semana {semana}/{ano}")
     
     # Aplicar mesma lógica para consistência
     df_analytics = df_filtered.copy()
-    df_analytics['DATA_DISPLAY'] = df_analytics.apply(lambda row: row['DATA_RESOLUCAO'].date() 
-                                                     if str(row.get('STATUS', '')).strip().lower() in ['resolvido', 'fechado'] 
-                                                        and pd.notna(row.get('DATA_RESOLUCAO'))
-                                                     else row['DATA_ALVO_DATE'], axis=1)
+    df_analytics['DATA_DISPLAY'] = compute_display_dates(df_analytics)
     
     week_dates = get_week_dates(ano, semana)
     df_kanban_visible = df_analytics[df_analytics['DATA_DISPLAY'].isin(week_dates)]
@@ -189,18 +184,22 @@ def _create_sla_pie_chart(df_filtered):
     
     if len(df_sla_elegivel) > 0:
         sla_data = df_sla_elegivel['SLA_VIOLADO'].value_counts()
-        sla_labels = {True: 'SLA Violado', False: 'SLA OK'}
-        
-        fig = px.pie(
-            values=sla_data.values, 
-            names=[sla_labels[x] for x in sla_data.index],
-            title=f"Status do SLA - Apenas Resolvidos/Fechados ({len(df_sla_elegivel)} chamados)",
-            color_discrete_map={'SLA Violado': '#dc3545', 'SLA OK': '#28a745'}
-        )
+        fig = _fig_sla_pie(sla_data, len(df_sla_elegivel))
         st.plotly_chart(fig, use_container_width=True, key="chart_sla_status_1")
     else:
         st.info("Nenhum chamado resolvido/fechado encontrado para análise de SLA.")
 
+@cached_figure
+def _fig_sla_pie(sla_data, total_chamados):
+    import plotly.express as px
+    sla_labels = {True: 'SLA Violado', False: 'SLA OK'}
+    return px.pie(
+        values=sla_data.values, 
+        names=[sla_labels[x] for x in sla_data.index],
+        title=f"Status do SLA - Apenas Resolvidos/Fechados ({total_chamados} chamados)",
+        color_discrete_map={'SLA Violado': '#dc3545', 'SLA OK': '#28a745'}
+    )
+
 def _create_sla_weekly_chart(df_filtered, responsavel, status_filtrados, df):
     """Cria gráfico de taxa SLA por semana"""
     # Chamados por semana - APENAS RESOLVIDOS/FECHADOS
@@ -221,53 +220,112 @@ def _create_sla_weekly_chart(df_filtered, responsavel, status_filtrados, df):
     weekly_data['Taxa_SLA'] = ((weekly_data['REQUISICAO'] - weekly_data['SLA_VIOLADO']) / weekly_data['REQUISICAO'] * 100).round(1)
     
     if len(weekly_data) > 0:
-        fig = px.line(
-            weekly_data.tail(10), 
-            x='Semana_Label', 
-            y='Taxa_SLA',
-            title="Taxa de SLA por Semana (%) - Apenas Resolvidos/Fechados",
-            color_discrete_sequence=['#28a745']
-        )
-        fig.add_hline(y=95, line_dash="dash", line_color="red", 
-                     annotation_text="Meta: 95%")
+        fig = _fig_sla_weekly(weekly_data[['Semana_Label', 'Taxa_SLA']].tail(10))
         st.plotly_chart(fig, use_container_width=True, key="chart_sla_weekly_1")
     else:
         st.info("Dados insuficientes para análise temporal de SLA.")
 
-def _create_sla_violated_table(df_filtered):
-    """Cria tabela com chamados que violaram o SLA (SLA_VIOLADO == True)."""
+@cached_figure
+def _fig_sla_weekly(weekly_data):
+    import plotly.express as px
+    fig = px.line(
+        weekly_data, 
+        x='Semana_Label', 
+        y='Taxa_SLA',
+        title="Taxa de SLA por Semana (%) - Apenas Resolvidos/Fechados",
+        color_discrete_sequence=['#28a745']
+    )
+    fig.add_hline(y=95, line_dash="dash", line_color="red", 
+                 annotation_text="Meta: 95%")
+    return fig
+
+def _create_long_horizon_trends(df, responsavel, status_filtrados):
+    """Cria gráficos de todo o histórico: taxa SLA semanal e volume diário aberto vs resolvido"""
+    st.markdown("#### 📈 Tendência de Longo Prazo")
     
-    # 1. Filtrar pelos chamados Resolvidos/Fechados E com SLA Violado (True)
-    df_violado = df_filtered[
-        df_filtered['STATUS'].isin(['Resolvido', 'Fechado']) & 
-        (df_filtered['SLA_VIOLADO'] == True)
-    ].copy()
+    # Contagens por dia/semana em cache por versão dos dados e equipe; aqui só o recorte e a redução (LTTB)
+    taxa_semanal, volume = long_horizon_series(df, responsavel, status_filtrados)
     
-    # Colunas que queremos exibir na tabela
-    display_cols = [
-        'REQUISICAO', 
-        'DATA_ALVO', 
-        'DATA_RESOLUCAO',
-        'RESUMO', 
-        'RESPONSAVEL'
-    ]
+    if len(taxa_semanal) == 0 and len(volume) == 0:
+        st.info("Dados insuficientes para a tendência de longo prazo.")
+        return
+    
+    st.caption(f"{len(taxa_semanal)} semanas e {len(volume):,} dias de histórico "
+               f"(até {PONTOS_MAX} pontos por série no gráfico).")
     
-    # Verificar quais colunas estão realmente disponíveis no DataFrame
-    available_cols = [col for col in display_cols if col in df_violado.columns]
+    if len(taxa_semanal) > 0:
+        fig = _fig_sla_historico(downsample(taxa_semanal))
+        st.plotly_chart(fig, use_container_width=True, key="chart_sla_historico")
+    
+    if len(volume) > 0:
+        fig = _fig_volume_historico(downsample(volume['Abertos']), downsample(volume['Resolvidos']))
+        st.plotly_chart(fig, use_container_width=True, key="chart_volume_historico")
+
+def _trace_type(pontos):
+    """Scattergl (WebGL) para séries longas, Scatter (SVG) para as demais"""
+    import plotly.graph_objects as go
+    return go.Scattergl if pontos > LIMITE_WEBGL else go.Scatter
+
+@cached_figure
+def _fig_sla_historico(taxa_semanal):
+    import plotly.graph_objects as go
+    Traco = _trace_type(len(taxa_semanal))
+    fig = go.Figure(Traco(
+        x=taxa_semanal.index,
+        y=taxa_semanal.values,
+        mode='lines',
+        name='Taxa SLA',
+        line=dict(color='#28a745'),
+        hovertemplate='Semana de %{x|%d/%m/%Y}<br>Taxa SLA: %{y:.1f}%<extra></extra>'
+    ))
+    fig.add_hline(y=95, line_dash="dash", line_color="red", 
+                 annotation_text="Meta: 95%")
+    fig.update_layout(
+        title="Taxa de SLA por Semana (%) - Todo o Histórico",
+        xaxis_title="Semana",
+        yaxis_title="Taxa SLA (%)"
+    )
+    return fig
+
+@cached_figure
+def _fig_volume_historico(abertos, resolvidos):
+    import plotly.graph_objects as go
+    Traco = _trace_type(max(len(abertos), len(resolvidos)))
+    fig = go.Figure()
+    for serie, nome, cor in ((abertos, 'Abertos', '#007bff'), (resolvidos, 'Resolvidos', '#28a745')):
+        fig.add_trace(Traco(
+            x=serie.index,
+            y=serie.values,
+            mode='lines',
+            name=nome,
+            line=dict(color=cor, width=1),
+            hovertemplate=f'%{{x|%d/%m/%Y}}<br>{nome}: %{{y}}<extra></extra>'
+        ))
+    fig.update_layout(
+        title="Chamados Abertos vs Resolvidos por Dia - Todo o Histórico",
+        xaxis_title="Data",
+        yaxis_title="Quantidade de Chamados",
+        legend_title="Chamados",
+        hovermode='x unified'
+    )
+    return fig
+
+def _create_sla_violated_table(df_filtered):
+    """Cria tabela com chamados que violaram o SLA (SLA_VIOLADO == True)."""
+    
+    # Resolvidos/Fechados com SLA Violado, ordenados pela data alvo
+    df_violado = sla_violated_tickets(df_filtered)
     
     if len(df_violado) > 0:
         st.subheader(f"⚠️ Chamados com SLA Violado ({len(df_violado)})")
-        
-        # Opcional: Ordenar pela data alvo ou data de resolução
-        if 'DATA_ALVO' in df_violado.columns:
-            df_violado = df_violado.sort_values('DATA_ALVO', ascending=True)
             
         # Exibir a tabela
         st.dataframe(
-            df_violado[available_cols], 
+            df_violado, 
             use_container_width=True, 
             hide_index=True
         )
+        _create_export_buttons(df_violado, "chamados_sla_violado", "exportar_sla_violado")
     else:
         st.success("🎉 Não há chamados resolvidos/fechados que violaram o SLA no período/filtros selecionados.")
 
@@ -276,16 +334,8 @@ def _create_responsavel_analysis(df_filtered, responsavel, ano, semana):
     
     # 🔧 CORREÇÃO: Filtrar apenas chamados que aparecem visualmente no Kanban
     # Primeira: criar DATA_DISPLAY (mesma lógica do Kanban)
-    def get_display_date(row):
-        """Determina em que data o chamado deve aparecer"""
-        status_clean = str(row.get('STATUS', '')).strip()
-        if status_clean.lower() in ['resolvido', 'fechado'] and pd.notna(row.get('DATA_RESOLUCAO')):
-            return row['DATA_RESOLUCAO'].date()
-        else:
-            return row['DATA_ALVO_DATE']
-    
     df_filtered = df_filtered.copy()
-    df_filtered['DATA_DISPLAY'] = df_filtered.apply(get_display_date, axis=1)
+    df_filtered['DATA_DISPLAY'] = compute_display_dates(df_filtered)
     
     # Agora filtrar apenas os 7 dias da semana
     week_dates = get_week_dates(ano, semana)
@@ -305,6 +355,134 @@ def _create_responsavel_analysis(df_filtered, responsavel, ano, semana):
     else:
         st.info("Análise de backlog disponível apenas na visão 'Todos'.")
 
+def _create_backlog_timeline(df, responsavel):
+    """Cria gráfico do backlog diário por categoria em todo o histórico e a consulta do backlog em uma data"""
+    st.markdown("#### 📉 Backlog ao Longo do Tempo")
+    
+    # Matriz de backlog compartilhada entre as sessões; atualizada de forma incremental a cada nova ingestão
+    linha_do_tempo = get_timeline(df, df.attrs.get('versao'))
+    backlog = linha_do_tempo.series(responsavel)
+    
+    if len(backlog) == 0:
+        st.info("Dados insuficientes para o backlog ao longo do tempo.")
+        return
+    
+    st.caption("Chamados abertos ao fim de cada dia, pela categoria atual do chamado "
+               "(os já finalizados aparecem como Resolvido/Fechado nas datas em que estavam abertos).")
+    
+    primeiro_dia = backlog.index[0].date()
+    data_consulta = st.date_input(
+        "Backlog em",
+        value=max(primeiro_dia, min(pd.Timestamp.now().date(), backlog.index[-1].date())),
+        min_value=primeiro_dia,
+        format="DD/MM/YYYY",
+        key="backlog_data_consulta"
+    )
+    por_categoria = {categoria: linha_do_tempo.at(data_consulta, responsavel, categoria) for categoria in backlog.columns}
+    st.metric(f"Backlog em {data_consulta.strftime('%d/%m/%Y')}", sum(por_categoria.values()))
+    st.caption(" · ".join(f"{categoria}: {quantidade}" for categoria, quantidade in por_categoria.items() if quantidade))
+    
+    # Mesmos dias para todas as categorias (LTTB pelo total), para o empilhamento continuar correto
+    pontos = lttb_indices(backlog.index.asi8, backlog.sum(axis=1).to_numpy(dtype='float64'), PONTOS_MAX)
+    fig = _fig_backlog_historico(backlog.iloc[pontos])
+    st.plotly_chart(fig, use_container_width=True, key="chart_backlog_historico")
+
+@cached_figure
+def _fig_backlog_historico(backlog):
+    import plotly.graph_objects as go
+    cores = _get_categoria_colors()
+    fig = go.Figure()
+    # Áreas empilhadas não existem em Scattergl: a série já chega reduzida a PONTOS_MAX pontos
+    for categoria in backlog.columns:
+        fig.add_trace(go.Scatter(
+            x=backlog.index,
+            y=backlog[categoria],
+            mode='lines',
+            name=categoria,
+            stackgroup='backlog',
+            line=dict(width=0.5, color=cores.get(categoria, '#6c757d')),
+            hovertemplate='%{x|%d/%m/%Y}<br>' + categoria + ': %{y}<extra></extra>'
+        ))
+    fig.update_layout(
+        title="Backlog Diário por Categoria - Todo o Histórico",
+        xaxis_title="Data",
+        yaxis_title="Chamados em aberto"
+    )
+    return fig
+
+def _create_lead_time_analysis(df, responsavel):
+    """Cria a tabela de percentis do tempo até a resolução em um período e o gráfico semanal"""
+    st.markdown("#### ⏱️ Tempo até a Resolução")
+    
+    # Sketches por semana compartilhados entre as sessões; o período é a soma dos sketches das suas semanas
+    sketches = get_sketches(df, df.attrs.get('versao'))
+    semanal = weekly_lead_time(sketches, responsavel) if 'RESPONSAVEL' in sketches else None
+    
+    if semanal is None or len(semanal) == 0:
+        st.info("Nenhum chamado resolvido/fechado para calcular o tempo até a resolução.")
+        return
+    
+    st.caption("Dias entre a abertura e a resolução dos chamados resolvidos/fechados, "
+               "pela semana da resolução (percentis com erro de até 1%).")
+    
+    primeira, ultima = semanal.index[0], semanal.index[-1] + pd.Timedelta(days=6)
+    col1, col2 = st.columns(2)
+    with col1:
+        periodo = st.date_input(
+            "Período (resolução)",
+            value=(max(primeira, ultima - pd.Timedelta(weeks=12)).date(), ultima.date()),
+            min_value=primeira.date(),
+            max_value=ultima.date(),
+            format="DD/MM/YYYY",
+            key="lead_time_periodo"
+        )
+    with col2:
+        dimensoes = [dimensao for dimensao in DIMENSOES if dimensao in sketches]
+        dimensao = st.selectbox("Agrupar por", dimensoes, format_func=DIMENSOES.get, key="lead_time_dimensao")
+    
+    # Com só a data inicial escolhida, o período vai até ela
+    inicio, fim = periodo if len(periodo) == 2 else (periodo[0], periodo[0])
+    valores = None if responsavel == 'Todos' or dimensao != 'RESPONSAVEL' else [responsavel]
+    percentis = lead_time_percentiles(sketches, dimensao, inicio, fim, valores)
+    
+    if len(percentis) == 0:
+        st.info("Nenhum chamado resolvido no período selecionado.")
+    else:
+        if responsavel != 'Todos' and dimensao != 'RESPONSAVEL':
+            st.caption(f"Por {DIMENSOES[dimensao].lower()}, os percentis são da equipe inteira.")
+        for nome in QUANTIS:
+            percentis[nome] = (percentis[nome] / 24).round(1)
+        st.dataframe(
+            percentis.rename(columns={dimensao: DIMENSOES[dimensao], **{nome: f"{nome} (dias)" for nome in QUANTIS}}),
+            use_container_width=True,
+            hide_index=True
+        )
+    
+    fig = _fig_lead_time_semanal(semanal[list(QUANTIS)[:2]] / 24)
+    st.plotly_chart(fig, use_container_width=True, key="chart_lead_time_semanal")
+
+@cached_figure
+def _fig_lead_time_semanal(semanal):
+    import plotly.graph_objects as go
+    Traco = _trace_type(len(semanal))
+    fig = go.Figure()
+    for nome, cor in zip(semanal.columns, ('#007bff', '#fd7e14')):
+        fig.add_trace(Traco(
+            x=semanal.index,
+            y=semanal[nome],
+            mode='lines',
+            name=nome,
+            line=dict(color=cor),
+            hovertemplate=f'Semana de %{{x|%d/%m/%Y}}<br>{nome}: %{{y:.1f}} dias<extra></extra>'
+        ))
+    fig.update_layout(
+        title="Tempo até a Resolução por Semana (dias) - Todo o Histórico",
+        xaxis_title="Semana da resolução",
+        yaxis_title="Dias",
+        legend_title="Percentil"
+    )
+    return fig
+
 def _create_programados_extras_analysis(df_filtered, ano, semana):
     """Análise de programados vs extras com lógica refinada"""
     st.caption("Compara chamados programados vs extras (baseado na lógica de resolução).")
@@ -312,6 +490,9 @@ def _create_programados_extras_analysis(df_filtered, ano, semana):
     week_dates = get_week_dates(ano, semana)
     days_pt = ['Segunda', 'Terça', 'Quarta', 'Quinta', 'Sexta', 'Sábado', 'Domingo']
     
+    # Contagem de programados/extras por dia em uma única passada
+    contagem = count_programados_extras(df_filtered, week_dates)
+    
     # Preparar dados para o gráfico
     programados_extras_data = []
 
@@ -322,22 +503,10 @@ def _create_programados_extras_analysis(df_filtered, ano, semana):
             day_label = f"{day_name}\n{date.strftime('%d/%m')}"
             
             # PROGRAMADOS: Chamados resolvidos/fechados onde DATA_RESOLUCAO = DATA_ALVO
-            programados_df = df_filtered[
-                (df_filtered['STATUS'].isin(['Resolvido', 'Fechado'])) &
-                (df_filtered['DATA_RESOLUCAO'].notna()) &
-                (df_filtered['DATA_RESOLUCAO'].dt.date == date) &
-                (df_filtered['DATA_ALVO_DATE'] == date)
-            ]
-            qtd_programados = len(programados_df)
+            qtd_programados = int(contagem.at[date, 'Programados'])
 
             # EXTRAS: Chamados resolvidos neste dia mas programados para outro dia
-            extras_df = df_filtered[
-                (df_filtered['STATUS'].isin(['Resolvido', 'Fechado'])) &
-                (df_filtered['DATA_RESOLUCAO'].notna()) &
-                (df_filtered['DATA_RESOLUCAO'].dt.date == date) &
-                (df_filtered['DATA_ALVO_DATE'] != date)
-            ]
-            qtd_extras = len(extras_df)
+            qtd_extras = int(contagem.at[date, 'Extras'])
             
             # Adicionar dados para o gráfico
             if qtd_programados > 0:
@@ -360,30 +529,7 @@ def _create_programados_extras_analysis(df_filtered, ano, semana):
             df_prog_extra = pd.DataFrame(programados_extras_data)
             
             # Criar gráfico de barras empilhadas
-            fig = px.bar(
-                df_prog_extra,
-                x='Dia',
-                y='Quantidade',
-                color='Tipo',
-                title=f"Programados vs Extras por Dia - Semana {semana}/{ano}",
-                color_discrete_map={
-                    'Programados': '#007bff',
-                    'Extras': '#28a745'
-                },
-                barmode='stack'
-            )
-            
-            fig.update_layout(
-                xaxis_title="Dia da Semana",
-                yaxis_title="Quantidade de Chamados",
-                legend_title="Tipo de Chamado",
-                hovermode='x unified'
-            )
-            
-            fig.update_traces(
-                hovertemplate='<b>%{fullData.name}</b><br>%{x}<br>Quantidade: %{y}<extra></extra>'
-            )
-            
+            fig = _fig_programados_extras(df_prog_extra, ano, semana)
             st.plotly_chart(fig, use_container_width=True, key="chart_programados_extras")
             
     with col2:
@@ -394,21 +540,9 @@ def _create_programados_extras_analysis(df_filtered, ano, semana):
         for i, date in enumerate(week_dates):
             day_name = days_pt[i]
             
-            # Programados
-            programados_count = len(df_filtered[
-                (df_filtered['STATUS'].isin(['Resolvido', 'Fechado'])) &
-                (df_filtered['DATA_RESOLUCAO'].notna()) &
-                (df_filtered['DATA_RESOLUCAO'].dt.date == date) &
-                (df_filtered['DATA_ALVO_DATE'] == date)
-            ])
-
-            # Extras
-            extras_count = len(df_filtered[
-                (df_filtered['STATUS'].isin(['Resolvido', 'Fechado'])) &
-                (df_filtered['DATA_RESOLUCAO'].notna()) &
-                (df_filtered['DATA_RESOLUCAO'].dt.date == date) &
-                (df_filtered['DATA_ALVO_DATE'] != date)
-            ])
+            # Programados e extras (já contados acima)
+            programados_count = int(contagem.at[date, 'Programados'])
+            extras_count = int(contagem.at[date, 'Extras'])
 
             if programados_count > 0 or extras_count > 0:
                 resumo_data.append({
@@ -424,6 +558,34 @@ def _create_programados_extras_analysis(df_filtered, ano, semana):
         else:
             st.info("Nenhum dado para resumo")
 
+@cached_figure
+def _fig_programados_extras(df_prog_extra, ano, semana):
+    import plotly.express as px
+    fig = px.bar(
+        df_prog_extra,
+        x='Dia',
+        y='Quantidade',
+        color='Tipo',
+        title=f"Programados vs Extras por Dia - Semana {semana}/{ano}",
+        color_discrete_map={
+            'Programados': '#007bff',
+            'Extras': '#28a745'
+        },
+        barmode='stack'
+    )
+    
+    fig.update_layout(
+        xaxis_title="Dia da Semana",
+        yaxis_title="Quantidade de Chamados",
+        legend_title="Tipo de Chamado",
+        hovermode='x unified'
+    )
+    
+    fig.update_traces(
+        hovertemplate='<b>%{fullData.name}</b><br>%{x}<br>Quantidade: %{y}<extra></extra>'
+    )
+    return fig
+
 def _create_backlog_chart(df_filtered):
     """Cria gráfico de backlog por responsável"""
     status_finalizados = ['Resolvido', 'Fechado', 'Cancelado']
@@ -431,46 +593,55 @@ def _create_backlog_chart(df_filtered):
     
     if len(backlog_data) > 0:
         backlog_grouped = backlog_data.groupby(['RESPONSAVEL', 'STATUS']).size().reset_index(name='Quantidade')
-        
-        cores_status = _get_backlog_colors()
-        
-        # Calcular total por responsável para ordenação
-        total_por_responsavel = backlog_grouped.groupby('RESPONSAVEL')['Quantidade'].sum().sort_values(ascending=True)
-        
-        fig = go.Figure()
-        
-        # Adicionar uma barra para cada status
-        for status in backlog_grouped['STATUS'].unique():
-            status_data = backlog_grouped[backlog_grouped['STATUS'] == status]
-            status_data = status_data.set_index('RESPONSAVEL').reindex(total_por_responsavel.index, fill_value=0).reset_index()
-            
-            fig.add_trace(go.Bar(
-                name=status,
-                y=status_data['RESPONSAVEL'],
-                x=status_data['Quantidade'],
-                orientation='h',
-                marker_color=cores_status.get(status, '#6c757d'),
-                hovertemplate=f'<b>%{{y}}</b><br>{status}: %{{x}}<extra></extra>'
-            ))
-        
-        fig.update_layout(
-            title='Backlog por Responsável - Status em Aberto',
-            xaxis_title='Quantidade de Chamados',
-            yaxis_title='Responsável',
-            barmode='stack',
-            height=max(400, len(total_por_responsavel) * 30),
-            showlegend=True,
-            legend=dict(orientation="v", yanchor="top", y=1, xanchor="left", x=1.01)
-        )
-        
+        fig = _fig_backlog(backlog_grouped)
         st.plotly_chart(fig, use_container_width=True, key="chart_backlog_responsavel")
     else:
         st.info("Não há chamados em aberto no período.")
 
+@cached_figure
+def _fig_backlog(backlog_grouped):
+    import plotly.graph_objects as go
+    cores_status = _get_backlog_colors()
+    
+    # Calcular total por responsável para ordenação
+    total_por_responsavel = backlog_grouped.groupby('RESPONSAVEL')['Quantidade'].sum().sort_values(ascending=True)
+    
+    fig = go.Figure()
+    
+    # Adicionar uma barra para cada status
+    for status in backlog_grouped['STATUS'].unique():
+        status_data = backlog_grouped[backlog_grouped['STATUS'] == status]
+        status_data = status_data.set_index('RESPONSAVEL')[['Quantidade']].reindex(total_por_responsavel.index, fill_value=0).reset_index()
+        
+        fig.add_trace(go.Bar(
+            name=status,
+            y=status_data['RESPONSAVEL'],
+            x=status_data['Quantidade'],
+            orientation='h',
+            marker_color=cores_status.get(status, '#6c757d'),
+            hovertemplate=f'<b>%{{y}}</b><br>{status}: %{{x}}<extra></extra>'
+        ))
+    
+    fig.update_layout(
+        title='Backlog por Responsável - Status em Aberto',
+        xaxis_title='Quantidade de Chamados',
+        yaxis_title='Responsável',
+        barmode='stack',
+        height=max(400, len(total_por_responsavel) * 30),
+        showlegend=True,
+        legend=dict(orientation="v", yanchor="top", y=1, xanchor="left", x=1.01)
+    )
+    return fig
+
 def _create_total_responsavel_chart(df_filtered):
     """Cria gráfico total por responsável"""
     total_por_resp = df_filtered.groupby('RESPONSAVEL').size().sort_values(ascending=True)
-    
+    fig_total = _fig_total_responsavel(total_por_resp)
+    st.plotly_chart(fig_total, use_container_width=True, key="chart_total_responsavel")
+
+@cached_figure
+def _fig_total_responsavel(total_por_resp):
+    import plotly.graph_objects as go
     fig_total = go.Figure(go.Bar(
         y=total_por_resp.index,
         x=total_por_resp.values,
@@ -485,8 +656,7 @@ def _create_total_responsavel_chart(df_filtered):
         yaxis_title='Responsável',
         height=max(400, len(total_por_resp) * 30)
     )
-    
-    st.plotly_chart(fig_total, use_container_width=True, key="chart_total_responsavel")
+    return fig_total
 
 def _create_responsavel_table(df_filtered):
     """Cria tabela consolidada por responsável"""
@@ -566,22 +736,34 @@ def _create_detailed_list(df_filtered):
         # 3. Exibir o DataFrame (limitado ou completo)
         st.dataframe(df_to_show, use_container_width=True, hide_index=True)
         
+        # 4. Exportar a lista completa do filtro atual
+        _create_export_buttons(df_visual, "lista_detalhada", "exportar_lista_detalhada")
+        
     elif total_chamados == 0:
          st.info("Nenhum chamado encontrado com os filtros aplicados.")
 
+def _create_export_buttons(df_export, nome_arquivo, chave):
+    """Cria botões de download em CSV, Parquet e XLSX, gerados só no clique e gravados em blocos"""
+    colunas = st.columns(len(FORMATOS))
+    for coluna, (formato, (_, mime)) in zip(colunas, FORMATOS.items()):
+        with coluna:
+            # O arquivo é gerado em outra thread quando o botão é clicado, sem refazer a página
+            st.download_button(
+                f"⬇️ {formato.upper()}",
+                data=partial(export_bytes, df_export, formato),
+                file_name=export_file_name(nome_arquivo, formato),
+                mime=mime,
+                on_click="ignore",
+                key=f"{chave}_{formato}",
+                use_container_width=True
+            )
+
 def _create_resumo_detalhado(df_filtered, ano, semana):
     """Cria resumo detalhado com distribuição por resumo, status e empresa"""
     
     # 🔧 CORREÇÃO FINAL: Usar exatamente a mesma lógica do Kanban
-    def get_display_date(row):
-        status_clean = str(row.get('STATUS', '')).strip()
-        if status_clean.lower() in ['resolvido', 'fechado'] and pd.notna(row.get('DATA_RESOLUCAO')):
-            return row['DATA_RESOLUCAO'].date()
-        else:
-            return row['DATA_ALVO_DATE']
-    
     df_filtered_display = df_filtered.copy()
-    df_filtered_display['DATA_DISPLAY'] = df_filtered_display.apply(get_display_date, axis=1)
+    df_filtered_display['DATA_DISPLAY'] = compute_display_dates(df_filtered_display)
     
     # LINHA 1: Gráfico Empresa | Gráfico Status
     col1, col2 = st.columns(2)
@@ -618,46 +800,7 @@ def _create_resumo_distribution(df_filtered):
         st.info("Coluna 'RESUMO' não encontrada")
         return
     
-    # Criar tabela resumida
-    resumo_stats = []
-    
-    for resumo in df_filtered['RESUMO'].dropna().unique():
-        df_resumo = df_filtered[df_filtered['RESUMO'] == resumo]
-        
-        # Contar previstos
-        previstos = len(df_resumo)
-        
-        # Contar realizados
-        realizados = len(df_resumo[df_resumo['STATUS'].isin(['Resolvido', 'Fechado'])])
-        
-        percentual = (realizados / previstos * 100) if previstos > 0 else 0
-        
-        resumo_stats.append({
-            'Tipo de Resumo': resumo,
-            'Previstos': int(previstos),
-            'Realizados': int(realizados),
-            'Pendentes': int(previstos - realizados),
-            '% Conclusão': round(percentual, 1)
-        })
-    
-    df_resumo_stats = pd.DataFrame(resumo_stats).sort_values('Previstos', ascending=False)
-    
-    # Adicionar total
-    total_previstos = int(df_resumo_stats['Previstos'].sum())
-    total_realizados = int(df_resumo_stats['Realizados'].sum())
-    total_pendentes = int(df_resumo_stats['Pendentes'].sum())
-    total_percentual = (total_realizados / total_previstos * 100) if total_previstos > 0 else 0
-    
-    total_row = {
-        'Tipo de Resumo': '🔹 TOTAL',
-        'Previstos': total_previstos,
-        'Realizados': total_realizados,
-        'Pendentes': total_pendentes,
-        '% Conclusão': round(total_percentual, 1)
-    }
-    
-    df_resumo_stats = pd.concat([df_resumo_stats, pd.DataFrame([total_row])], ignore_index=True)
-    
+    df_resumo_stats = resumo_distribution(df_filtered)
     st.dataframe(df_resumo_stats, use_container_width=True, hide_index=True)
 
 def _create_empresa_chart(df_filtered):
@@ -668,13 +811,19 @@ def _create_empresa_chart(df_filtered):
         return
     
     # Contar por empresa
-    empresa_counts = df_filtered['EMPRESA_SOLICITANTE'].dropna().value_counts()
+    empresa_counts = count_values(df_filtered['EMPRESA_SOLICITANTE'].dropna())
     
     if len(empresa_counts) == 0:
         st.info("Nenhum dado de empresa disponível")
         return
     
     # Criar gráfico
+    fig_empresa = _fig_empresa(empresa_counts)
+    st.plotly_chart(fig_empresa, use_container_width=True, key="chart_empresa_dist_linha1")
+
+@cached_figure
+def _fig_empresa(empresa_counts):
+    import plotly.express as px
     fig_empresa = px.pie(
         values=empresa_counts.values,
         names=empresa_counts.index,
@@ -682,7 +831,7 @@ def _create_empresa_chart(df_filtered):
     )
     
     fig_empresa.update_layout(height=400)
-    st.plotly_chart(fig_empresa, use_container_width=True, key="chart_empresa_dist_linha1")
+    return fig_empresa
 
 def _create_empresa_table(df_filtered):
     """Cria apenas a tabela de distribuição por empresa"""
@@ -691,57 +840,30 @@ def _create_empresa_table(df_filtered):
         st.info("Coluna 'EMPRESA_SOLICITANTE' não encontrada")
         return
     
-    # Contar por empresa
-    empresa_counts = df_filtered['EMPRESA_SOLICITANTE'].dropna().value_counts()
+    df_empresa_table = empresa_distribution(df_filtered)
     
-    if len(empresa_counts) == 0:
+    if len(df_empresa_table) == 0:
         st.info("Nenhum dado de empresa disponível")
         return
     
-    # Tabela com números
-    quantidade_list = [int(x) for x in empresa_counts.values]
-    total_empresa = sum(quantidade_list)
-    percentual_list = [round((x / total_empresa * 100), 1) for x in quantidade_list]
-    
-    df_empresa_table = pd.DataFrame({
-        'Empresa': empresa_counts.index,
-        'Quantidade': quantidade_list,
-        '% Total': percentual_list
-    })
-    
     st.dataframe(df_empresa_table, use_container_width=True, hide_index=True)
 
 def _create_status_table(df_filtered):
     """Cria tabela de distribuição por status"""
     
-    status_counts = df_filtered['STATUS'].value_counts()
-    
-    quantidade_list = [int(x) for x in status_counts.values]
-    total_status = sum(quantidade_list)
-    percentual_list = [round((x / total_status * 100), 1) for x in quantidade_list]
-    
-    df_status = pd.DataFrame({
-        'Status': status_counts.index,
-        'Quantidade': quantidade_list,
-        '% Total': percentual_list
-    }).sort_values('Quantidade', ascending=False)
-    
-    # Adicionar total
-    total_row = {
-        'Status': '🔹 TOTAL',
-        'Quantidade': int(total_status),
-        '% Total': 100.0
-    }
-    
-    df_status = pd.concat([df_status, pd.DataFrame([total_row])], ignore_index=True)
-    
+    df_status = status_distribution(df_filtered)
     st.dataframe(df_status, use_container_width=True, hide_index=True)
 
 def _create_status_chart(df_filtered):
     """Cria gráfico de distribuição por status"""
     
-    status_counts = df_filtered['STATUS'].value_counts()
-    
+    status_counts = count_values(df_filtered['STATUS'])
+    fig_status = _fig_status_bars(status_counts)
+    st.plotly_chart(fig_status, use_container_width=True, key="chart_status_bars_linha1")
+
+@cached_figure
+def _fig_status_bars(status_counts):
+    import plotly.express as px
     fig_status = px.bar(
         x=status_counts.values,
         y=status_counts.index,
@@ -756,8 +878,7 @@ def _create_status_chart(df_filtered):
         showlegend=False,
         title='',
     )
-    
-    st.plotly_chart(fig_status, use_container_width=True, key="chart_status_bars_linha1")
+    return fig_status
 
 def _get_status_colors():
     """Retorna mapeamento de cores para status"""
@@ -775,6 +896,19 @@ def _get_status_colors():
         'Pausa Equipe SCADA': '#fd7e14'
     }
 
+def _get_categoria_colors():
+    """Retorna mapeamento de cores para categorias de status"""
+    return {
+        'RESOLVIDO': '#28a745',
+        'FECHADO': '#17a2b8',
+        'CANCELADO': '#dc3545',
+        'EM_ANDAMENTO': '#007bff',
+        'DESIGNADO': '#6f42c1',
+        'PAUSA': '#fd7e14',
+        'PENDENTE': '#ffc107',
+        'OUTROS': '#6c757d'
+    }
+
 def _get_backlog_colors():
     """Retorna mapeamento de cores para status de backlog"""
     return {
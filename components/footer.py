@@ -1,18 +1,36 @@
+import os
 import streamlit as st
 import base64
+from functools import lru_cache
+from config.page_config import PASTA_ESTATICA, static_url
+
+LOGO_ARQUIVO = "Grupo.svg.png"
+
+@lru_cache(maxsize=4)
+def _logo_base64(logo_path):
+    """Lê e codifica a logo uma única vez por processo"""
+    with open(logo_path, "rb") as img_file:
+        return base64.b64encode(img_file.read()).decode()
+
+def _logo_src():
+    """URL estática da logo (o navegador guarda em cache) ou, sem static serving, a imagem embutida"""
+    url = static_url(LOGO_ARQUIVO)
+    if url is not None:
+        return url
+    # Sem static serving: logo em static/ ou na raiz do projeto (local antigo), embutida em base64
+    for logo_path in (os.path.join(PASTA_ESTATICA, LOGO_ARQUIVO), LOGO_ARQUIVO):
+        if os.path.exists(logo_path):
+            return f"data:image/png;base64,{_logo_base64(logo_path)}"
+    raise FileNotFoundError(LOGO_ARQUIVO)
 
 def create_footer():
     """Cria o rodapé da aplicação com logo"""
-    logo_path = "Grupo.svg.png"
-    
     try:
-        # Converter imagem para base64 para usar no HTML
-        with open(logo_path, "rb") as img_file:
-            img_base64 = base64.b64encode(img_file.read()).decode()
+        img_src = _logo_src()
             
         st.markdown(f"""
         <div class="footer">
-            <img src="data:image/png;base64,{img_base64}" class="footer-logo" alt="Logo">
+            <img src="{img_src}" class="footer-logo" alt="Logo">
             <p class="footer-text"> Desenvolvido por <strong>Júlia Alves Santos </strong></p>
         </div>
         """, unsafe_allow_html=True)
@@ -1,7 +1,9 @@
 import streamlit as st
 import pandas as pd
-from datetime import datetime, timedelta
+from datetime import datetime
 from utils.data_processor import get_display_status
+from utils.date_logic import get_week_dates
+from utils.week_metrics import count_week_tickets, summarize_week_counts, filter_kanban_week
 
 def create_kanban_view(df, ano, semana, responsavel, status_filtrados):
     """Visualização Kanban - apenas chamados com status 'Resolvido' ficam na data de resolução"""
@@ -28,11 +30,16 @@ def create_kanban_view(df, ano, semana, responsavel, status_filtrados):
     # Mostrar informações sobre filtros aplicados
     _show_filter_info(status_filtrados)
     
+    # Contagens da semana em uma única passada (reutilizadas em métricas e cabeçalhos)
+    week_dates = get_week_dates(ano, semana)
+    resumo_semana = summarize_week_counts(count_week_tickets(df_filtered), week_dates)
+    
     # Mostrar métricas da semana
-    _show_week_metrics(df_filtered, ano, semana)
+    _show_week_metrics(resumo_semana)
     
 
-    _create_week_kanban(df_filtered, ano, semana, responsavel, status_filtrados, is_current_week)
+    _create_week_kanban(df_filtered, resumo_semana, week_dates, ano, semana, responsavel, 
+                        status_filtrados, is_current_week)
 
 def _create_header(responsavel, is_current_week, semana, ano):
     """Cria cabeçalho da visualização"""
@@ -49,56 +56,7 @@ def _create_header(responsavel, is_current_week, semana, ano):
 
 def _filter_data(df, ano, semana, responsavel, status_filtrados):
     """Filtra dados da semana selecionada - INCLUINDO resolvidos na semana"""
-    
-    # PRIMEIRO: Filtrar por DATA_ALVO (lógica original)
-    df_data_alvo = df[
-        (df['ANO_ALVO'] == ano) & 
-        (df['SEMANA_ALVO'] == semana)
-    ].copy()
-    
-    # SEGUNDO: Adicionar chamados RESOLVIDOS/FECHADOS nesta semana (mesmo com DATA_ALVO diferente)
-    df_temp = df.copy()
-    df_temp['DATA_RESOLUCAO_VALIDA'] = pd.notna(df_temp['DATA_RESOLUCAO'])
-    df_temp['SEMANA_RESOLUCAO'] = df_temp['DATA_RESOLUCAO'].dt.isocalendar().week
-    df_temp['ANO_RESOLUCAO'] = df_temp['DATA_RESOLUCAO'].dt.year
-    
-    df_resolvidos_semana = df_temp[
-        (df_temp['STATUS'].isin(['Resolvido', 'Fechado'])) &
-        (df_temp['DATA_RESOLUCAO_VALIDA']) &
-        (df_temp['ANO_RESOLUCAO'] == ano) &
-        (df_temp['SEMANA_RESOLUCAO'] == semana)
-    ].copy()
-    
-    # TERCEIRO: Combinar os dois conjuntos (removendo duplicatas)
-    df_filtered = pd.concat([df_data_alvo, df_resolvidos_semana]).drop_duplicates(subset=['REQUISICAO'])
-    
-    # Aplicar filtros de responsável
-    if responsavel != 'Todos':
-        df_filtered = df_filtered[df_filtered['RESPONSAVEL'] == responsavel]
-    
-    # Aplicar filtro de status
-    if status_filtrados != 'Todos':
-        df_filtered = df_filtered[df_filtered['STATUS'].isin(status_filtrados)]
-    
-    # Aplicar lógica de data de exibição (mantém a lógica original)
-    df_filtered['DATA_DISPLAY'] = df_filtered.apply(_get_display_date, axis=1)
-    
-    return df_filtered
-
-def _get_display_date(row):
-    """Determina em que data o chamado deve aparecer no Kanban"""
-    # ✅ CORREÇÃO V3: Priorizar DATA_ALVO se existir, pois representa quando o chamado foi planejado
-    # Só usar DATA_RESOLUCAO se DATA_ALVO não existir
-    
-    if pd.notna(row.get('DATA_ALVO_DATE')):
-        return row['DATA_ALVO_DATE']
-    
-    # Fallback: se não tiver DATA_ALVO, usar DATA_RESOLUCAO
-    status_clean = str(row.get('STATUS', '')).strip()
-    if status_clean.lower() in ['resolvido', 'fechado'] and pd.notna(row.get('DATA_RESOLUCAO')):
-        return row['DATA_RESOLUCAO'].date()
-    
-    return None
+    return filter_kanban_week(df, ano, semana, responsavel, status_filtrados)
 
 def _show_filter_info(status_filtrados):
     """Mostra informações sobre filtros aplicados"""
@@ -106,29 +64,20 @@ def _show_filter_info(status_filtrados):
         st.info(f"📊 Filtrado por {len(status_filtrados)} status: {', '.join(status_filtrados[:3])}" + 
                (f" e mais {len(status_filtrados) - 3}" if len(status_filtrados) > 3 else ""))
 
-def _show_week_metrics(df_filtered, ano, semana):
+def _show_week_metrics(resumo_semana):
     """Mostra métricas da semana - APENAS chamados visíveis no Kanban"""
     col1, col2, col3, col4, col5 = st.columns(5)
     
-    # 🔧 CORREÇÃO CRÍTICA: Filtrar apenas chamados que aparecem visualmente no Kanban
-    # df_filtered pode incluir chamados que NÃO aparecem nos 7 dias da semana
-    # (ex: resolvidos em semana anterior/posterior com DATA_ALVO diferentes)
-    # As métricas devem refletir APENAS o que o usuário vê
-    
-    week_dates = get_week_dates(ano, semana)
-    
-    # Manter apenas chamados cuja DATA_DISPLAY está dentro dos 7 dias da semana
-    df_visible = df_filtered[df_filtered['DATA_DISPLAY'].isin(week_dates)].copy()
-    
-    # Agora calcular as métricas com dados visíveis apenas
-    total_semana = len(df_visible)
-    resolvidos = len(df_visible[df_visible['STATUS_CATEGORIA'].isin(['RESOLVIDO', 'FECHADO'])])
-    em_aberto = len(df_visible[~df_visible['STATUS_CATEGORIA'].isin(['RESOLVIDO', 'FECHADO', 'CANCELADO'])])
+    # 🔧 CORREÇÃO CRÍTICA: As métricas refletem APENAS o que o usuário vê, ou seja,
+    # chamados cuja DATA_DISPLAY está dentro dos 7 dias da semana
+    # (o resumo já vem restrito a esses dias)
+    total_semana = resumo_semana['total']
+    resolvidos = resumo_semana['resolvidos']
+    em_aberto = resumo_semana['em_aberto']
 
     # Para SLA: considerar apenas chamados Resolvidos ou Fechados que são visíveis
-    df_sla_elegivel = df_visible[df_visible['STATUS'].isin(['Resolvido', 'Fechado'])]
-    sla_violados = len(df_sla_elegivel[df_sla_elegivel['SLA_VIOLADO'] == True])
-    total_sla_elegivel = len(df_sla_elegivel)
+    sla_violados = resumo_semana['sla_violados']
+    total_sla_elegivel = resumo_semana['sla_elegivel']
 
     with col1:
         st.metric("📋 Total", total_semana)
@@ -146,23 +95,24 @@ def _show_week_metrics(df_filtered, ano, semana):
         st.metric("🎯 Taxa SLA", f"{taxa_sla:.1f}%",
                  delta="✅ Ok" if taxa_sla >= 95 else "⚠️ Atenção")
 
-def _create_week_kanban(df_filtered, ano, semana, responsavel, status_filtrados, is_current_week):
+def _create_week_kanban(df_filtered, resumo_semana, week_dates, ano, semana, responsavel, 
+                        status_filtrados, is_current_week):
     """Cria visualização Kanban por dia da semana"""
-    week_dates = get_week_dates(ano, semana)
     days_pt = ['Segunda', 'Terça', 'Quarta', 'Quinta', 'Sexta', 'Sábado', 'Domingo']
     
+    # Separar os chamados por DATA_DISPLAY uma única vez (ao invés de um filtro por dia)
+    tickets_por_dia = dict(tuple(df_filtered.groupby('DATA_DISPLAY', sort=False)))
+    
     cols = st.columns(7)
     
     for i, (col, day_pt, date) in enumerate(zip(cols, days_pt, week_dates)):
         with col:
-            _create_day_column(df_filtered, day_pt, date, ano, semana, responsavel, 
-                             status_filtrados, is_current_week)
+            _create_day_column(tickets_por_dia.get(date), resumo_semana['por_dia'][date], day_pt, date,
+                             ano, semana, responsavel, status_filtrados, is_current_week)
 
-def _create_day_column(df_filtered, day_pt, date, ano, semana, responsavel, status_filtrados, is_current_week):
+def _create_day_column(day_tickets, total_dia, day_pt, date, ano, semana, responsavel, status_filtrados, is_current_week):
     """Cria coluna de um dia específico no Kanban"""
-    # USAR DATA_DISPLAY ao invés de DATA_ALVO_DATE
-    day_tickets = df_filtered[df_filtered['DATA_DISPLAY'] == date]
-    total_dia = len(day_tickets)
+    # day_tickets já vem agrupado por DATA_DISPLAY (ao invés de DATA_ALVO_DATE)
     
     # Verificar se é hoje
     hoje = datetime.now().date()
@@ -285,28 +235,3 @@ def _show_expansion_buttons(total_dia, is_expanded, day_key):
                     use_container_width=True):
             st.session_state.expanded_days[day_key] = False
             st.rerun()
-
-def get_week_dates(year, week):
-    """Obtém as datas da semana específica"""
-    try:
-        # Criar data do primeiro dia do ano
-        jan_1 = datetime(year, 1, 1)
-        
-        # Encontrar a primeira segunda-feira da semana 1 ISO
-        days_since_monday = jan_1.weekday()
-        days_to_first_monday = -days_since_monday if days_since_monday != 0 else 0
-        
-        first_monday = jan_1 + timedelta(days=days_to_first_monday)
-        week_start = first_monday + timedelta(weeks=week-1)
-        
-        week_dates = []
-        for i in range(7):
-            current_date = week_start + timedelta(days=i)
-            week_dates.append(current_date.date())
-        
-        return week_dates
-    except:
-        # Fallback para a semana atual
-        today = datetime.now().date()
-        week_start = today - timedelta(days=today.weekday())
-        return [week_start + timedelta(days=i) for i in range(7)]
\ No newline at end of file
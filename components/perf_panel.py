@@ -0,0 +1,113 @@
+import json
+import pandas as pd
+import streamlit as st
+from collections import deque
+from streamlit.runtime.scriptrunner import get_script_run_ctx
+from config import settings
+from utils import perf, telemetry, memory_profile
+
+# Quantidade de execuções mantidas no histórico da sessão
+HISTORICO_MAX = 20
+
+def start_perf_recording():
+    """Inicia a medição desta execução se o painel ou a telemetria estiverem ativados"""
+    perfil_memoria = bool(settings.PERFIL_MEMORIA_PASTA) or (
+        st.session_state.get('perf_painel', False) and st.session_state.get('perf_perfil_memoria', False))
+    if st.session_state.get('perf_painel', False) or telemetry.enabled() or perfil_memoria:
+        perf.start_rerun(medir_memoria=st.session_state.get('perf_memoria', False),
+                         perfil_memoria=perfil_memoria)
+        _count_payload()
+
+def _count_payload():
+    """Soma em perf.count os bytes das mensagens enviadas ao navegador nesta execução"""
+    ctx = get_script_run_ctx()
+    if ctx is None or getattr(ctx._enqueue, '_conta_payload', False):
+        return
+    enviar = ctx._enqueue
+
+    def enviar_contando(msg):
+        # Mensagens repetidas já em cache no navegador chegam aqui como referência (bem menores)
+        perf.count('payload_bytes', msg.ByteSize())
+        perf.count('payload_mensagens')
+        enviar(msg)
+
+    enviar_contando._conta_payload = True
+    ctx._enqueue = enviar_contando
+
+def finish_perf_recording():
+    """Encerra a medição desta execução (se houver) e a envia ao histórico e à telemetria"""
+    registro = perf.finish_rerun()
+    if registro is None:
+        return None
+    if st.session_state.get('perf_painel', False):
+        historico = st.session_state.setdefault('perf_historico', deque(maxlen=HISTORICO_MAX))
+        historico.append(registro)
+    telemetry.observe_rerun(registro)
+    if registro.perfil_memoria and settings.PERFIL_MEMORIA_PASTA:
+        memory_profile.dump_report(memory_profile.build_report(registro), settings.PERFIL_MEMORIA_PASTA)
+    return registro
+
+def show_perf_panel():
+    """Painel opcional na sidebar com os tempos por etapa das últimas execuções"""
+    registro = finish_perf_recording()
+
+    st.sidebar.markdown("---")
+    ativo = st.sidebar.checkbox("⏱️ Painel de desempenho", key="perf_painel",
+                                help="Mede o tempo de cada etapa do dashboard a cada atualização")
+    if not ativo:
+        st.session_state.pop('perf_historico', None)
+        return
+
+    st.sidebar.checkbox("Medir memória alocada (mais lento)", key="perf_memoria")
+    st.sidebar.checkbox("Perfil de memória por local do código (muito mais lento)", key="perf_perfil_memoria")
+    historico = st.session_state.get('perf_historico')
+    if not historico:
+        st.sidebar.caption("A medição começa na próxima atualização da página.")
+        return
+
+    with st.sidebar.expander("⏱️ Desempenho por etapa", expanded=True):
+        st.caption(f"Última execução: {registro.tempo_s * 1000:,.0f} ms" if registro is not None
+                   else "Última execução não medida")
+        if registro is not None and 'payload_bytes' in registro.contadores:
+            st.caption(f"Payload enviado ao navegador: {registro.contadores['payload_bytes'] / 1024:,.1f} KB "
+                       f"em {registro.contadores['payload_mensagens']} mensagens")
+        if registro is not None and 'cache:figuras:chamada' in registro.contadores:
+            chamadas = registro.contadores['cache:figuras:chamada']
+            reaproveitadas = chamadas - registro.contadores.get('cache:figuras:miss', 0)
+            st.caption(f"Montagem dos gráficos: {registro.contadores['figuras_s'] * 1000:,.1f} ms "
+                       f"({reaproveitadas} de {chamadas} figuras vindas do cache)")
+        if registro is not None:
+            ultima = registro.as_frame()
+            if ultima['bytes_alocados'].isna().all():
+                ultima = ultima.drop(columns=['bytes_alocados'])
+            else:
+                ultima['bytes_alocados'] = (ultima['bytes_alocados'] / 1024 ** 2).round(2)
+                ultima = ultima.rename(columns={'bytes_alocados': 'MB alocados'})
+            st.dataframe(ultima, hide_index=True, use_container_width=True)
+
+        if registro is not None and registro.perfil_memoria:
+            _show_memory_profile(registro)
+
+        st.markdown(f"**p50 / p95 (últimas {len(historico)} execuções)**")
+        st.dataframe(perf.rolling_percentiles(historico), hide_index=True, use_container_width=True)
+
+        st.markdown("**Histórico (ms)**")
+        st.dataframe(perf.history_frame(reversed(historico)), hide_index=True, use_container_width=True)
+
+def _show_memory_profile(registro):
+    """Locais do projeto que mais retiveram memória em cada etapa da última execução"""
+    relatorio = memory_profile.build_report(registro)
+    if relatorio['pico_bytes'] is not None:
+        st.markdown(f"**Perfil de memória** (maior pico: {relatorio['pico_bytes'] / 1024 ** 2:,.1f} MB)")
+    for etapa in relatorio['etapas']:
+        if not etapa['principais_locais']:
+            continue
+        st.caption(f"{etapa['etapa']} — pico {(etapa['pico_bytes'] or 0) / 1024 ** 2:,.1f} MB")
+        locais = pd.DataFrame(etapa['principais_locais'][:5])
+        locais['MB'] = (locais.pop('bytes') / 1024 ** 2).round(2)
+        st.dataframe(locais, hide_index=True, use_container_width=True)
+
+    st.download_button("💾 Baixar relatório de memória (JSON)",
+                       json.dumps(relatorio, indent=2, ensure_ascii=False),
+                       file_name="perfil_memoria.json", mime="application/json",
+                       use_container_width=True)
@@ -2,6 +2,13 @@ import pandas as pd
 import streamlit as st
 from datetime import datetime
 
+def create_team_selector(equipes, equipe_padrao):
+    """Seletor de equipe na sidebar (só aparece com mais de uma equipe nos dados)"""
+    if len(equipes) <= 1:
+        return equipes[0] if equipes else equipe_padrao
+    indice = equipes.index(equipe_padrao) if equipe_padrao in equipes else 0
+    return st.sidebar.selectbox("👥 Equipe:", equipes, index=indice, key='filtro_equipe')
+
 def create_sidebar_filters(df):
     """Cria filtros na sidebar"""
     st.sidebar.header("🔍 Filtros de Análise")
@@ -0,0 +1,56 @@
+import pandas as pd
+import streamlit as st
+from utils.sla_risk import get_due_index, summarize_by_responsavel
+
+# Janela do radar -> horizonte a partir de agora
+HORIZONTES = {
+    "4 horas": pd.Timedelta(hours=4),
+    "24 horas": pd.Timedelta(hours=24),
+    "3 dias": pd.Timedelta(days=3),
+    "7 dias": pd.Timedelta(days=7),
+}
+
+# Intervalo (segundos) em que só o radar é executado de novo, com o horário atualizado
+ATUALIZAR_A_CADA = 60
+
+def create_sla_radar(df, responsavel):
+    """Cria o radar de chamados em aberto com prazo próximo"""
+    # Índice de prazos montado uma vez por versão dos dados; as consultas usam o horário atual
+    indice = get_due_index(df, df.attrs.get('versao'))
+    with st.expander("⏰ Radar de SLA - chamados em risco", expanded=False):
+        _show_radar(indice, responsavel)
+
+@st.fragment(run_every=ATUALIZAR_A_CADA)
+def _show_radar(indice, responsavel):
+    """Conteúdo do radar (fragmento: atualiza sozinho sem reprocessar o dashboard)"""
+    agora = pd.Timestamp.now()
+    janela = st.radio("Prazo nas próximas", list(HORIZONTES), index=1, horizontal=True, key="radar_horizonte")
+    em_risco = indice.at_risk(agora, HORIZONTES[janela], responsavel)
+    vencidos = indice.overdue_counts(agora, responsavel)
+
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        st.metric("⏰ Em risco", len(em_risco))
+    with col2:
+        st.metric("🚨 SLA já quebrado (em aberto)", vencidos.get('DATA_QUEBRA_SLA', 0))
+    with col3:
+        st.metric("📅 Previsão vencida (em aberto)", vencidos.get('DATA_PREV_SOLUCAO', 0))
+
+    if len(em_risco) == 0:
+        st.success(f"Nenhum chamado em aberto com prazo nas próximas {janela}.")
+    else:
+        if responsavel == 'Todos':
+            resumo = summarize_by_responsavel(em_risco)
+            resumo['Proximo_Prazo'] = resumo['Proximo_Prazo'].dt.strftime('%d/%m/%Y %H:%M')
+            st.dataframe(
+                resumo.rename(columns={'RESPONSAVEL': 'Responsável', 'Proximo_Prazo': 'Próximo Prazo'}),
+                use_container_width=True,
+                hide_index=True
+            )
+
+        df_visual = em_risco[['REQUISICAO', 'RESPONSAVEL', 'STATUS', 'TIPO_PRAZO', 'PROXIMO_PRAZO', 'HORAS_RESTANTES']].copy()
+        df_visual['PROXIMO_PRAZO'] = df_visual['PROXIMO_PRAZO'].dt.strftime('%d/%m/%Y %H:%M')
+        df_visual.columns = ['Requisição', 'Responsável', 'Status', 'Prazo', 'Vence em', 'Horas Restantes']
+        st.dataframe(df_visual, use_container_width=True, hide_index=True)
+
+    st.caption(f"Atualizado às {agora.strftime('%H:%M')} (a cada {ATUALIZAR_A_CADA} segundos).")
@@ -1,16 +1,23 @@
+import os
+import re
 import streamlit as st
+from functools import lru_cache
 
-def configure_page():
-    """Configura a página do Streamlit"""
-    st.set_page_config(
-        page_title="Análise de Chamados",
-        page_icon="⚡",
-        layout="wide",
-        initial_sidebar_state="expanded"
-    )
+# Arquivos servidos pelo Streamlit em app/static/ (server.enableStaticServing em .streamlit/config.toml)
+PASTA_ESTATICA = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "static")
 
-    # CSS customizado - ATUALIZADO com animações
-    st.markdown("""
+def static_url(nome):
+    """URL de um arquivo de static/ servido pelo Streamlit; None sem static serving ou sem o arquivo"""
+    if not st.get_option("server.enableStaticServing"):
+        return None
+    caminho = os.path.join(PASTA_ESTATICA, nome)
+    if not os.path.exists(caminho):
+        return None
+    # A data de modificação na URL força o navegador a buscar a versão nova após uma troca do arquivo
+    return f"app/static/{nome}?v={int(os.path.getmtime(caminho))}"
+
+# CSS customizado - ATUALIZADO com animações
+_CSS = """
     <style>
     .main-header {
         font-size: 2.5rem;
@@ -142,4 +149,23 @@ def configure_page():
         background-color: #0056b3;
     }
     </style>
-    """, unsafe_allow_html=True)
\ No newline at end of file
+    """
+
+@lru_cache(maxsize=1)
+def page_style():
+    """CSS da página minificado uma única vez por processo (é reenviado a cada execução)"""
+    css = re.sub(r'/\*.*?\*/', '', _CSS, flags=re.S)
+    css = re.sub(r'\s+', ' ', css)
+    css = re.sub(r'\s*([{};:,>])\s*', r'\1', css)
+    return css.strip()
+
+def configure_page():
+    """Configura a página do Streamlit"""
+    st.set_page_config(
+        page_title="Análise de Chamados",
+        page_icon="⚡",
+        layout="wide",
+        initial_sidebar_state="expanded"
+    )
+
+    st.markdown(page_style(), unsafe_allow_html=True)
@@ -0,0 +1,25 @@
+import os
+
+# Configurações lidas de variáveis de ambiente (valores padrão servem para uso local)
+
+# Telemetria de desempenho: '' (desativada), 'arquivo' ou 'http'
+TELEMETRIA_MODO = os.environ.get("DASHBOARD_TELEMETRIA", "").strip().lower()
+TELEMETRIA_ARQUIVO = os.environ.get("DASHBOARD_TELEMETRIA_ARQUIVO", "metricas_dashboard.prom")
+TELEMETRIA_HOST = os.environ.get("DASHBOARD_TELEMETRIA_HOST", "127.0.0.1")
+TELEMETRIA_PORTA = int(os.environ.get("DASHBOARD_TELEMETRIA_PORTA", "9464"))
+
+# Perfil de memória (tracemalloc): pasta onde gravar um relatório JSON por execução
+PERFIL_MEMORIA_PASTA = os.environ.get("DASHBOARD_PERFIL_MEMORIA", "").strip()
+
+# Equipe (RESOLVEDOR_PADRAO) dona da planilha "Requisições da Minha Equipe"; aberta por padrão no dashboard
+EQUIPE_PADRAO = os.environ.get("DASHBOARD_EQUIPE_PADRAO", "AUTOMAÇÃO TELECOM").strip()
+
+# Motor das agregações de todo o histórico: 'pandas' (padrão) ou 'duckdb' (se o pacote estiver instalado)
+MOTOR_CONSULTAS = os.environ.get("DASHBOARD_MOTOR", "pandas").strip().lower()
+
+# Backend da ingestão e da preparação: 'pandas' (padrão) ou 'polars' (se o pacote estiver instalado)
+BACKEND_DADOS = os.environ.get("DASHBOARD_BACKEND", "pandas").strip().lower()
+
+# Pasta monitorada: exportações deixadas nela são processadas automaticamente ('' desativa)
+PASTA_ENTRADA = os.environ.get("DASHBOARD_PASTA_ENTRADA", "").strip()
+PASTA_ENTRADA_INTERVALO = float(os.environ.get("DASHBOARD_PASTA_ENTRADA_INTERVALO", "10"))
@@ -1,17 +1,37 @@
 import streamlit as st
-import pandas as pd
 import os
+import shutil
+import tempfile
 from datetime import datetime
+from functools import partial
 from config.page_config import configure_page
-from utils.data_loader import load_data
-from utils.data_processor import prepare_data_with_real_status
-from components.sidebar import create_sidebar_filters
+from utils.data_loader import get_team_data
+from utils.ingest_job import IngestJob, claim_ingest, current_ingest, release_ingest
+from utils.drop_folder import DropFolderWatcher
+from utils.ingest import describe_key_report
+from utils.store import DATA_PATH, dataset_teams
+from config.settings import EQUIPE_PADRAO, PASTA_ENTRADA
+from utils.weekly_report import weekly_report_bytes, report_file_name
+from utils.data_processor import get_prepared_data, find_data_alvo_column
+from components.sidebar import create_sidebar_filters, create_team_selector
 from components.kanban import create_kanban_view
 from components.analytics import create_analytics
+from components.sla_radar import create_sla_radar
 from components.footer import create_footer
+from components.perf_panel import start_perf_recording, finish_perf_recording, show_perf_panel
+from utils import perf, telemetry
 
 def main():
     """Função principal da aplicação com upload obrigatório"""
+    # Medição por etapa (apenas com o painel de desempenho ou a telemetria ativados)
+    start_perf_recording()
+    try:
+        _render_dashboard()
+    finally:
+        finish_perf_recording()
+
+def _render_dashboard():
+    """Monta a página: upload, filtros, Kanban, análises e sidebar"""
     # Configurar página
     configure_page()
     
@@ -22,15 +42,24 @@ def main():
     # Container principal com margem para o rodapé
     st.markdown('<div class="main-content">', unsafe_allow_html=True)
     
+    # Processamento em segundo plano (se houver) - os dados atuais continuam disponíveis
+    _show_ingest_progress()
+    _get_drop_watcher()
+    
     # Verificar se os dados já estão carregados
     if not _check_data_loaded():
         # Se não há dados carregados, mostrar interface de upload
-        _show_upload_interface()
+        if current_ingest('upload') is None:
+            _show_upload_interface()
         return  # Para aqui até os dados serem carregados
     
     # Se chegou aqui, os dados estão disponíveis
+    # Equipe escolhida antes da leitura: só a parte dela do parquet é carregada
+    equipe = create_team_selector(dataset_teams(DATA_PATH), EQUIPE_PADRAO)
     with st.spinner("⚙️ Carregando dados do sistema..."):
-        df = load_data()
+        with perf.stage("load_data") as etapa:
+            perf.count("cache:load_data:chamada")
+            df = etapa.set_output(_load_data_cached(equipe))
     
     if df is None:
         st.error("❌ Erro ao carregar os dados processados")
@@ -39,9 +68,26 @@ def main():
             st.rerun()
         return
     
+    # Nova versão gravada desde a última execução desta sessão (upload, linha de comando ou pasta monitorada)
+    versao = df.attrs.get('versao')
+    if st.session_state.get('versao_dados') not in (None, versao):
+        st.toast("🔄 Dados atualizados com a nova versão processada.")
+    st.session_state.versao_dados = versao
+    
+    # Verificar se temos uma coluna de data alvo disponível
+    data_alvo_col = find_data_alvo_column(df)
+    if data_alvo_col is None:
+        st.error("⚠ Nenhuma coluna de data alvo encontrada!")
+        st.info("Colunas disponíveis: " + ", ".join(df.columns.tolist()))
+        return
+    if data_alvo_col != 'DATA_ALVO':
+        st.info(f"📅 Usando coluna '{data_alvo_col}' como DATA_ALVO")
+    
     # Preparar dados
     with st.spinner("⚙️ Preparando análise com base na Data Alvo..."):
-        df = prepare_data_with_real_status(df)
+        # Parte estática em cache por versão dos dados; na virada do dia só as linhas afetadas são recalculadas
+        with perf.stage("prepare_data_with_real_status", df) as etapa:
+            df = etapa.set_output(get_prepared_data(df))
     
     # Verificar se temos dados de DATA_ALVO
     if len(df) == 0:
@@ -49,10 +95,11 @@ def main():
         st.warning("Verifique se a coluna 'DATA_ALVO' existe e contém datas válidas.")
         return
     
-    st.success(f"✅ Sistema carregado! {len(df):,} chamados.")
+    st.success(f"✅ Sistema carregado! {len(df):,} chamados ({equipe}).")
     
     # Criar filtros
-    filtros = create_sidebar_filters(df)
+    with perf.stage("create_sidebar_filters", df):
+        filtros = create_sidebar_filters(df)
     if filtros[0] is None or filtros[1] is None:
         st.warning("⚠️ Dados insuficientes para análise.")
         return
@@ -60,27 +107,37 @@ def main():
     ano, semana, responsavel, status_filtrados = filtros
     
     # Visualizações principais
-    create_kanban_view(df, ano, semana, responsavel, status_filtrados)
-    create_analytics(df, ano, semana, responsavel, status_filtrados)
+    with perf.stage("create_kanban_view", df):
+        create_kanban_view(df, ano, semana, responsavel, status_filtrados)
+    with perf.stage("create_sla_radar", df):
+        create_sla_radar(df, responsavel)
+    with perf.stage("create_analytics", df):
+        create_analytics(df, ano, semana, responsavel, status_filtrados)
+    
+    # Fechar container principal
+    st.markdown('</div>', unsafe_allow_html=True)
+    
+    # Criar rodapé (antes do painel de desempenho, para entrar no payload medido)
+    create_footer()
     
     # Informações do sistema na sidebar
     _show_system_info(df, ano, semana, responsavel, status_filtrados)
+    _show_weekly_report_download(df, ano, semana, responsavel)
+    show_perf_panel()
     
     # Botão para recarregar dados na sidebar
     _show_data_management_sidebar()
-    
-    # Fechar container principal
-    st.markdown('</div>', unsafe_allow_html=True)
-    
-    # Criar rodapé
-    create_footer()
+
+def _load_data_cached(equipe):
+    """Dados da equipe do parquet processado, compartilhados entre sessões e relidos quando o arquivo muda"""
+    return get_team_data(equipe)
 
 def _check_data_loaded():
     """Verifica se os dados já foram carregados e processados"""
     if 'data_processed' in st.session_state and st.session_state.data_processed:
         return True
     
-    if os.path.exists("requisicoes_data.parquet"):
+    if os.path.exists(DATA_PATH):
         st.session_state.data_processed = True
         return True
     
@@ -133,6 +190,10 @@ def _show_upload_interface():
     elif uploaded_req is not None or uploaded_minha is not None:
         st.warning("⚠️ Por favor, faça upload dos dois arquivos para continuar.")
     
+    if _get_drop_watcher() is not None:
+        st.caption(f"📂 Ou deixe as duas planilhas na pasta monitorada `{PASTA_ENTRADA}`: "
+                   "elas são processadas automaticamente.")
+    
     # Informações adicionais
     with st.expander("ℹ️ Informações sobre os arquivos"):
         st.markdown("""
@@ -151,224 +212,147 @@ def _show_upload_interface():
         """)
 
 def _process_uploaded_files(uploaded_req, uploaded_minha):
-    """Processa os arquivos enviados"""
+    """Inicia o processamento dos arquivos enviados em um processo separado"""
     try:
-        with st.spinner("🔄 Processando arquivos... Isso pode levar alguns segundos."):
-            # Carregar dados dos uploads
-            df_req = pd.read_excel(uploaded_req)
-            df_req_minha = pd.read_excel(uploaded_minha)
-            
-            # Aplicar processamento com a nova lógica corrigida
-            df_final = _process_data_original_logic(df_req, df_req_minha)
-            
-            # Salvar parquet para próximas execuções
-            df_final.to_parquet("requisicoes_data.parquet", index=False)
-            
-            # Marcar como processado
-            st.session_state.data_processed = True
-            
-            st.success("✅ Dados processados com sucesso!")
-            st.balloons()
-            
-            # Recarregar a página para mostrar o dashboard
-            st.rerun()
-            
+        # Salvar os uploads em disco para o processo de ingestão
+        with perf.stage("salvar_uploads"):
+            pasta = tempfile.mkdtemp(prefix="ingestao_")
+            caminhos = []
+            for uploaded, nome in [(uploaded_req, "requisicoes.xlsx"), (uploaded_minha, "minha_equipe.xlsx")]:
+                caminho = os.path.join(pasta, nome)
+                with open(caminho, "wb") as arquivo:
+                    arquivo.write(uploaded.getbuffer())
+                caminhos.append(caminho)
+        
+        # Um processamento por vez, contando o da pasta monitorada (utils.ingest_job.claim_ingest)
+        job = IngestJob(caminhos[0], caminhos[1], DATA_PATH, pasta_temporaria=pasta)
+        if not claim_ingest(job, 'upload'):
+            shutil.rmtree(pasta, ignore_errors=True)
+            st.warning("⏳ Já existe um processamento em andamento.")
+            return
+        job.start()
+        st.rerun()
+    
     except Exception as e:
-        st.error(f"❌ Erro ao processar arquivos: {str(e)}")
-        st.error("Verifique se os arquivos estão no formato correto e tente novamente.")
+        st.error(f"❌ Erro ao iniciar o processamento: {str(e)}")
         import traceback
         with st.expander("Detalhes do erro (para debug)"):
             st.code(traceback.format_exc())
 
-def _process_data_original_logic(df_req, df_req_minha):
-    """Aplica a lógica de processamento PRIORIZANDO ARQUIVO DA EQUIPE E CONSOLIDANDO DADOS"""
-    # Verificar se a coluna RESOLVEDOR_PADRAO existe
-    if 'RESOLVEDOR_PADRAO' in df_req.columns:
-        df_req = df_req[df_req['RESOLVEDOR_PADRAO'] == 'AUTOMAÇÃO TELECOM'].copy()
-    
-    # Selecionar apenas colunas que existem no df_req
-    required_cols_req = ['NUM_CHAMADO', 'DATA_ABERTURA', 'DATA_PREV_SOLUCAO',
-                         'DATA_QUEBRA_SLA', 'SLA_VIOLADO', 'DATA_RESOLUCAO',
-                         'DATA_FECHAMENTO', 'Status', 'TITULO', 'SOLICITANTE', 'RESPONSAVEL',
-                         'EMPRESA_SOLICITANTE', 'CLIENTE_CIDADE', 'CLIENTE_UF']
-    
-    available_cols_req = [col for col in required_cols_req if col in df_req.columns]
-    df_req = df_req[available_cols_req].copy()
-    
-    # Selecionar apenas colunas que existem no df_req_minha
-    required_cols_minha = ['Requisição de Serviço','Data Esperada', 'Resumo', 
-                           'Status', 'Proprietário', 'Cliente', 'Criado em', 
-                           'Resolvido em', 'SLA - Data Prevista Solução', 'SLA - Data Quebra']
-    
-    available_cols_minha = [col for col in required_cols_minha if col in df_req_minha.columns]
-    df_req_minha = df_req_minha[available_cols_minha].copy()
-    
-    # Renomear colunas do arquivo MINHA para sufixos específicos
-    rename_dict = {}
-    if 'Requisição de Serviço' in df_req_minha.columns:
-        rename_dict['Requisição de Serviço'] = 'NUM_CHAMADO'
-    
-    # Campos que vamos usar para preencher buracos (Sufixo _MINHA)
-    if 'Resumo' in df_req_minha.columns:
-        rename_dict['Resumo'] = 'RESUMO_MINHA'  # Diferente de TITULO para podermos fundir
-    if 'Cliente' in df_req_minha.columns:
-        rename_dict['Cliente'] = 'SOLICITANTE_MINHA' # Diferente de SOLICITANTE para podermos fundir
-    if 'Status' in df_req_minha.columns:
-        rename_dict['Status'] = 'STATUS_MINHA'
-    if 'Proprietário' in df_req_minha.columns:
-        rename_dict['Proprietário'] = 'RESPONSAVEL_MINHA'
-        
-    # Datas
-    if 'Resolvido em' in df_req_minha.columns:
-        rename_dict['Resolvido em'] = 'DATA_RESOLUCAO_MINHA'
-    if 'Criado em' in df_req_minha.columns:
-        rename_dict['Criado em'] = 'DATA_ABERTURA_MINHA'
-    if 'SLA - Data Prevista Solução' in df_req_minha.columns:
-        rename_dict['SLA - Data Prevista Solução'] = 'DATA_PREV_SOLUCAO_MINHA'
-    if 'SLA - Data Quebra' in df_req_minha.columns:
-        rename_dict['SLA - Data Quebra'] = 'DATA_QUEBRA_SLA' # Esse pode manter
-    
-    df_req_minha.rename(columns=rename_dict, inplace=True)
-    
-    # Identificar colunas novas 
-    colunas_df_req = set(df_req.columns)
-    colunas_df_req_minha = set(df_req_minha.columns)
-    colunas_novas = colunas_df_req_minha - colunas_df_req
-    
-    # Fazer o merge
-    if 'NUM_CHAMADO' in df_req.columns or 'NUM_CHAMADO' in df_req_minha.columns:
-        colunas_para_merge = ['NUM_CHAMADO'] + list(colunas_novas)
-        df_req_minha_filtrado = df_req_minha[colunas_para_merge].copy()
-        
-        # OUTER JOIN: Garante que chamados apenas da planilha da equipe apareçam
-        df_final = pd.merge(df_req, df_req_minha_filtrado, on='NUM_CHAMADO', how='outer')
-        
-        # --- LÓGICA DE CONSOLIDAÇÃO DE DADOS ---
-        
-        # 1. Status (Prioridade Minha)
-        if 'STATUS_MINHA' in df_final.columns:
-            if 'Status' in df_final.columns:
-                df_final['Status'] = df_final['STATUS_MINHA'].fillna(df_final['Status'])
-            else:
-                df_final['Status'] = df_final['STATUS_MINHA']
-        
-        # 2. Responsável (Prioridade Minha)
-        if 'RESPONSAVEL_MINHA' in df_final.columns:
-            if 'RESPONSAVEL' in df_final.columns:
-                df_final['RESPONSAVEL'] = df_final['RESPONSAVEL_MINHA'].fillna(df_final['RESPONSAVEL'])
-            else:
-                df_final['RESPONSAVEL'] = df_final['RESPONSAVEL_MINHA']
-        
-        # 3. Solicitante (Se vazio no Geral, pega do Minha)
-        if 'SOLICITANTE_MINHA' in df_final.columns:
-            if 'SOLICITANTE' in df_final.columns:
-                df_final['SOLICITANTE'] = df_final['SOLICITANTE'].fillna(df_final['SOLICITANTE_MINHA'])
-            else:
-                df_final['SOLICITANTE'] = df_final['SOLICITANTE_MINHA']
+@st.cache_resource
+def _get_drop_watcher():
+    """Pasta monitorada (DASHBOARD_PASTA_ENTRADA), uma por servidor; None se não configurada"""
+    if not PASTA_ENTRADA:
+        return None
+    return DropFolderWatcher(PASTA_ENTRADA).start()
 
-        # 4. Resumo/Título (Se vazio no Geral, pega do Minha)
-        if 'RESUMO_MINHA' in df_final.columns:
-            if 'TITULO' in df_final.columns:
-                df_final['TITULO'] = df_final['TITULO'].fillna(df_final['RESUMO_MINHA'])
-            else:
-                df_final['TITULO'] = df_final['RESUMO_MINHA']
-                
-        # 5. Datas (Se vazio no Geral, pega do Minha)
-        if 'DATA_RESOLUCAO_MINHA' in df_final.columns:
-             if 'DATA_RESOLUCAO' in df_final.columns:
-                 df_final['DATA_RESOLUCAO'] = df_final['DATA_RESOLUCAO'].fillna(df_final['DATA_RESOLUCAO_MINHA'])
-             else:
-                 df_final['DATA_RESOLUCAO'] = df_final['DATA_RESOLUCAO_MINHA']
+def _show_ingest_progress():
+    """Mostra o resultado do último processamento e, enquanto houver um em andamento, o progresso
 
-        if 'DATA_ABERTURA_MINHA' in df_final.columns:
-             if 'DATA_ABERTURA' in df_final.columns:
-                 df_final['DATA_ABERTURA'] = df_final['DATA_ABERTURA'].fillna(df_final['DATA_ABERTURA_MINHA'])
-             else:
-                 df_final['DATA_ABERTURA'] = df_final['DATA_ABERTURA_MINHA']
+    O acompanhamento a cada segundo (_follow_ingest) só roda enquanto houver processamento registrado.
+    """
+    job = st.session_state.pop('ingest_finalizado', None)
+    if job is not None:
+        _show_ingest_result(job)
+    # Registro compartilhado entre sessões (sobrevive a um refresh); o da pasta monitorada é acompanhado por ela
+    if current_ingest('upload') is not None:
+        _follow_ingest()
 
-        if 'DATA_PREV_SOLUCAO_MINHA' in df_final.columns:
-             if 'DATA_PREV_SOLUCAO' in df_final.columns:
-                 df_final['DATA_PREV_SOLUCAO'] = df_final['DATA_PREV_SOLUCAO'].fillna(df_final['DATA_PREV_SOLUCAO_MINHA'])
-             else:
-                 df_final['DATA_PREV_SOLUCAO'] = df_final['DATA_PREV_SOLUCAO_MINHA']
-            
-    else:
-        # Se não conseguir fazer merge, usar apenas df_req
-        df_final = df_req.copy()
-    
-    # Tratar colunas nulas essenciais
-    if 'RESPONSAVEL' in df_final.columns:
-        df_final['RESPONSAVEL'] = df_final['RESPONSAVEL'].fillna('Sem Responsável')
-    if 'SOLICITANTE' in df_final.columns:
-        df_final['SOLICITANTE'] = df_final['SOLICITANTE'].fillna('N/A')
-    
-    # Criar DATA_ALVO com nova lógica
-    from datetime import datetime
-    hoje = datetime.now().date()
-    
-    def get_data_alvo(row):
-        # 1. Tentar usar Data Esperada (do arquivo 2 - Requisições da Minha Equipe)
-        data_esp = row.get('Data Esperada')
-        if pd.notna(data_esp):
-            data_esp_date = pd.to_datetime(data_esp, errors='coerce')
-            if pd.notna(data_esp_date):
-                return data_esp_date
-        
-        # 2. Se Data Esperada não existe ou está vazia, usar DATA_QUEBRA_SLA
-        data_quebra = row.get('DATA_QUEBRA_SLA')
-        if pd.notna(data_quebra):
-            return data_quebra
-        
-        # 3. Se DATA_QUEBRA_SLA não existe, usar DATA_PREV_SOLUCAO
-        data_prev = row.get('DATA_PREV_SOLUCAO')
-        if pd.notna(data_prev):
-            return data_prev
-        
-        return None
-    
-    # Converter Data Esperada se existir
-    if 'Data Esperada' in df_final.columns:
-        df_final['Data Esperada'] = pd.to_datetime(df_final['Data Esperada'], errors='coerce')
-    
-    df_final['DATA_ALVO'] = df_final.apply(get_data_alvo, axis=1)
-    
-    # Aplicar padronização de colunas
-    df_final = _apply_column_mapping(df_final)
-    
-    return df_final
+@st.fragment(run_every=1)
+def _follow_ingest():
+    """Progresso do processamento em segundo plano; ao terminar, finaliza e refaz a página"""
+    job = current_ingest('upload')
+    if job is None:
+        # Finalizado por outra sessão: a página é refeita sem este acompanhamento
+        st.rerun(scope="app")
+    
+    if job.poll() == 'executando':
+        st.progress(job.progress, text=f"🔄 {job.stage_label}... (os dados atuais continuam disponíveis)")
+        if not st.button("⛔ Cancelar processamento", key="btn_cancelar_ingestao"):
+            return
+        job.cancel()
+    
+    # Job finalizado: só a sessão que o tira do registro registra a telemetria
+    if release_ingest(job):
+        telemetry.observe_ingest(job)
+    st.session_state.ingest_finalizado = job
+    if job.status == 'concluido':
+        st.session_state.data_processed = True
+    st.rerun(scope="app")
 
-def _apply_column_mapping(df):
-    """Aplica mapeamento de colunas para padronizar nomes"""
-    column_mapping = {
-        'NUM_CHAMADO': 'REQUISICAO',
-        'Status': 'STATUS',
-        'TITULO': 'RESUMO',
-    }
-    
-    # Aplicar mapeamento apenas para colunas existentes
-    existing_columns = {k: v for k, v in column_mapping.items() if k in df.columns}
-    df = df.rename(columns=existing_columns)
-    return df
+def _show_ingest_result(job):
+    """Mensagens do processamento finalizado (uma vez, na página refeita)"""
+    if job.status == 'concluido':
+        st.toast(f"✅ Dados processados com sucesso! {job.linhas:,} chamados.")
+        for aviso in describe_key_report(job.relatorio_chaves):
+            st.toast(f"⚠️ {aviso}")
+    elif job.status == 'erro':
+        st.error("❌ Erro ao processar arquivos. Verifique se os arquivos estão no formato correto e tente novamente.")
+        with st.expander("Detalhes do erro (para debug)"):
+            st.code(job.erro)
+    elif job.status == 'cancelado':
+        st.info("Processamento cancelado. Os dados anteriores foram mantidos.")
+
+def _show_weekly_report_download(df, ano, semana, responsavel):
+    """Botão na sidebar para baixar o Relatório Semanal da semana e responsável selecionados"""
+    st.sidebar.markdown("---")
+    # Gerado só no clique, em outra thread, sem refazer a página
+    st.sidebar.download_button(
+        "📑 Relatório Semanal (Excel)",
+        data=partial(weekly_report_bytes, df, ano, semana, responsavel),
+        file_name=report_file_name(ano, semana, responsavel),
+        mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+        on_click="ignore",
+        use_container_width=True,
+        help="Métricas, programados/extras, distribuições e SLA violado em uma planilha"
+    )
 
 def _show_data_management_sidebar():
     """Mostra opções de gerenciamento de dados na sidebar"""
     st.sidebar.markdown("---")
     st.sidebar.subheader("🔧 Gerenciar Dados")
     
+    # Atualizar dados sem tirar o dashboard do ar
+    with st.sidebar.expander("📤 Atualizar com novos arquivos"):
+        uploaded_req = st.file_uploader("Relatório de Requisições.xlsx", type=['xlsx'], 
+                                        key="sidebar_upload_req")
+        uploaded_minha = st.file_uploader("Requisições da Minha Equipe.xlsx", type=['xlsx'], 
+                                          key="sidebar_upload_minha")
+        if uploaded_req is not None and uploaded_minha is not None:
+            if st.button("🚀 Processar em segundo plano", use_container_width=True):
+                _process_uploaded_files(uploaded_req, uploaded_minha)
+    
+    _show_drop_folder_status()
+    
     if st.sidebar.button("🗑️ Limpar dados e recarregar"):
         _clear_data_cache()
         st.rerun()
     
     st.sidebar.caption("Use para carregar novos arquivos")
 
+def _show_drop_folder_status():
+    """Situação da pasta monitorada na sidebar (se configurada)"""
+    watcher = _get_drop_watcher()
+    if watcher is None:
+        return
+    st.sidebar.caption(f"📂 Pasta monitorada: {watcher.pasta}")
+    ultimo = watcher.ultimo
+    if watcher.running:
+        st.sidebar.caption("🔄 Processando nova exportação... (os dados atuais continuam disponíveis)")
+    elif ultimo is not None and ultimo.status == 'concluido':
+        st.sidebar.caption(f"Última atualização automática: {datetime.fromtimestamp(ultimo.fim).strftime('%d/%m %H:%M')} "
+                           f"({ultimo.linhas:,} chamados)")
+    elif ultimo is not None and ultimo.status == 'erro':
+        st.sidebar.caption("⚠️ A última exportação da pasta falhou e foi movida para com_erro/")
+
 def _clear_data_cache():
     """Limpa cache de dados"""
     if 'data_processed' in st.session_state:
         del st.session_state.data_processed
     
     # Remover arquivo parquet se existir
-    if os.path.exists("requisicoes_data.parquet"):
-        os.remove("requisicoes_data.parquet")
+    if os.path.exists(DATA_PATH):
+        os.remove(DATA_PATH)
     
     # Limpar cache do streamlit
     st.cache_data.clear()
@@ -0,0 +1,179 @@
+"""Backlog diário por responsável e categoria de status em todo o histórico.
+
+Cada chamado gera dois eventos: +1 no dia da abertura e -1 no dia do fechamento
+(DATA_RESOLUCAO, ou DATA_FECHAMENTO quando não houver). Os eventos são contados por
+(responsável, categoria) e dia em uma matriz, e a soma acumulada ao longo dos dias dá o
+backlog ao fim de cada dia. Depois disso, o backlog em qualquer data é uma leitura direta
+da matriz.
+
+A categoria é a atual do chamado (STATUS_CATEGORIA): no passado, os chamados que hoje
+estão resolvidos/fechados aparecem nas categorias RESOLVIDO/FECHADO. Chamados finalizados
+sem data de fechamento (ex.: cancelados) ficam de fora, pois não há como saber até quando
+estiveram abertos.
+"""
+import copy
+import threading
+import numpy as np
+import pandas as pd
+
+STATUS_FINALIZADOS = ['Resolvido', 'Fechado', 'Cancelado']
+
+class BacklogTimeline:
+    """Matriz de backlog diário (grupo x dia) com atualização incremental"""
+
+    def __init__(self, df):
+        self.grupos = pd.MultiIndex.from_arrays([[], []], names=['RESPONSAVEL', 'STATUS_CATEGORIA'])
+        self.inicio = None
+        self.eventos = np.zeros((0, 0), dtype='int32')
+        self.backlog = np.zeros((0, 0), dtype='int32')
+        self._linhas_cache = {}
+        self.refresh(df)
+
+    @property
+    def dias(self):
+        return pd.date_range(self.inicio, periods=self.backlog.shape[1], freq='D', name='Data')
+
+    def refresh(self, df):
+        """Atualiza com os dados de uma nova ingestão; retorna o primeiro dia recalculado (None se nada mudou)
+
+        A soma acumulada só é refeita a partir do primeiro dia em que os eventos mudaram.
+        """
+        grupos, inicio, eventos = daily_events(df)
+        self._linhas_cache = {}
+        if self.inicio is None or inicio is None:
+            self.grupos, self.inicio, self.eventos = grupos, inicio, eventos
+            self.backlog = np.cumsum(eventos, axis=1, dtype='int32')
+            return self.inicio
+
+        # Mesmos grupos e mesmo intervalo de dias para a matriz anterior e a nova
+        todos = self.grupos.union(grupos)
+        novo_inicio = min(self.inicio, inicio)
+        fim = max(self.inicio + pd.Timedelta(days=self.eventos.shape[1]),
+                  inicio + pd.Timedelta(days=eventos.shape[1]))
+        eventos_novos = _realinhar(eventos, grupos, inicio, todos, novo_inicio, fim)
+        eventos_antes = _realinhar(self.eventos, self.grupos, self.inicio, todos, novo_inicio, fim)
+        backlog = _realinhar(self.backlog, self.grupos, self.inicio, todos, novo_inicio, fim, manter_final=True)
+
+        alterados = (eventos_novos != eventos_antes).any(axis=0)
+        primeiro = None
+        if alterados.any():
+            k = int(alterados.argmax())
+            base = backlog[:, k - 1:k] if k > 0 else 0
+            backlog[:, k:] = base + np.cumsum(eventos_novos[:, k:], axis=1, dtype='int32')
+            primeiro = novo_inicio + pd.Timedelta(days=k)
+
+        # Fica só com os grupos e dias dos dados novos (os demais zeraram no recálculo)
+        deslocamento = (inicio - novo_inicio).days
+        self.grupos, self.inicio, self.eventos = grupos, inicio, eventos
+        self.backlog = backlog[todos.get_indexer(grupos), deslocamento:deslocamento + eventos.shape[1]]
+        return primeiro
+
+    def _linhas(self, responsavel=None, categoria=None):
+        """Posições dos grupos do responsável/categoria (guardadas até o próximo refresh)"""
+        chave = (None if responsavel == 'Todos' else responsavel, categoria)
+        linhas = self._linhas_cache.get(chave)
+        if linhas is None:
+            selecionados = np.ones(len(self.grupos), dtype=bool)
+            if chave[0] is not None:
+                selecionados &= self.grupos.get_level_values('RESPONSAVEL') == chave[0]
+            if categoria is not None:
+                selecionados &= self.grupos.get_level_values('STATUS_CATEGORIA') == categoria
+            linhas = self._linhas_cache[chave] = np.flatnonzero(selecionados)
+        return linhas
+
+    def at(self, data, responsavel=None, categoria=None):
+        """Backlog ao fim do dia `data` (sem responsável/categoria, soma todos os grupos)"""
+        if self.inicio is None:
+            return 0
+        dia = (pd.Timestamp(data).normalize() - self.inicio).days
+        if dia < 0:
+            return 0
+        coluna = self.backlog[:, min(dia, self.backlog.shape[1] - 1)]
+        return int(coluna[self._linhas(responsavel, categoria)].sum())
+
+    def series(self, responsavel=None):
+        """Backlog diário por categoria (colunas) de um responsável ou de todos"""
+        if self.inicio is None:
+            return pd.DataFrame(index=pd.DatetimeIndex([], name='Data'), dtype='int64')
+        linhas = self._linhas(responsavel)
+        categorias = self.grupos.get_level_values('STATUS_CATEGORIA')[linhas]
+        por_categoria = pd.DataFrame(self.backlog[linhas], index=categorias).groupby(level=0).sum()
+        return por_categoria.T.set_axis(self.dias, axis=0).rename_axis(columns=None)
+
+def daily_events(df):
+    """Grupos (responsável, categoria), primeiro dia e matriz de eventos líquidos (aberturas - fechamentos) por dia"""
+    abertura = df['DATA_ABERTURA'].dt.normalize()
+    fechamento = df['DATA_RESOLUCAO']
+    if 'DATA_FECHAMENTO' in df.columns:
+        fechamento = fechamento.fillna(df['DATA_FECHAMENTO'])
+    finalizado = df['STATUS'].isin(STATUS_FINALIZADOS).to_numpy()
+    # Fechamento só conta para finalizados e nunca antes da abertura
+    fechamento = fechamento.dt.normalize().where(finalizado)
+    fechamento = fechamento.where(fechamento.isna() | (fechamento >= abertura), abertura)
+
+    validos = (abertura.notna() & ~(finalizado & fechamento.isna())).to_numpy()
+    if not validos.any():
+        return pd.MultiIndex.from_arrays([[], []], names=['RESPONSAVEL', 'STATUS_CATEGORIA']), None, \
+            np.zeros((0, 0), dtype='int32')
+
+    abertura = abertura[validos]
+    fechamento = fechamento[validos]
+    # Códigos de cada nível combinados em um só (sem montar tuplas por linha)
+    cod_resp, responsaveis = pd.factorize(df['RESPONSAVEL'][validos].astype('str').fillna('Sem Responsável'), sort=True)
+    cod_cat, categorias = pd.factorize(df['STATUS_CATEGORIA'][validos], sort=True)
+    presentes, codigos = np.unique(cod_resp * len(categorias) + cod_cat, return_inverse=True)
+    grupos = pd.MultiIndex.from_arrays(
+        [responsaveis[presentes // len(categorias)], categorias[presentes % len(categorias)]],
+        names=['RESPONSAVEL', 'STATUS_CATEGORIA'])
+
+    inicio = abertura.min()
+    ultimo = max(abertura.max(), fechamento.max()) if fechamento.notna().any() else abertura.max()
+    n_dias = (ultimo - inicio).days + 1
+    dia_abertura = (abertura - inicio).dt.days.to_numpy()
+    fechado = fechamento.notna().to_numpy()
+    dia_fechamento = (fechamento[fechado] - inicio).dt.days.to_numpy()
+
+    # Contagem por (grupo, dia) em vetores planos: grupo * n_dias + dia
+    tamanho = len(grupos) * n_dias
+    eventos = (np.bincount(codigos * n_dias + dia_abertura, minlength=tamanho)
+               - np.bincount(codigos[fechado] * n_dias + dia_fechamento, minlength=tamanho))
+    return grupos, inicio, eventos.reshape(len(grupos), n_dias).astype('int32')
+
+def _realinhar(matriz, grupos, inicio, todos, novo_inicio, fim, manter_final=False):
+    """Coloca a matriz nos grupos `todos` e dias [novo_inicio, fim); com manter_final, repete a última coluna à direita"""
+    n_dias = (fim - novo_inicio).days
+    saida = np.zeros((len(todos), n_dias), dtype='int32')
+    if matriz.size == 0:
+        return saida
+    linhas = todos.get_indexer(grupos)
+    deslocamento = (inicio - novo_inicio).days
+    saida[linhas, deslocamento:deslocamento + matriz.shape[1]] = matriz
+    if manter_final:
+        saida[linhas, deslocamento + matriz.shape[1]:] = matriz[:, -1:]
+    return saida
+
+# Equipe (df.attrs['equipe']) -> {'versao', 'linha_do_tempo', 'lock'}
+_timeline = {}
+_lock = threading.Lock()
+
+def get_timeline(df, versao=None):
+    """Linha do tempo do backlog compartilhada pelo processo, uma por equipe
+
+    Com a mesma `versao` dos dados, reaproveita a matriz; com outra (nova ingestão),
+    atualiza a matriz existente de forma incremental. Sem versão, sempre atualiza.
+    """
+    with _lock:
+        estado = _timeline.setdefault(df.attrs.get('equipe'), {'versao': None, 'linha_do_tempo': None,
+                                                               'lock': threading.Lock()})
+    with estado['lock']:
+        linha_do_tempo = estado['linha_do_tempo']
+        if linha_do_tempo is not None and versao is not None and versao == estado['versao']:
+            return linha_do_tempo
+        if linha_do_tempo is None:
+            linha_do_tempo = BacklogTimeline(df)
+        else:
+            # Outras sessões podem estar lendo a matriz atual: atualiza uma cópia
+            linha_do_tempo = copy.copy(linha_do_tempo)
+            linha_do_tempo.refresh(df)
+        estado.update(versao=versao, linha_do_tempo=linha_do_tempo)
+        return linha_do_tempo
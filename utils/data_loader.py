@@ -1,19 +1,49 @@
-import streamlit as st
-import pandas as pd
+import logging
+import threading
 import os
+from utils.store import DATA_PATH, dataset_version, read_team_dataset, upgrade_ticket_dataset
+from utils import perf
 
-@st.cache_data
-def load_data():
-    """Carrega dados do arquivo parquet processado"""
+logger = logging.getLogger(__name__)
+
+def load_data(path=DATA_PATH, equipe=None):
+    """Carrega dados do arquivo parquet processado (só os da equipe, se informada)"""
     try:
         # Tentar carregar parquet existente
-        if os.path.exists("requisicoes_data.parquet"):
-            df = pd.read_parquet("requisicoes_data.parquet")
+        if os.path.exists(path):
+            # Arquivo de formato antigo: regravado uma vez com os tipos do esquema (utils.schema)
+            upgrade_ticket_dataset(path)
+            versao = dataset_version(path)
+            df = read_team_dataset(path, equipe)
+            # Versão e equipe lidas junto com os dados (usadas por caches derivados, como o backlog diário)
+            df.attrs['versao'] = versao
+            df.attrs['equipe'] = equipe
             return df
         else:
-            st.error("Arquivo de dados não encontrado. Faça upload dos arquivos primeiro.")
+            logger.error("Arquivo de dados não encontrado (%s). Faça upload dos arquivos primeiro.", path)
             return None
         
     except Exception as e:
-        st.error(f"Erro ao carregar dados: {str(e)}")
-        return None
\ No newline at end of file
+        logger.error("Erro ao carregar dados: %s", e)
+        return None
+
+# Estado por (arquivo, equipe): cada equipe tem os seus dados e o seu lock
+_carregado = {}
+_lock = threading.Lock()
+
+def get_team_data(equipe=None, path=DATA_PATH):
+    """Dados da equipe compartilhados pelo processo, relidos só quando a versão do parquet muda
+
+    A versão (utils.store.dataset_version) muda a cada gravação, inclusive pela pasta monitorada
+    (utils.drop_folder): a próxima chamada de qualquer sessão já traz os dados novos, sem limpar caches.
+    """
+    versao = dataset_version(path)
+    with _lock:
+        estado = _carregado.setdefault((path, equipe), {'versao': None, 'df': None, 'lock': threading.Lock()})
+    with estado['lock']:
+        if versao is None or estado['versao'] != versao:
+            perf.count("cache:load_data:miss")
+            df = load_data(path, equipe)
+            # Versão lida junto com os dados; se o arquivo mudou no meio, a próxima chamada relê
+            estado.update(versao=None if df is None else df.attrs['versao'], df=df)
+        return estado['df']
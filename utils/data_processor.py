@@ -1,6 +1,37 @@
+import logging
+import threading
+import numpy as np
 import pandas as pd
-import streamlit as st
 from datetime import datetime
+from utils import perf
+
+logger = logging.getLogger(__name__)
+
+STATUS_FINALIZADOS = ['Resolvido', 'Fechado', 'Cancelado']
+
+# Colunas que dependem da data de referência ("hoje"): recalculadas quando o dia muda
+COLUNAS_DATA = ['DATA_ALVO', 'DATA_ALVO_DATE', 'SEMANA_ALVO', 'ANO_ALVO', 'SHOULD_VIBRATE', 'CONTADOR_DIAS']
+
+# Colunas aceitas como data alvo, em ordem de prioridade
+POSSIBLE_DATE_COLS = ['DATA_ALVO', 'DATA_PREV_SOLUCAO', 'DATA_LIMITE_SLA']
+
+# Status reais -> categoria, cor e ícone
+STATUS_MAPPING = {
+    'Resolvido': {'categoria': 'RESOLVIDO', 'cor': '#28a745', 'icone': '✅'},
+    'Fechado': {'categoria': 'FECHADO', 'cor': '#17a2b8', 'icone': '🔒'},
+    'Cancelado': {'categoria': 'CANCELADO', 'cor': '#dc3545', 'icone': '❌'},
+    'Em Andamento': {'categoria': 'EM_ANDAMENTO', 'cor': '#007bff', 'icone': '🔄'},
+    'Designado': {'categoria': 'DESIGNADO', 'cor': '#6f42c1', 'icone': '👤'},
+    'Pausa Equipe SCADA': {'categoria': 'PAUSA', 'cor': '#fd7e14', 'icone': '⏸️'},
+    'Pendente Agendamento': {'categoria': 'PENDENTE', 'cor': '#ffc107', 'icone': '📅'},
+    'Pendente Aprovação': {'categoria': 'PENDENTE', 'cor': '#ffc107', 'icone': '📋'},
+    'Pendente Fornecedor': {'categoria': 'PENDENTE', 'cor': '#ffc107', 'icone': '🏢'},
+    'Pendente Tarefa de TI': {'categoria': 'PENDENTE', 'cor': '#ffc107', 'icone': '💻'},
+    'Pendente Usuário': {'categoria': 'PENDENTE', 'cor': '#ffc107', 'icone': '👥'}
+}
+
+# Status fora do mapeamento (ou vazio)
+STATUS_OUTROS = {'categoria': 'OUTROS', 'cor': '#6c757d', 'icone': '❓'}
 
 def get_display_status(status):
     """Padroniza nomes de status apenas para exibição nos cards"""
@@ -13,122 +44,67 @@ def get_display_status(status):
     }
     return status_display_map.get(status, status)
 
-def prepare_data_with_real_status(df):
-    """Preparação dos dados com os status reais do sistema - usando DATA_ALVO"""
+def find_data_alvo_column(df):
+    """Retorna a coluna usada como data alvo (ou None se nenhuma existir)"""
+    for col in POSSIBLE_DATE_COLS:
+        if col in df.columns:
+            return col
+    return None
+
+def prepare_data_with_real_status(df, data_referencia=None):
+    """Preparação dos dados com os status reais do sistema - usando DATA_ALVO
+
+    `data_referencia` é o "hoje" das colunas que dependem da data (padrão: a data atual).
+    """
+    base = _prepare_static(df)
+    if base is None:
+        return df
+    hoje = _reference_day(data_referencia)
+    preparado = _filter_valid_years(_with_date_columns(base, hoje), hoje)
+    # Dia de referência das COLUNAS_DATA, parte da versão dos caches derivados (prepared_version)
+    preparado.attrs['dia'] = hoje.date().isoformat()
+    return preparado
+
+def _reference_day(data_referencia=None):
+    return pd.Timestamp(data_referencia if data_referencia is not None else datetime.now()).normalize()
+
+def _prepare_static(df):
+    """Parte da preparação que não depende da data atual (None se não houver coluna de data alvo)"""
     
     # Verificar se temos uma coluna de data alvo disponível
-    data_alvo_col = None
-    possible_date_cols = ['DATA_ALVO', 'DATA_PREV_SOLUCAO', 'DATA_LIMITE_SLA']
-    
-    for col in possible_date_cols:
-        if col in df.columns:
-            data_alvo_col = col
-            break
+    data_alvo_col = find_data_alvo_column(df)
     
     if data_alvo_col is None:
-        st.error("⚠ Nenhuma coluna de data alvo encontrada!")
-        st.info("Colunas disponíveis: " + ", ".join(df.columns.tolist()))
-        return df
+        logger.error("Nenhuma coluna de data alvo encontrada. Colunas disponíveis: %s",
+                     ", ".join(df.columns.tolist()))
+        return None
     
     # Se não for DATA_ALVO, renomear
     if data_alvo_col != 'DATA_ALVO':
         df = df.rename(columns={data_alvo_col: 'DATA_ALVO'})
-        st.info(f"📅 Usando coluna '{data_alvo_col}' como DATA_ALVO")
+        logger.info("Usando coluna '%s' como DATA_ALVO", data_alvo_col)
     
-    # Converter datas
+    # Backend opcional: o mesmo resultado em um plano Polars (utils.polars_backend)
+    from utils import polars_backend
+    if polars_backend.enabled():
+        return polars_backend.prepare_static(df)
+    
+    # Converter datas (o parquet gravado com o esquema já traz datetime64: nada a converter)
     date_columns = ['DATA_ABERTURA', 'DATA_ALVO', 'DATA_RESOLUCAO', 'DATA_PREV_SOLUCAO']
     for col in date_columns:
-        if col in df.columns:
+        if col in df.columns and not pd.api.types.is_datetime64_any_dtype(df[col]):
             df[col] = pd.to_datetime(df[col], errors='coerce')
     
     # Filtrar apenas registros com DATA_ALVO válida
     df = df[df['DATA_ALVO'].notna()].copy()
     
-    # NOVA LÓGICA: Se Data Esperada existe e passou da Data Esperada, usar DATA_PREV_SOLUCAO como DATA_ALVO
-    hoje = datetime.now().date()
-    if 'Data Esperada' in df.columns:
+    if 'Data Esperada' in df.columns and not pd.api.types.is_datetime64_any_dtype(df['Data Esperada']):
         df['Data Esperada'] = pd.to_datetime(df['Data Esperada'], errors='coerce')
-        
-        # Se passou da Data Esperada, usar DATA_PREV_SOLUCAO
-        def ajustar_data_alvo(row):
-            if pd.notna(row.get('Data Esperada')):
-                data_esperada = row['Data Esperada'].date()
-                # Se hoje é depois da data esperada, retornar DATA_PREV_SOLUCAO
-                if hoje > data_esperada and pd.notna(row.get('DATA_PREV_SOLUCAO')):
-                    return row['DATA_PREV_SOLUCAO']
-            return row['DATA_ALVO']
-        
-        df['DATA_ALVO'] = df.apply(ajustar_data_alvo, axis=1)
-    
-    # Criar colunas auxiliares baseadas na DATA_ALVO
-    df['DATA_ALVO_DATE'] = df['DATA_ALVO'].dt.date
-    df['SEMANA_ALVO'] = df['DATA_ALVO'].dt.isocalendar().week
-    df['ANO_ALVO'] = df['DATA_ALVO'].dt.year
-    
-    def should_vibrate(row):
-        """Verifica se o card deve vibrar - apenas quando DATA_ALVO = DATA_PREV_SOLUCAO = DIA ATUAL e status em aberto"""
-        # Obter data atual
-        hoje = datetime.now().date()
-        
-        # Verificar se as datas são válidas
-        if pd.notna(row.get('DATA_PREV_SOLUCAO')) and pd.notna(row.get('DATA_ALVO')):
-            data_alvo = row['DATA_ALVO'].date()
-            data_prev = row['DATA_PREV_SOLUCAO'].date()
-            
-            # Verificar se DATA_ALVO = DATA_PREV_SOLUCAO = HOJE
-            dates_match_and_today = (data_alvo == data_prev == hoje)
-            
-            # Verificar se o status NÃO é finalizado (Resolvido, Fechado, Cancelado)
-            status_finalizados = ['Resolvido', 'Fechado', 'Cancelado']
-            status_atual = str(row.get('STATUS', '')).strip()
-            status_em_aberto = status_atual not in status_finalizados
-            
-            # Vibrar apenas se: DATA_ALVO = DATA_PREV_SOLUCAO = HOJE E status em aberto
-            return dates_match_and_today and status_em_aberto
-        return False
-    
-    df['SHOULD_VIBRATE'] = df.apply(should_vibrate, axis=1)
-    
-    def calcular_diferenca_dias(row):
-        if pd.notna(row.get('DATA_RESOLUCAO')) and row.get('STATUS') in ['Resolvido', 'Fechado']:
-            diferenca = (row['DATA_ALVO_DATE'] - row['DATA_RESOLUCAO'].date()).days
-            if diferenca > 0:
-                return f"+{diferenca}"  # Resolvido antes da data alvo (sobrou tempo)
-            elif diferenca < 0:
-                return f"{diferenca}"  # Resolvido depois da data alvo (atrasou)
-            else:
-                return "0"  # Resolvido na data exata
-        return ""
-    
-    df['CONTADOR_DIAS'] = df.apply(calcular_diferenca_dias, axis=1)
-    
-    # Filtrar anos válidos 
-    ano_atual = datetime.now().year
-    df = df[(df['ANO_ALVO'] >= 2020) & (df['ANO_ALVO'] <= ano_atual + 2)].copy()
-    
-    # Mapear status reais para categorias com cores
-    status_mapping = {
-        'Resolvido': {'categoria': 'RESOLVIDO', 'cor': '#28a745', 'icone': '✅'},
-        'Fechado': {'categoria': 'FECHADO', 'cor': '#17a2b8', 'icone': '🔒'},
-        'Cancelado': {'categoria': 'CANCELADO', 'cor': '#dc3545', 'icone': '❌'},
-        'Em Andamento': {'categoria': 'EM_ANDAMENTO', 'cor': '#007bff', 'icone': '🔄'},
-        'Designado': {'categoria': 'DESIGNADO', 'cor': '#6f42c1', 'icone': '👤'},
-        'Pausa Equipe SCADA': {'categoria': 'PAUSA', 'cor': '#fd7e14', 'icone': '⏸️'},
-        'Pendente Agendamento': {'categoria': 'PENDENTE', 'cor': '#ffc107', 'icone': '📅'},
-        'Pendente Aprovação': {'categoria': 'PENDENTE', 'cor': '#ffc107', 'icone': '📋'},
-        'Pendente Fornecedor': {'categoria': 'PENDENTE', 'cor': '#ffc107', 'icone': '🏢'},
-        'Pendente Tarefa de TI': {'categoria': 'PENDENTE', 'cor': '#ffc107', 'icone': '💻'},
-        'Pendente Usuário': {'categoria': 'PENDENTE', 'cor': '#ffc107', 'icone': '👥'}
-    }
     
     # Aplicar mapeamento
     def get_status_info(status):
         status_clean = str(status).strip() if pd.notna(status) else 'Desconhecido'
-        info = status_mapping.get(status_clean, {
-            'categoria': 'OUTROS', 
-            'cor': '#6c757d', 
-            'icone': '❓'
-        })
+        info = STATUS_MAPPING.get(status_clean, STATUS_OUTROS)
         return info
     
     df['STATUS_CATEGORIA'] = df['STATUS'].apply(lambda x: get_status_info(x)['categoria'])
@@ -141,4 +117,138 @@ def prepare_data_with_real_status(df):
     else:
         df['SLA_VIOLADO'] = False
     
-    return df
\ No newline at end of file
+    return df
+
+def _date_columns(df, alvo_base, hoje):
+    """Colunas que dependem de `hoje` (COLUNAS_DATA) para as linhas de `df`"""
+    # Se passou da Data Esperada, usar DATA_PREV_SOLUCAO como DATA_ALVO
+    data_alvo = alvo_base
+    if 'Data Esperada' in df.columns and 'DATA_PREV_SOLUCAO' in df.columns:
+        passou = (df['Data Esperada'].notna() & (df['Data Esperada'].dt.normalize() < hoje)
+                  & df['DATA_PREV_SOLUCAO'].notna())
+        data_alvo = alvo_base.mask(passou, df['DATA_PREV_SOLUCAO'])
+    
+    colunas = pd.DataFrame({
+        'DATA_ALVO': data_alvo,
+        'DATA_ALVO_DATE': data_alvo.dt.date,
+        'SEMANA_ALVO': data_alvo.dt.isocalendar().week,
+        'ANO_ALVO': data_alvo.dt.year,
+    }, index=df.index)
+    
+    # Vibrar apenas se: DATA_ALVO = DATA_PREV_SOLUCAO = HOJE e status em aberto (Resolvido, Fechado e Cancelado não vibram)
+    em_aberto = ~df['STATUS'].astype(str).fillna('').str.strip().isin(STATUS_FINALIZADOS)
+    if 'DATA_PREV_SOLUCAO' in df.columns:
+        colunas['SHOULD_VIBRATE'] = ((data_alvo.dt.normalize() == hoje)
+                                     & (df['DATA_PREV_SOLUCAO'].dt.normalize() == hoje) & em_aberto)
+    else:
+        colunas['SHOULD_VIBRATE'] = False
+    
+    # CONTADOR_DIAS: "+N" resolvido antes da data alvo (sobrou tempo), "-N" depois (atrasou), "0" na data exata
+    contador = pd.Series("", index=df.index)
+    if 'DATA_RESOLUCAO' in df.columns:
+        resolvidos = df['DATA_RESOLUCAO'].notna() & df['STATUS'].isin(['Resolvido', 'Fechado'])
+        dias = (data_alvo[resolvidos].dt.normalize() - df.loc[resolvidos, 'DATA_RESOLUCAO'].dt.normalize()).dt.days
+        contador[resolvidos] = dias.map(lambda diferenca: f"+{diferenca}" if diferenca > 0 else f"{diferenca}")
+    colunas['CONTADOR_DIAS'] = contador
+    return colunas[COLUNAS_DATA]
+
+def _with_date_columns(base, hoje):
+    """Acrescenta as colunas dependentes da data à parte estática (na mesma ordem de antes, antes de STATUS_CATEGORIA)"""
+    colunas = _date_columns(base, base['DATA_ALVO'], hoje)
+    posicao = base.columns.get_loc('STATUS_CATEGORIA')
+    ordem = (list(base.columns[:posicao]) + [coluna for coluna in COLUNAS_DATA if coluna not in base.columns]
+             + list(base.columns[posicao:]))
+    return base.assign(**{coluna: colunas[coluna] for coluna in COLUNAS_DATA})[ordem]
+
+def _filter_valid_years(df, hoje):
+    """Filtrar anos válidos"""
+    validos = (df['ANO_ALVO'] >= 2020) & (df['ANO_ALVO'] <= hoje.year + 2)
+    return df if validos.all() else df[validos].copy()
+
+def _can_swap_data_alvo(df):
+    """Linhas em que a DATA_ALVO pode virar DATA_PREV_SOLUCAO quando a Data Esperada passar"""
+    if 'Data Esperada' not in df.columns or 'DATA_PREV_SOLUCAO' not in df.columns:
+        return np.zeros(len(df), dtype=bool)
+    return (df['Data Esperada'].notna() & df['DATA_PREV_SOLUCAO'].notna()).to_numpy()
+
+def _refresh_date_columns(completo, alvo_base, dia_anterior, hoje):
+    """Recalcula COLUNAS_DATA só nas linhas afetadas pela troca de `dia_anterior` para `hoje`"""
+    afetados = np.zeros(len(completo), dtype=bool)
+    if 'DATA_PREV_SOLUCAO' in completo.columns:
+        previsao = completo['DATA_PREV_SOLUCAO'].dt.normalize()
+        # Vibravam no dia anterior ou podem vibrar hoje
+        afetados |= ((previsao == dia_anterior) | (previsao == hoje)).to_numpy()
+        if 'Data Esperada' in completo.columns:
+            # Data Esperada entre os dois dias: a DATA_ALVO troca (nos dois sentidos)
+            esperada = completo['Data Esperada'].dt.normalize()
+            afetados |= (esperada.between(min(dia_anterior, hoje), max(dia_anterior, hoje), inclusive='left')
+                         & previsao.notna()).to_numpy()
+    perf.count('preparo:linhas_recalculadas', int(afetados.sum()))
+    if not afetados.any():
+        return completo
+    
+    # DATA_ALVO original (antes da troca pela Data Esperada) das linhas afetadas
+    posicoes = np.flatnonzero(afetados)
+    alvo = completo['DATA_ALVO'].to_numpy()[posicoes].copy()
+    posicoes_base, valores_base = alvo_base
+    na_base = np.isin(posicoes, posicoes_base)
+    alvo[na_base] = valores_base[np.searchsorted(posicoes_base, posicoes[na_base])]
+    
+    linhas = completo.iloc[posicoes]
+    colunas = _date_columns(linhas, pd.Series(alvo, index=linhas.index), hoje)
+    # Cópia rasa: o quadro anterior continua válido para quem ainda o estiver lendo
+    novo = completo.copy(deep=False)
+    for coluna in COLUNAS_DATA:
+        serie = novo[coluna].copy()
+        serie.iloc[posicoes] = colunas[coluna].to_numpy()
+        novo[coluna] = serie
+    return novo
+
+# Estado por equipe (df.attrs['equipe']): cada equipe tem o seu cache e o seu lock
+_preparado = {}
+_lock = threading.Lock()
+
+def get_prepared_data(df, data_referencia=None):
+    """Dados preparados compartilhados pelo processo, por equipe e versão dos dados (df.attrs['versao'])
+
+    A parte estática é feita uma vez por versão. Quando o dia muda, só as linhas cuja
+    Data Esperada ou DATA_PREV_SOLUCAO cruzou o dia são recalculadas. Sem versão, prepara tudo.
+    """
+    hoje = _reference_day(data_referencia)
+    versao = df.attrs.get('versao')
+    if versao is None:
+        return prepare_data_with_real_status(df, hoje)
+    
+    perf.count("cache:preparo:chamada")
+    with _lock:
+        estado = _preparado.setdefault(df.attrs.get('equipe'), {'versao': None, 'dia': None, 'completo': None,
+                                                                'alvo_base': None, 'resultado': None,
+                                                                'lock': threading.Lock()})
+    # Uma equipe preparando os dados não bloqueia as demais
+    with estado['lock']:
+        if estado['versao'] != versao:
+            perf.count("cache:preparo:miss")
+            base = _prepare_static(df)
+            if base is None:
+                return df
+            elegiveis = _can_swap_data_alvo(base)
+            estado.update(versao=versao, dia=hoje, completo=_with_date_columns(base, hoje),
+                          alvo_base=(np.flatnonzero(elegiveis), base['DATA_ALVO'].to_numpy()[elegiveis]),
+                          resultado=None)
+        elif estado['dia'] != hoje:
+            estado['completo'] = _refresh_date_columns(estado['completo'], estado['alvo_base'], estado['dia'], hoje)
+            estado.update(dia=hoje, resultado=None)
+        if estado['resultado'] is None:
+            estado['resultado'] = _filter_valid_years(estado['completo'], hoje)
+            estado['resultado'].attrs['dia'] = hoje.date().isoformat()
+        return estado['resultado']
+
+def prepared_version(df):
+    """Versão dos dados preparados: versão do parquet e dia de referência das COLUNAS_DATA (None sem versão)
+
+    Caches de agregações que usam as COLUNAS_DATA (ex.: semana alvo) precisam das duas partes: quando
+    o dia muda, get_prepared_data recalcula essas colunas sem mudar a versão do parquet.
+    """
+    versao = df.attrs.get('versao')
+    return None if versao is None else (versao, df.attrs.get('dia'))
+
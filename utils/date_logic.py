@@ -1,4 +1,5 @@
 import pandas as pd
+from datetime import datetime, timedelta
 
 def get_display_date(row):
     """
@@ -13,4 +14,60 @@ def get_display_date(row):
     if status_clean in ['resolvido', 'fechado'] and pd.notna(row.get('DATA_RESOLUCAO')):
         return row['DATA_RESOLUCAO'].date()
     else:
-        return row['DATA_ALVO_DATE']
\ No newline at end of file
+        return row['DATA_ALVO_DATE']
+
+def get_kanban_display_date(row):
+    """Determina em que data o chamado deve aparecer no Kanban"""
+    # ✅ CORREÇÃO V3: Priorizar DATA_ALVO se existir, pois representa quando o chamado foi planejado
+    # Só usar DATA_RESOLUCAO se DATA_ALVO não existir
+    
+    if pd.notna(row.get('DATA_ALVO_DATE')):
+        return row['DATA_ALVO_DATE']
+    
+    # Fallback: se não tiver DATA_ALVO, usar DATA_RESOLUCAO
+    status_clean = str(row.get('STATUS', '')).strip()
+    if status_clean.lower() in ['resolvido', 'fechado'] and pd.notna(row.get('DATA_RESOLUCAO')):
+        return row['DATA_RESOLUCAO'].date()
+    
+    return None
+
+def compute_display_dates(df):
+    """Versão vetorizada de get_display_date para o DataFrame inteiro"""
+    finalizado = _finalizado_com_resolucao(df)
+    return df['DATA_ALVO_DATE'].where(~finalizado, df['DATA_RESOLUCAO'].dt.date)
+
+def compute_kanban_display_dates(df):
+    """Versão vetorizada de get_kanban_display_date para o DataFrame inteiro"""
+    finalizado = _finalizado_com_resolucao(df)
+    fallback = df['DATA_RESOLUCAO'].dt.date.where(finalizado, None)
+    return df['DATA_ALVO_DATE'].where(df['DATA_ALVO_DATE'].notna(), fallback)
+
+def _finalizado_com_resolucao(df):
+    """Chamados Resolvidos/Fechados que possuem DATA_RESOLUCAO"""
+    status_clean = df['STATUS'].astype(str).str.strip().str.lower()
+    return status_clean.isin(['resolvido', 'fechado']) & df['DATA_RESOLUCAO'].notna()
+
+def get_week_dates(year, week):
+    """Obtém as datas da semana específica"""
+    try:
+        # Criar data do primeiro dia do ano
+        jan_1 = datetime(year, 1, 1)
+        
+        # Encontrar a primeira segunda-feira da semana 1 ISO
+        days_since_monday = jan_1.weekday()
+        days_to_first_monday = -days_since_monday if days_since_monday != 0 else 0
+        
+        first_monday = jan_1 + timedelta(days=days_to_first_monday)
+        week_start = first_monday + timedelta(weeks=week-1)
+        
+        week_dates = []
+        for i in range(7):
+            current_date = week_start + timedelta(days=i)
+            week_dates.append(current_date.date())
+        
+        return week_dates
+    except:
+        # Fallback para a semana atual
+        today = datetime.now().date()
+        week_start = today - timedelta(days=today.weekday())
+        return [week_start + timedelta(days=i) for i in range(7)]
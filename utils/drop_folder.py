@@ -0,0 +1,228 @@
+"""Pasta monitorada: processa sozinha as exportações deixadas nela.
+
+Quando um "Relatório de Requisições*.xlsx" e/ou um "Requisições da Minha Equipe*.xlsx" novos
+aparecem na pasta e param de mudar (a cópia terminou), o processamento completo
+(utils.ingest_job.IngestJob) roda em outro processo e troca o parquet de forma atômica. A nova
+versão do arquivo (utils.store.dataset_version) é o que as sessões abertas comparam para
+recarregar os dados na próxima interação (utils.data_loader.get_team_data).
+
+As exportações são retratos completos; o que dá para evitar é refazer o que não mudou: uma
+planilha sozinha é processada com a última cópia processada da outra (em processados/), e
+planilhas com o mesmo conteúdo da versão gravada não são processadas de novo.
+"""
+import hashlib
+import json
+import logging
+import os
+import threading
+import unicodedata
+from datetime import datetime
+from config.settings import PASTA_ENTRADA_INTERVALO
+from utils.ingest import describe_key_report
+from utils.ingest_job import IngestJob, claim_ingest, release_ingest
+from utils.store import DATA_PATH, HISTORY_PATH, dataset_version
+from utils import telemetry
+
+logger = logging.getLogger(__name__)
+
+# Tipo da planilha -> início do nome do arquivo exportado (também o nome da cópia em processados/)
+EXPORTACOES = {
+    'req': "Relatório de Requisições",
+    'minha': "Requisições da Minha Equipe",
+}
+
+# Subpastas: últimas planilhas processadas e planilhas que falharam
+PASTA_PROCESSADOS = "processados"
+PASTA_ERROS = "com_erro"
+
+# Conteúdo das planilhas e versão do parquet da última ingestão (dentro de processados/)
+ARQUIVO_ESTADO = "ultima_ingestao.json"
+
+def _normalizar(nome):
+    """Nome comparável (acentos na mesma forma Unicode, sem diferença de maiúsculas)"""
+    return unicodedata.normalize('NFC', nome).casefold()
+
+def find_exports(pasta):
+    """Exportação mais recente de cada tipo na pasta ({'req': caminho, 'minha': caminho})"""
+    try:
+        entradas = list(os.scandir(pasta))
+    except FileNotFoundError:
+        return {}
+    encontrados = {}
+    for entrada in entradas:
+        nome = _normalizar(entrada.name)
+        # Arquivos temporários do Excel (~$...) e ocultos ficam de fora
+        if not entrada.is_file() or not nome.endswith('.xlsx') or nome.startswith(('~$', '.')):
+            continue
+        for tipo, prefixo in EXPORTACOES.items():
+            if nome.startswith(_normalizar(prefixo)):
+                modificado = entrada.stat().st_mtime_ns
+                if tipo not in encontrados or modificado > encontrados[tipo][0]:
+                    encontrados[tipo] = (modificado, entrada.path)
+    return {tipo: encontrados[tipo][1] for tipo in EXPORTACOES if tipo in encontrados}
+
+def file_fingerprint(caminho):
+    """SHA-256 do conteúdo do arquivo"""
+    resumo = hashlib.sha256()
+    with open(caminho, 'rb') as arquivo:
+        for bloco in iter(lambda: arquivo.read(1 << 20), b''):
+            resumo.update(bloco)
+    return resumo.hexdigest()
+
+class DropFolderWatcher:
+    """Verifica a pasta em uma thread e processa as exportações novas, uma ingestão por vez"""
+
+    def __init__(self, pasta, destino=DATA_PATH, historico=HISTORY_PATH, intervalo=PASTA_ENTRADA_INTERVALO):
+        self.pasta = pasta
+        self.destino = destino
+        self.historico = historico
+        self.intervalo = intervalo
+        self.processados = os.path.join(pasta, PASTA_PROCESSADOS)
+        self.job = None
+        # Última ingestão finalizada (IngestJob), para mostrar no dashboard
+        self.ultimo = None
+        self._assinaturas = {}
+        self._aguardando = None
+        self._adiado = False
+        self._parar = threading.Event()
+        self._thread = None
+        os.makedirs(self.processados, exist_ok=True)
+
+    def start(self):
+        """Inicia a verificação periódica em segundo plano"""
+        self._thread = threading.Thread(target=self.run, name="pasta-monitorada", daemon=True)
+        self._thread.start()
+        return self
+
+    def run(self):
+        """Verifica a pasta a cada `intervalo` segundos até stop()"""
+        logger.info("Monitorando %s a cada %ss", self.pasta, self.intervalo)
+        while True:
+            try:
+                self.check()
+            except Exception:
+                logger.exception("Erro ao verificar a pasta monitorada %s", self.pasta)
+            if self._parar.wait(self.intervalo):
+                break
+
+    def stop(self, espera=None):
+        """Interrompe a verificação (uma ingestão em andamento é cancelada; o parquet atual fica intacto)"""
+        self._parar.set()
+        if self._thread is not None:
+            self._thread.join(espera)
+
+    @property
+    def running(self):
+        job = self.job
+        return job is not None and job.running
+
+    def check(self):
+        """Uma verificação da pasta; True se uma nova versão dos dados foi gravada"""
+        novos = self._ready(find_exports(self.pasta))
+        if not novos:
+            return False
+
+        # A planilha que não veio é a última processada
+        arquivos = {**self._processed_copies(), **novos}
+        if len(arquivos) < len(EXPORTACOES):
+            if self._aguardando != novos:
+                self._aguardando = novos
+                logger.info("Aguardando a outra planilha para processar %s", ", ".join(novos.values()))
+            return False
+        self._aguardando = None
+
+        digitais = {tipo: file_fingerprint(caminho) for tipo, caminho in arquivos.items()}
+        estado = self._read_state()
+        versao = dataset_version(self.destino)
+        if estado.get('digitais') == digitais and versao is not None and estado.get('versao') == list(versao):
+            logger.info("Planilhas iguais às da versão atual dos dados; nada a processar")
+            self._archive(novos)
+            return False
+
+        job = self._ingest(arquivos)
+        if job is None:
+            return False
+        if job.status == 'concluido':
+            self._archive(novos)
+            self._write_state({'digitais': digitais, 'versao': list(dataset_version(self.destino)),
+                               'linhas': job.linhas, 'quando': datetime.now().isoformat(timespec='seconds')})
+            return True
+        if job.status == 'erro':
+            # Fora da pasta para não tentar de novo a cada verificação
+            self._archive(novos, PASTA_ERROS)
+        return False
+
+    def _ready(self, encontrados):
+        """Planilhas encontradas, se nenhuma mudou desde a verificação anterior (cópia concluída); senão vazio"""
+        assinaturas = {}
+        for tipo, caminho in encontrados.items():
+            try:
+                info = os.stat(caminho)
+            except FileNotFoundError:
+                continue
+            assinaturas[tipo] = (caminho, info.st_size, info.st_mtime_ns)
+        estaveis = bool(assinaturas) and assinaturas == self._assinaturas
+        self._assinaturas = assinaturas
+        return {tipo: assinatura[0] for tipo, assinatura in assinaturas.items()} if estaveis else {}
+
+    def _ingest(self, arquivos):
+        """Executa o IngestJob até o fim (cancelado por stop()) e registra o resultado
+
+        None se outro processamento (ex.: um upload pelo dashboard) estiver em andamento: as planilhas
+        ficam na pasta e a próxima verificação tenta de novo.
+        """
+        job = IngestJob(arquivos['req'], arquivos['minha'], self.destino, historico=self.historico)
+        if not claim_ingest(job, 'pasta'):
+            if not self._adiado:
+                self._adiado = True
+                logger.info("Outro processamento em andamento; a pasta será processada depois dele")
+            return None
+        self._adiado = False
+        logger.info("Processando %s", ", ".join(arquivos.values()))
+        try:
+            self.job = job.start()
+            while job.poll() == 'executando':
+                if self._parar.wait(0.5):
+                    job.cancel()
+        finally:
+            release_ingest(job)
+        self.ultimo = job
+        telemetry.observe_ingest(job)
+        if job.status == 'concluido':
+            logger.info("Nova versão dos dados gravada em %s: %s chamados", self.destino, f"{job.linhas:,}")
+            for aviso in describe_key_report(job.relatorio_chaves):
+                logger.warning(aviso)
+        elif job.status == 'erro':
+            logger.error("Erro ao processar as planilhas da pasta monitorada: %s", job.erro)
+        return job
+
+    def _processed_copies(self):
+        """Últimas planilhas processadas de cada tipo"""
+        copias = {tipo: os.path.join(self.processados, f"{prefixo}.xlsx") for tipo, prefixo in EXPORTACOES.items()}
+        return {tipo: caminho for tipo, caminho in copias.items() if os.path.exists(caminho)}
+
+    def _archive(self, novos, subpasta=PASTA_PROCESSADOS):
+        """Tira as planilhas novas da pasta: viram as últimas processadas ou vão para com_erro/"""
+        destino = os.path.join(self.pasta, subpasta)
+        os.makedirs(destino, exist_ok=True)
+        carimbo = datetime.now().strftime('%Y%m%d_%H%M%S')
+        for tipo, caminho in novos.items():
+            if subpasta == PASTA_PROCESSADOS:
+                os.replace(caminho, os.path.join(destino, f"{EXPORTACOES[tipo]}.xlsx"))
+            else:
+                os.replace(caminho, os.path.join(destino, f"{carimbo} {os.path.basename(caminho)}"))
+        self._assinaturas = {}
+
+    def _read_state(self):
+        try:
+            with open(os.path.join(self.processados, ARQUIVO_ESTADO), encoding='utf-8') as arquivo:
+                return json.load(arquivo)
+        except (FileNotFoundError, ValueError):
+            return {}
+
+    def _write_state(self, estado):
+        caminho = os.path.join(self.processados, ARQUIVO_ESTADO)
+        tmp_path = f"{caminho}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as arquivo:
+            json.dump(estado, arquivo, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, caminho)
@@ -0,0 +1,78 @@
+"""Exportação de tabelas em CSV, Parquet e XLSX, gravadas em blocos de linhas.
+
+Cada formato é escrito bloco a bloco em um arquivo temporário (CSV em pedaços,
+Parquet com ParquetWriter e XLSX com o modo write_only do openpyxl), então nem a
+planilha formatada nem o texto completo ficam montados em memória.
+"""
+import tempfile
+import pandas as pd
+
+# Linhas convertidas por vez
+LINHAS_POR_BLOCO = 50_000
+
+# Formato -> (extensão, tipo MIME)
+FORMATOS = {
+    'csv': ('csv', 'text/csv'),
+    'parquet': ('parquet', 'application/vnd.apache.parquet'),
+    'xlsx': ('xlsx', 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'),
+}
+
+def iter_chunks(df, tamanho=LINHAS_POR_BLOCO):
+    for inicio in range(0, len(df), tamanho):
+        yield df.iloc[inicio:inicio + tamanho]
+
+def write_csv(df, destino):
+    """Grava CSV (UTF-8) bloco a bloco em um arquivo binário"""
+    if len(df) == 0:
+        destino.write(df.to_csv(index=False).encode('utf-8'))
+    for i, bloco in enumerate(iter_chunks(df)):
+        destino.write(bloco.to_csv(index=False, header=(i == 0)).encode('utf-8'))
+
+def write_parquet(df, destino):
+    """Grava Parquet com um row group por bloco"""
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    schema = pa.Schema.from_pandas(df, preserve_index=False)
+    with pq.ParquetWriter(destino, schema) as writer:
+        for bloco in iter_chunks(df):
+            writer.write_table(pa.Table.from_pandas(bloco, schema=schema, preserve_index=False))
+
+def write_xlsx(df, destino, aba='Chamados'):
+    """Grava XLSX com openpyxl em modo write_only (linhas vão direto para o arquivo)"""
+    from openpyxl import Workbook
+    from openpyxl.cell.cell import ILLEGAL_CHARACTERS_RE
+
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet(aba)
+    ws.append([str(coluna) for coluna in df.columns])
+    colunas_texto = [coluna for coluna in df.columns if pd.api.types.is_string_dtype(df[coluna].dtype)]
+    for bloco in iter_chunks(df):
+        # Tipos do Python (int, float, datetime) e vazios como None; caracteres de controle são recusados pelo Excel
+        bloco = bloco.astype(object)
+        for coluna in colunas_texto:
+            bloco[coluna] = bloco[coluna].map(
+                lambda valor: ILLEGAL_CHARACTERS_RE.sub('', valor) if isinstance(valor, str) else valor)
+        bloco = bloco.where(bloco.notna(), None)
+        for linha in bloco.itertuples(index=False, name=None):
+            ws.append(linha)
+    wb.save(destino)
+
+_ESCRITORES = {'csv': write_csv, 'parquet': write_parquet, 'xlsx': write_xlsx}
+
+def export_to_file(df, formato):
+    """Grava `df` no formato pedido em um arquivo temporário e o retorna aberto no início"""
+    if formato not in _ESCRITORES:
+        raise ValueError(f"Formato de exportação desconhecido: {formato}")
+    destino = tempfile.TemporaryFile()
+    _ESCRITORES[formato](df, destino)
+    destino.seek(0)
+    return destino
+
+def export_bytes(df, formato):
+    """Conteúdo do arquivo exportado (gerado em blocos em disco e lido uma única vez no final)"""
+    with export_to_file(df, formato) as arquivo:
+        return arquivo.read()
+
+def export_file_name(nome, formato):
+    return f"{nome}.{FORMATOS[formato][0]}"
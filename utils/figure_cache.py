@@ -0,0 +1,66 @@
+"""Cache de figuras Plotly por processo, indexado pelos dados agregados do gráfico.
+
+As funções que montam figuras recebem apenas os dados já agregados (poucas linhas) e
+parâmetros simples. Com @cached_figure, a figura só é montada de novo quando o hash
+desses dados ou algum parâmetro muda; nas demais execuções o mesmo objeto é reenviado
+ao st.plotly_chart. As figuras em cache são compartilhadas entre sessões e não devem
+ser alteradas depois de montadas.
+"""
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+import pandas as pd
+from utils import perf
+
+# Figuras mantidas em memória (as menos usadas recentemente saem primeiro)
+FIGURAS_MAX = 128
+
+_figuras = OrderedDict()
+_lock = threading.Lock()
+
+def data_hash(dados):
+    """Hash dos valores, índice, colunas e tipos de um DataFrame/Series"""
+    h = hashlib.blake2b(digest_size=16)
+    h.update(pd.util.hash_pandas_object(dados, index=True).values.tobytes())
+    if isinstance(dados, pd.DataFrame):
+        h.update(repr((list(dados.columns), [str(tipo) for tipo in dados.dtypes])).encode())
+    else:
+        h.update(repr((dados.name, str(dados.dtype))).encode())
+    h.update(repr(dados.index.names).encode())
+    return h.hexdigest()
+
+def _chave_argumento(valor):
+    if isinstance(valor, (pd.DataFrame, pd.Series)):
+        return ('dados', data_hash(valor))
+    return valor
+
+def cached_figure(func):
+    """Reaproveita a figura montada por `func` enquanto os dados e parâmetros forem os mesmos"""
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        inicio = time.perf_counter()
+        chave = (func.__module__, func.__qualname__,
+                 tuple(_chave_argumento(valor) for valor in args),
+                 tuple(sorted((nome, _chave_argumento(valor)) for nome, valor in kwargs.items())))
+        perf.count("cache:figuras:chamada")
+        with _lock:
+            figura = _figuras.get(chave)
+            if figura is not None:
+                _figuras.move_to_end(chave)
+        if figura is None:
+            perf.count("cache:figuras:miss")
+            figura = func(*args, **kwargs)
+            with _lock:
+                _figuras[chave] = figura
+                while len(_figuras) > FIGURAS_MAX:
+                    _figuras.popitem(last=False)
+        perf.count("figuras_s", time.perf_counter() - inicio)
+        return figura
+    return wrapper
+
+def clear():
+    """Esvazia o cache (benchmarks e testes manuais)"""
+    with _lock:
+        _figuras.clear()
@@ -0,0 +1,159 @@
+"""Histórico dos chamados entre processamentos, guardado como log de alterações.
+
+Cada processamento grava na pasta do histórico um arquivo delta_*.parquet só com o que
+mudou desde o anterior: uma linha por chamado alterado, com a data do snapshot, a
+máscara ALTERADOS (um bit por campo de CAMPOS) e os novos valores desses campos. O
+campo ATIVO marca chamados que entraram (True) ou saíram (False) das planilhas.
+
+A cada COMPACTAR_A_CADA deltas, os arquivos são reunidos em log.parquet, ordenado por
+REQUISICAO e data. O estado em qualquer data (state_as_of) é o último valor de cada
+campo até ela; o tempo em cada status (time_in_status) sai das trocas de STATUS.
+"""
+import glob
+import os
+from datetime import datetime
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+from utils.store import HISTORY_PATH
+
+# Campos acompanhados; a posição na lista é o bit na máscara ALTERADOS
+CAMPOS = ['ATIVO', 'STATUS', 'RESPONSAVEL', 'DATA_ALVO']
+COMPACTAR_A_CADA = 20
+
+LOG_ARQUIVO = "log.parquet"
+
+SCHEMA = pa.schema([
+    ('REQUISICAO', pa.int64()),
+    ('DATA_SNAPSHOT', pa.timestamp('us')),
+    ('ALTERADOS', pa.int8()),
+    ('ATIVO', pa.bool_()),
+    ('STATUS', pa.string()),
+    ('RESPONSAVEL', pa.string()),
+    ('DATA_ALVO', pa.timestamp('us')),
+])
+
+def _bit(campo):
+    return 1 << CAMPOS.index(campo)
+
+def _arquivos(pasta):
+    """log.parquet (se houver) seguido dos deltas em ordem de gravação"""
+    log = os.path.join(pasta, LOG_ARQUIVO)
+    return ([log] if os.path.exists(log) else []) + sorted(glob.glob(os.path.join(pasta, "delta_*.parquet")))
+
+def read_log(pasta=HISTORY_PATH, ate=None):
+    """Eventos do histórico (até a data `ate`, se informada) ordenados por chamado e data"""
+    filtros = [('DATA_SNAPSHOT', '<=', pd.Timestamp(ate))] if ate is not None else None
+    partes = [pd.read_parquet(arquivo, filters=filtros) for arquivo in _arquivos(pasta)]
+    if not partes:
+        return SCHEMA.empty_table().to_pandas()
+    log = pd.concat(partes, ignore_index=True)
+    # Uma compactação interrompida pode deixar o mesmo evento no log e em um delta
+    log = log.drop_duplicates(subset=['REQUISICAO', 'DATA_SNAPSHOT', 'ALTERADOS'], keep='last')
+    return log.sort_values(['REQUISICAO', 'DATA_SNAPSHOT'], kind='stable', ignore_index=True)
+
+def state_as_of(data=None, pasta=HISTORY_PATH, log=None):
+    """Estado dos chamados (último valor de cada campo) na data informada; sem data, o estado atual"""
+    if log is None:
+        log = read_log(pasta, data)
+    elif data is not None:
+        log = log[log['DATA_SNAPSHOT'] <= pd.Timestamp(data)]
+
+    estado = None
+    for campo in CAMPOS:
+        ultimos = log.loc[(log['ALTERADOS'] & _bit(campo)) != 0, ['REQUISICAO', campo]]
+        ultimos = ultimos.drop_duplicates('REQUISICAO', keep='last').set_index('REQUISICAO')
+        estado = ultimos if estado is None else estado.join(ultimos, how='outer')
+
+    estado = estado[estado['ATIVO'].fillna(False).astype(bool)]
+    return estado.drop(columns=['ATIVO']).reset_index()
+
+def _valores_diferentes(antes, depois):
+    """Valores diferentes entre duas colunas alinhadas (dois vazios contam como iguais)"""
+    return (antes != depois) & ~(antes.isna() & depois.isna())
+
+def compute_delta(df, estado_anterior, data_snapshot):
+    """Linhas do log para passar de `estado_anterior` (estado atual do histórico) para `df`"""
+    novo = df[['REQUISICAO'] + CAMPOS[1:]].drop_duplicates('REQUISICAO', keep='last').set_index('REQUISICAO')
+    novo['DATA_ALVO'] = pd.to_datetime(novo['DATA_ALVO'], errors='coerce')
+    anterior = estado_anterior.set_index('REQUISICAO').reindex(columns=CAMPOS[1:])
+
+    todos = novo.index.union(anterior.index)
+    novo_alinhado = novo.reindex(todos)
+    anterior_alinhado = anterior.reindex(todos)
+    presente_antes = todos.isin(anterior.index)
+    presente_agora = todos.isin(novo.index)
+
+    alterados = pd.Series(0, index=todos, dtype='int64')
+    # Entrada ou saída do chamado nas planilhas
+    alterados[presente_antes != presente_agora] |= _bit('ATIVO')
+    for campo in CAMPOS[1:]:
+        mudou = presente_agora & (~presente_antes | _valores_diferentes(anterior_alinhado[campo],
+                                                                          novo_alinhado[campo]).to_numpy())
+        alterados[mudou] |= _bit(campo)
+
+    manter = alterados.to_numpy() != 0
+    delta = novo_alinhado[manter].copy()
+    alterados = alterados[manter]
+    for campo in CAMPOS[1:]:
+        # Só os campos alterados levam valor
+        delta.loc[(alterados & _bit(campo)).to_numpy() == 0, campo] = None
+    delta['ATIVO'] = presente_agora[manter]
+    delta['ALTERADOS'] = alterados.astype('int8')
+    delta['DATA_SNAPSHOT'] = pd.Timestamp(data_snapshot)
+    return delta.reset_index()[SCHEMA.names]
+
+def _gravar(df, caminho):
+    """Grava com o schema fixo do histórico (arquivo temporário + troca)"""
+    tmp_path = f"{caminho}.{os.getpid()}.tmp"
+    pq.write_table(pa.Table.from_pandas(df, schema=SCHEMA, preserve_index=False), tmp_path)
+    os.replace(tmp_path, caminho)
+    return caminho
+
+def record_snapshot(df, pasta=HISTORY_PATH, data_snapshot=None):
+    """Acrescenta ao histórico as alterações de `df` em relação ao último snapshot; retorna as linhas gravadas"""
+    os.makedirs(pasta, exist_ok=True)
+    data_snapshot = pd.Timestamp(data_snapshot or datetime.now())
+    delta = compute_delta(df, state_as_of(pasta=pasta), data_snapshot)
+    if len(delta):
+        _gravar(delta, os.path.join(pasta, f"delta_{data_snapshot.strftime('%Y%m%dT%H%M%S%f')}.parquet"))
+    if len(glob.glob(os.path.join(pasta, "delta_*.parquet"))) >= COMPACTAR_A_CADA:
+        compact(pasta)
+    return len(delta)
+
+def compact(pasta=HISTORY_PATH):
+    """Reúne log.parquet e os deltas em um único log ordenado e remove os deltas"""
+    deltas = sorted(glob.glob(os.path.join(pasta, "delta_*.parquet")))
+    if not deltas:
+        return None
+    caminho = _gravar(read_log(pasta), os.path.join(pasta, LOG_ARQUIVO))
+    for delta in deltas:
+        os.remove(delta)
+    return caminho
+
+def time_in_status(pasta=HISTORY_PATH, ate=None, log=None):
+    """Períodos de cada chamado em cada status (INICIO, FIM, DIAS) pelas trocas registradas no histórico
+
+    A precisão é a dos snapshots: uma troca aparece na data do processamento em que foi vista.
+    O período atual termina em `ate` (padrão: agora) ou na saída do chamado das planilhas.
+    """
+    if log is None:
+        log = read_log(pasta, ate)
+    fim_padrao = pd.Timestamp(ate or datetime.now())
+
+    # Trocas de status e saídas das planilhas (a saída não tem STATUS e só encerra o período anterior)
+    eventos = log[(log['ALTERADOS'] & (_bit('STATUS') | _bit('ATIVO'))) != 0].copy()
+    eventos['FIM'] = eventos.groupby('REQUISICAO')['DATA_SNAPSHOT'].shift(-1).fillna(fim_padrao)
+    periodos = eventos[eventos['STATUS'].notna()].rename(columns={'DATA_SNAPSHOT': 'INICIO'})
+    periodos = periodos[['REQUISICAO', 'STATUS', 'INICIO', 'FIM']].reset_index(drop=True)
+    periodos['DIAS'] = (periodos['FIM'] - periodos['INICIO']).dt.total_seconds() / 86400
+    return periodos
+
+def time_in_status_summary(periodos):
+    """Dias em cada status: chamados, média, mediana e p90"""
+    return periodos.groupby('STATUS')['DIAS'].agg(
+        chamados='count',
+        media='mean',
+        mediana='median',
+        p90=lambda dias: dias.quantile(0.9),
+    ).round(2).sort_values('chamados', ascending=False).reset_index()
@@ -0,0 +1,264 @@
+import logging
+import numpy as np
+import pandas as pd
+from config.settings import EQUIPE_PADRAO
+
+logger = logging.getLogger(__name__)
+
+# Colunas usadas do Relatório de Requisições (as que existirem)
+COLUNAS_REQ = ['NUM_CHAMADO', 'DATA_ABERTURA', 'DATA_PREV_SOLUCAO',
+               'DATA_QUEBRA_SLA', 'SLA_VIOLADO', 'DATA_RESOLUCAO',
+               'DATA_FECHAMENTO', 'Status', 'TITULO', 'SOLICITANTE', 'RESPONSAVEL',
+               'EMPRESA_SOLICITANTE', 'CLIENTE_CIDADE', 'CLIENTE_UF']
+
+# Colunas usadas da planilha Requisições da Minha Equipe (as que existirem)
+COLUNAS_MINHA = ['Requisição de Serviço','Data Esperada', 'Resumo', 
+                 'Status', 'Proprietário', 'Cliente', 'Criado em', 
+                 'Resolvido em', 'SLA - Data Prevista Solução', 'SLA - Data Quebra']
+
+# Colunas da planilha da equipe -> nomes após o merge (sufixo _MINHA: usadas para preencher buracos)
+RENOMEAR_MINHA = {
+    'Requisição de Serviço': 'NUM_CHAMADO',
+    'Resumo': 'RESUMO_MINHA',  # Diferente de TITULO para podermos fundir
+    'Cliente': 'SOLICITANTE_MINHA',  # Diferente de SOLICITANTE para podermos fundir
+    'Status': 'STATUS_MINHA',
+    'Proprietário': 'RESPONSAVEL_MINHA',
+    'Resolvido em': 'DATA_RESOLUCAO_MINHA',
+    'Criado em': 'DATA_ABERTURA_MINHA',
+    'SLA - Data Prevista Solução': 'DATA_PREV_SOLUCAO_MINHA',
+    'SLA - Data Quebra': 'DATA_QUEBRA_SLA',  # Esse pode manter
+}
+
+# Consolidação após o merge: (coluna, coluna _MINHA, prioridade da planilha da equipe)
+# Com prioridade, o valor da equipe vence; sem, só preenche o que estiver vazio no Geral
+CONSOLIDACAO = [
+    ('Status', 'STATUS_MINHA', True),
+    ('RESPONSAVEL', 'RESPONSAVEL_MINHA', True),
+    ('SOLICITANTE', 'SOLICITANTE_MINHA', False),
+    ('TITULO', 'RESUMO_MINHA', False),
+    ('DATA_RESOLUCAO', 'DATA_RESOLUCAO_MINHA', False),
+    ('DATA_ABERTURA', 'DATA_ABERTURA_MINHA', False),
+    ('DATA_PREV_SOLUCAO', 'DATA_PREV_SOLUCAO_MINHA', False),
+]
+
+# Nomes padronizados das colunas no parquet consolidado
+MAPEAMENTO_COLUNAS = {
+    'NUM_CHAMADO': 'REQUISICAO',
+    'Status': 'STATUS',
+    'TITULO': 'RESUMO',
+}
+
+# Coluna do número do chamado em cada planilha -> nome da planilha nos avisos
+CHAVES_PLANILHAS = {
+    'NUM_CHAMADO': "Relatório de Requisições",
+    'Requisição de Serviço': "Requisições da Minha Equipe",
+}
+
+# Maior número de chamado aceito: inteiros representados exatamente em float64 (texto passa por float)
+CHAVE_MAXIMA = 2 ** 53
+
+# Quantos chamados repetidos aparecem como exemplo nos avisos
+EXEMPLOS_REPETIDOS = 5
+
+def read_exports(arquivo_req, arquivo_minha):
+    """Lê as duas exportações Excel (caminho ou arquivo enviado)"""
+    df_req = pd.read_excel(arquivo_req)
+    df_req_minha = pd.read_excel(arquivo_minha)
+    return df_req, df_req_minha
+
+def ingest_exports(arquivo_req, arquivo_minha, relatorio=None):
+    """Lê as exportações e aplica a lógica de consolidação, sem depender do Streamlit"""
+    df_req, df_req_minha = read_exports(arquivo_req, arquivo_minha)
+    return process_data_original_logic(df_req, df_req_minha, relatorio)
+
+def process_data_original_logic(df_req, df_req_minha, relatorio=None):
+    """Aplica a lógica de processamento PRIORIZANDO ARQUIVO DA EQUIPE E CONSOLIDANDO DADOS"""
+    from utils import polars_backend
+    if polars_backend.enabled():
+        df_req, df_req_minha = guard_merge_keys(df_req, df_req_minha, relatorio)
+        return polars_backend.process_exports(df_req, df_req_minha)
+    df_final = merge_exports(df_req, df_req_minha, relatorio)
+    return add_data_alvo(df_final)
+
+def normalize_ticket_keys(chaves):
+    """Números de chamado como inteiros (Int64): aceita int, float inteiro e texto como ' 123 ' ou '123.0'
+
+    O que não for um número inteiro de chamado fica vazio (<NA>).
+    """
+    if pd.api.types.is_integer_dtype(chaves) and not pd.api.types.is_extension_array_dtype(chaves):
+        return chaves.astype('Int64')
+    if pd.api.types.is_numeric_dtype(chaves) and not pd.api.types.is_bool_dtype(chaves):
+        numeros = chaves.astype('float64')
+    else:
+        numeros = pd.to_numeric(chaves.astype('str').str.strip(), errors='coerce').astype('float64')
+    inteiros = (numeros % 1 == 0) & (numeros.abs() < CHAVE_MAXIMA)
+    return numeros.where(inteiros).astype('Int64')
+
+def dedupe_tickets(df, coluna, relatorio=None):
+    """Chave `coluna` em int64 e uma linha por chamado: sem chave válida e repetições (fica a primeira) saem
+
+    O que saiu é registrado em `relatorio[coluna]` (contagens e exemplos de chamados repetidos).
+    """
+    chaves = normalize_ticket_keys(df[coluna])
+    invalidas = chaves.isna().to_numpy()
+    repetidas = (chaves.duplicated(keep='first').to_numpy() & ~invalidas)
+    info = {
+        'linhas': len(df),
+        'chaves_invalidas': int(invalidas.sum()),
+        'linhas_repetidas': int(repetidas.sum()),
+        'chamados_repetidos': int(chaves[repetidas].nunique()),
+        'exemplos': [int(chave) for chave in chaves[repetidas].unique()[:EXEMPLOS_REPETIDOS]],
+    }
+    if relatorio is not None:
+        relatorio[coluna] = info
+    if info['chaves_invalidas'] or info['linhas_repetidas']:
+        logger.warning("%s: %s", CHAVES_PLANILHAS.get(coluna, coluna), _describe_keys(info))
+
+    manter = ~(invalidas | repetidas)
+    if manter.all() and df[coluna].dtype == np.dtype('int64'):
+        return df
+    return df[manter].assign(**{coluna: chaves[manter].astype('int64')})
+
+def guard_merge_keys(df_req, df_req_minha, relatorio=None):
+    """Normaliza as chaves das duas planilhas e deixa uma linha por chamado em cada uma (ver dedupe_tickets)"""
+    if 'NUM_CHAMADO' in df_req.columns:
+        df_req = dedupe_tickets(df_req, 'NUM_CHAMADO', relatorio)
+    if 'Requisição de Serviço' in df_req_minha.columns:
+        df_req_minha = dedupe_tickets(df_req_minha, 'Requisição de Serviço', relatorio)
+    return df_req, df_req_minha
+
+def describe_key_report(relatorio):
+    """Avisos (um por planilha com problema) a partir do relatório de chaves do merge"""
+    return [f"{CHAVES_PLANILHAS.get(coluna, coluna)}: {_describe_keys(info)}"
+            for coluna, info in relatorio.items() if info['chaves_invalidas'] or info['linhas_repetidas']]
+
+def _describe_keys(info):
+    partes = []
+    if info['linhas_repetidas']:
+        exemplos = ", ".join(str(chave) for chave in info['exemplos'])
+        partes.append(f"{info['linhas_repetidas']:,} linha(s) repetida(s) de {info['chamados_repetidos']:,} "
+                      f"chamado(s) ignoradas, mantida a primeira (ex.: {exemplos})")
+    if info['chaves_invalidas']:
+        partes.append(f"{info['chaves_invalidas']:,} linha(s) sem número de chamado válido ignoradas")
+    return "; ".join(partes)
+
+def merge_exports(df_req, df_req_minha, relatorio=None):
+    """Mescla as duas planilhas priorizando Status e Responsável da planilha da equipe
+
+    Os chamados de todas as equipes (RESOLVEDOR_PADRAO) são mantidos, com a equipe na coluna EQUIPE.
+    A planilha da equipe é da EQUIPE_PADRAO: os chamados que estão nela ficam nessa equipe.
+    As chaves são normalizadas antes (guard_merge_keys): o resultado tem uma linha por chamado.
+    """
+    df_req, df_req_minha = guard_merge_keys(df_req, df_req_minha, relatorio)
+    from utils import polars_backend
+    if polars_backend.enabled():
+        return polars_backend.merge_exports(df_req, df_req_minha)
+    
+    # Outras equipes: só os dados do relatório geral (sem os chamados da planilha da equipe)
+    df_outras = None
+    if 'RESOLVEDOR_PADRAO' in df_req.columns:
+        da_equipe = df_req['RESOLVEDOR_PADRAO'] == EQUIPE_PADRAO
+        outras = ~da_equipe
+        if 'NUM_CHAMADO' in df_req.columns and 'Requisição de Serviço' in df_req_minha.columns:
+            outras &= ~df_req['NUM_CHAMADO'].isin(df_req_minha['Requisição de Serviço'])
+        colunas_outras = [col for col in COLUNAS_REQ if col in df_req.columns]
+        df_outras = df_req.loc[outras, colunas_outras + ['RESOLVEDOR_PADRAO']].rename(
+            columns={'RESOLVEDOR_PADRAO': 'EQUIPE'})
+        df_req = df_req[da_equipe].copy()
+    
+    available_cols_req = [col for col in COLUNAS_REQ if col in df_req.columns]
+    df_req = df_req[available_cols_req].copy()
+    
+    # Selecionar apenas colunas que existem no df_req_minha
+    available_cols_minha = [col for col in COLUNAS_MINHA if col in df_req_minha.columns]
+    df_req_minha = df_req_minha[available_cols_minha].copy()
+    
+    # Renomear colunas do arquivo MINHA para sufixos específicos
+    rename_dict = {col: novo for col, novo in RENOMEAR_MINHA.items() if col in df_req_minha.columns}
+    df_req_minha.rename(columns=rename_dict, inplace=True)
+    
+    # Identificar colunas novas 
+    colunas_df_req = set(df_req.columns)
+    colunas_df_req_minha = set(df_req_minha.columns)
+    colunas_novas = colunas_df_req_minha - colunas_df_req
+    
+    # Fazer o merge
+    if 'NUM_CHAMADO' in df_req.columns or 'NUM_CHAMADO' in df_req_minha.columns:
+        colunas_para_merge = ['NUM_CHAMADO'] + list(colunas_novas)
+        df_req_minha_filtrado = df_req_minha[colunas_para_merge].copy()
+        
+        # OUTER JOIN: Garante que chamados apenas da planilha da equipe apareçam (1:1, chaves já sem repetição)
+        df_final = pd.merge(df_req, df_req_minha_filtrado, on='NUM_CHAMADO', how='outer', validate='one_to_one')
+        
+        # --- LÓGICA DE CONSOLIDAÇÃO DE DADOS ---
+        for destino, origem, prioridade_minha in CONSOLIDACAO:
+            if origem not in df_final.columns:
+                continue
+            if destino not in df_final.columns:
+                df_final[destino] = df_final[origem]
+            elif prioridade_minha:
+                df_final[destino] = df_final[origem].fillna(df_final[destino])
+            else:
+                df_final[destino] = df_final[destino].fillna(df_final[origem])
+            
+    else:
+        # Se não conseguir fazer merge, usar apenas df_req
+        df_final = df_req.copy()
+    
+    df_final['EQUIPE'] = EQUIPE_PADRAO
+    if df_outras is not None and len(df_outras) > 0:
+        df_outras['EQUIPE'] = df_outras['EQUIPE'].fillna('Sem Equipe')
+        df_final = pd.concat([df_final, df_outras], ignore_index=True)
+    
+    # Tratar colunas nulas essenciais
+    if 'RESPONSAVEL' in df_final.columns:
+        df_final['RESPONSAVEL'] = df_final['RESPONSAVEL'].fillna('Sem Responsável')
+    if 'SOLICITANTE' in df_final.columns:
+        df_final['SOLICITANTE'] = df_final['SOLICITANTE'].fillna('N/A')
+    
+    return df_final
+
+def add_data_alvo(df_final):
+    """Cria a DATA_ALVO (Data Esperada > DATA_QUEBRA_SLA > DATA_PREV_SOLUCAO) e padroniza colunas"""
+    from utils import polars_backend
+    if polars_backend.enabled():
+        return polars_backend.add_data_alvo(df_final)
+    
+    # Criar DATA_ALVO com nova lógica
+    def get_data_alvo(row):
+        # 1. Tentar usar Data Esperada (do arquivo 2 - Requisições da Minha Equipe)
+        data_esp = row.get('Data Esperada')
+        if pd.notna(data_esp):
+            data_esp_date = pd.to_datetime(data_esp, errors='coerce')
+            if pd.notna(data_esp_date):
+                return data_esp_date
+        
+        # 2. Se Data Esperada não existe ou está vazia, usar DATA_QUEBRA_SLA
+        data_quebra = row.get('DATA_QUEBRA_SLA')
+        if pd.notna(data_quebra):
+            return data_quebra
+        
+        # 3. Se DATA_QUEBRA_SLA não existe, usar DATA_PREV_SOLUCAO
+        data_prev = row.get('DATA_PREV_SOLUCAO')
+        if pd.notna(data_prev):
+            return data_prev
+        
+        return None
+    
+    # Converter Data Esperada se existir
+    if 'Data Esperada' in df_final.columns:
+        df_final['Data Esperada'] = pd.to_datetime(df_final['Data Esperada'], errors='coerce')
+    
+    df_final['DATA_ALVO'] = df_final.apply(get_data_alvo, axis=1)
+    
+    # Aplicar padronização de colunas
+    df_final = _apply_column_mapping(df_final)
+    
+    return df_final
+
+def _apply_column_mapping(df):
+    """Aplica mapeamento de colunas para padronizar nomes"""
+    # Aplicar mapeamento apenas para colunas existentes
+    existing_columns = {k: v for k, v in MAPEAMENTO_COLUNAS.items() if k in df.columns}
+    df = df.rename(columns=existing_columns)
+    return df
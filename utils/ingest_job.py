@@ -0,0 +1,203 @@
+import shutil
+import threading
+import time
+import traceback
+import multiprocessing as mp
+import pandas as pd
+from queue import Empty
+from utils.ingest import merge_exports, add_data_alvo
+from utils.store import DATA_PATH, HISTORY_PATH, write_ticket_dataset
+from utils.history import record_snapshot
+
+# Etapas do processamento, na ordem em que são executadas
+ETAPAS = [
+    ('ler_req', "Lendo Relatório de Requisições"),
+    ('ler_minha', "Lendo Requisições da Minha Equipe"),
+    ('merge', "Mesclando planilhas"),
+    ('data_alvo', "Calculando DATA_ALVO"),
+    ('gravar', "Gravando dados processados"),
+    ('historico', "Registrando histórico"),
+]
+
+# Processamento registrado no servidor (upload pelo dashboard ou pasta monitorada): um por vez,
+# porque os dois gravam o mesmo parquet e o mesmo histórico
+_registro = {'job': None, 'origem': None}
+_lock_registro = threading.Lock()
+
+def claim_ingest(job, origem):
+    """Registra `job` (antes do start) como o processamento em andamento; False se outro ainda estiver executando"""
+    with _lock_registro:
+        atual = _registro['job']
+        if atual is not None and atual.poll() in ('pendente', 'executando'):
+            return False
+        _registro.update(job=job, origem=origem)
+        return True
+
+def current_ingest(origem=None):
+    """Processamento registrado (só o da `origem`, se informada); None se não houver"""
+    with _lock_registro:
+        if origem is not None and _registro['origem'] != origem:
+            return None
+        return _registro['job']
+
+def release_ingest(job):
+    """Tira `job` do registro se ele ainda for o registrado; True só para quem o tirou"""
+    with _lock_registro:
+        if _registro['job'] is not job:
+            return False
+        _registro.update(job=None, origem=None)
+        return True
+
+class IngestCancelled(Exception):
+    """Processamento cancelado pelo usuário"""
+
+def run_ingest(caminho_req, caminho_minha, destino=DATA_PATH, reportar=None, cancelado=None, historico=HISTORY_PATH,
+               relatorio=None):
+    """Executa o processamento completo reportando cada etapa; só troca o parquet no final
+
+    `relatorio` (dict) recebe as chaves inválidas/repetidas descartadas no merge (utils.ingest.dedupe_tickets).
+    """
+    def etapa(nome):
+        if cancelado is not None and cancelado():
+            raise IngestCancelled()
+        if reportar is not None:
+            reportar(nome)
+
+    etapa('ler_req')
+    df_req = pd.read_excel(caminho_req)
+    etapa('ler_minha')
+    df_req_minha = pd.read_excel(caminho_minha)
+    etapa('merge')
+    df_final = merge_exports(df_req, df_req_minha, relatorio)
+    etapa('data_alvo')
+    df_final = add_data_alvo(df_final)
+    etapa('gravar')
+    write_ticket_dataset(df_final, destino)
+    if historico:
+        # O parquet já foi trocado: esta etapa não é mais cancelável
+        if reportar is not None:
+            reportar('historico')
+        record_snapshot(df_final, historico)
+    return len(df_final)
+
+def _worker(caminho_req, caminho_minha, destino, historico, fila, evento_cancelar):
+    """Ponto de entrada do processo de ingestão"""
+    try:
+        relatorio = {}
+        linhas = run_ingest(caminho_req, caminho_minha, destino,
+                            reportar=lambda nome: fila.put(('etapa', (nome, time.time()))),
+                            cancelado=evento_cancelar.is_set, historico=historico, relatorio=relatorio)
+        fila.put(('concluido', (linhas, relatorio, time.time())))
+    except IngestCancelled:
+        fila.put(('cancelado', None))
+    except Exception as e:
+        fila.put(('erro', f"{e}\n\n{traceback.format_exc()}"))
+
+class IngestJob:
+    """Processamento das planilhas em um processo separado, com progresso por etapa"""
+
+    def __init__(self, caminho_req, caminho_minha, destino=DATA_PATH, pasta_temporaria=None, historico=HISTORY_PATH):
+        self.caminho_req = caminho_req
+        self.caminho_minha = caminho_minha
+        self.destino = destino
+        self.historico = historico
+        self.pasta_temporaria = pasta_temporaria
+        self.status = 'pendente'
+        self.etapa = None
+        self.linhas = None
+        self.relatorio_chaves = {}
+        self.erro = None
+        self.inicio = None
+        self.fim = None
+        self.tempos_etapas = {}
+        self._inicio_etapa = None
+        self._lock = threading.Lock()
+
+        contexto = mp.get_context('spawn')
+        self._fila = contexto.Queue()
+        self._cancelar = contexto.Event()
+        self._processo = contexto.Process(
+            target=_worker,
+            args=(caminho_req, caminho_minha, destino, historico, self._fila, self._cancelar),
+            daemon=True,
+        )
+
+    def start(self):
+        """Inicia o processo de ingestão"""
+        self.inicio = time.time()
+        self.status = 'executando'
+        self._processo.start()
+        return self
+
+    def poll(self):
+        """Consome as mensagens do processo e atualiza o estado do job (várias sessões podem chamar ao mesmo tempo)"""
+        with self._lock:
+            while True:
+                try:
+                    tipo, valor = self._fila.get_nowait()
+                except Empty:
+                    break
+                if tipo == 'etapa':
+                    nome, instante = valor
+                    self._fechar_etapa(instante)
+                    self.etapa = nome
+                    self._inicio_etapa = instante
+                else:
+                    self._finalizar(tipo, valor)
+
+            # Processo morreu sem avisar (ex.: terminado no cancelamento)
+            if self.status == 'executando' and not self._processo.is_alive() and self._fila.empty():
+                if self._cancelar.is_set():
+                    self._finalizar('cancelado', None)
+                else:
+                    self._finalizar('erro', f"Processo de ingestão encerrado (código {self._processo.exitcode})")
+            return self.status
+
+    def cancel(self, espera=2.0):
+        """Cancela o processamento; o parquet atual permanece intacto"""
+        if self.status != 'executando':
+            return
+        self._cancelar.set()
+        self._processo.join(espera)
+        if self._processo.is_alive():
+            # A troca do arquivo é atômica, então interromper a escrita não corrompe os dados
+            self._processo.terminate()
+            self._processo.join()
+        self.poll()
+
+    @property
+    def running(self):
+        return self.status == 'executando'
+
+    @property
+    def progress(self):
+        """Fração concluída (0 a 1) com base na etapa atual"""
+        if self.status == 'concluido':
+            return 1.0
+        nomes = [nome for nome, _ in ETAPAS]
+        if self.etapa not in nomes:
+            return 0.0
+        return nomes.index(self.etapa) / len(ETAPAS)
+
+    @property
+    def stage_label(self):
+        return dict(ETAPAS).get(self.etapa, "Iniciando")
+
+    def _fechar_etapa(self, instante):
+        """Registra a duração da etapa atual (segundos, medidos no processo de ingestão)"""
+        if self.etapa is not None and self._inicio_etapa is not None:
+            self.tempos_etapas[self.etapa] = instante - self._inicio_etapa
+
+    def _finalizar(self, status, valor):
+        if self.status != 'executando':
+            return
+        self.status = status
+        self.fim = time.time()
+        if status == 'concluido':
+            self.linhas, self.relatorio_chaves, instante = valor
+            self._fechar_etapa(instante)
+        elif status == 'erro':
+            self.erro = valor
+        self._processo.join(0.1)
+        if self.pasta_temporaria:
+            shutil.rmtree(self.pasta_temporaria, ignore_errors=True)
@@ -0,0 +1,143 @@
+"""Tempo até a resolução (DATA_ABERTURA -> DATA_RESOLUCAO) em percentis, com sketches por semana.
+
+Cada duração (em horas) cai em um balde logarítmico: o balde k cobre (GAMA^(k-1), GAMA^k].
+O valor representativo de um balde está a no máximo ERRO_RELATIVO de qualquer duração
+dentro dele, então qualquer percentil lido das contagens tem esse erro relativo (mesma
+ideia do DDSketch). Um sketch é só a contagem por balde; juntar sketches é somar as
+contagens dos mesmos baldes.
+
+Os sketches ficam por semana da resolução (segunda-feira) e por valor de cada dimensão
+(responsável, tipo de resumo e empresa). Os percentis de um período qualquer saem da soma
+dos sketches das semanas do período, sem reordenar as durações dos chamados.
+"""
+import threading
+import numpy as np
+import pandas as pd
+from utils.store import LEAD_TIME_PATH, read_team_dataset
+
+STATUS_FINALIZADOS = ['Resolvido', 'Fechado']
+
+# Dimensão (coluna) -> rótulo exibido
+DIMENSOES = {
+    'RESPONSAVEL': "Responsável",
+    'RESUMO': "Tipo de Resumo",
+    'EMPRESA_SOLICITANTE': "Empresa",
+}
+
+QUANTIS = {'p50': 0.5, 'p90': 0.9, 'p99': 0.99}
+
+ERRO_RELATIVO = 0.01
+GAMA = (1 + ERRO_RELATIVO) / (1 - ERRO_RELATIVO)
+# Durações abaixo de 1 minuto (inclusive zero e negativas) ficam no balde de 1 minuto
+HORAS_MINIMO = 1 / 60
+
+COLUNAS = ['SEMANA', 'DIMENSAO', 'VALOR', 'BALDE', 'CONTAGEM']
+
+def lead_time_hours(df):
+    """Horas entre abertura e resolução dos chamados resolvidos/fechados"""
+    finalizados = df['STATUS'].isin(STATUS_FINALIZADOS) & df['DATA_RESOLUCAO'].notna() & df['DATA_ABERTURA'].notna()
+    resolvidos = df[finalizados]
+    return (resolvidos['DATA_RESOLUCAO'] - resolvidos['DATA_ABERTURA']).dt.total_seconds() / 3600
+
+def bucket_of(horas):
+    """Balde logarítmico de cada duração"""
+    horas = np.maximum(np.asarray(horas, dtype='float64'), HORAS_MINIMO)
+    return np.ceil(np.log(horas) / np.log(GAMA)).astype('int32')
+
+def bucket_value(balde):
+    """Valor representativo (horas) do balde: erro relativo de no máximo ERRO_RELATIVO"""
+    return 2 * GAMA ** np.asarray(balde, dtype='float64') / (GAMA + 1)
+
+def build_sketches(df):
+    """Sketches (contagem por balde) de cada dimensão, por semana da resolução e valor, ordenados por semana"""
+    horas = lead_time_hours(df)
+    resolvidos = df.loc[horas.index]
+    base = pd.DataFrame({
+        'SEMANA': resolvidos['DATA_RESOLUCAO'].dt.to_period('W-SUN').dt.start_time,
+        'BALDE': bucket_of(horas),
+    }, index=horas.index)
+
+    sketches = {}
+    for dimensao in DIMENSOES:
+        if dimensao not in resolvidos.columns:
+            continue
+        valores = resolvidos[dimensao].astype('str').fillna('Não informado').astype('category')
+        contagens = base.assign(VALOR=valores).groupby(['SEMANA', 'VALOR', 'BALDE'], sort=True, observed=True).size()
+        sketches[dimensao] = contagens.astype('int32').rename('CONTAGEM').reset_index()
+    return sketches
+
+def sketches_table(sketches):
+    """Sketches de todas as dimensões em uma única tabela (para gravar em parquet)"""
+    partes = [sketch.assign(DIMENSAO=dimensao) for dimensao, sketch in sketches.items()]
+    if not partes:
+        return pd.DataFrame({coluna: [] for coluna in COLUNAS})
+    return pd.concat(partes, ignore_index=True)[COLUNAS]
+
+def read_sketches(path=LEAD_TIME_PATH, equipe=None):
+    """Lê a tabela gravada por sketches_table (só as linhas da equipe, se informada) de volta em sketches por dimensão"""
+    tabela = read_team_dataset(path, equipe).drop(columns='EQUIPE', errors='ignore')
+    return {
+        dimensao: parte.drop(columns='DIMENSAO').assign(VALOR=parte['VALOR'].astype('category'))
+        .sort_values(['SEMANA', 'VALOR', 'BALDE'], kind='stable', ignore_index=True)
+        for dimensao, parte in tabela.groupby('DIMENSAO', sort=False, observed=True)
+    }
+
+def merge_sketches(sketches, dimensao, inicio=None, fim=None, valores=None, por=('VALOR',)):
+    """Soma os sketches da dimensão nas semanas de [inicio, fim] por `por` e balde"""
+    sketch = sketches[dimensao]
+    # Semanas ordenadas: o período é uma fatia localizada por busca binária
+    semanas = sketch['SEMANA'].to_numpy()
+    i = 0 if inicio is None else np.searchsorted(semanas, _segunda(inicio).to_datetime64(), side='left')
+    j = len(semanas) if fim is None else np.searchsorted(semanas, _segunda(fim).to_datetime64(), side='right')
+    sketch = sketch.iloc[i:j]
+    if valores is not None:
+        sketch = sketch[sketch['VALOR'].isin(valores)]
+    return sketch.groupby(list(por) + ['BALDE'], sort=True, observed=True)['CONTAGEM'].sum()
+
+def sketch_quantiles(contagens, quantis=QUANTIS):
+    """Percentis (horas) e total de chamados de cada sketch (contagens indexadas por chave(s) e balde)"""
+    chaves = contagens.index.names[:-1]
+    if len(contagens) == 0:
+        return pd.DataFrame(columns=['Chamados'] + list(quantis), index=pd.MultiIndex.from_arrays(
+            [[]] * len(chaves), names=chaves) if len(chaves) > 1 else pd.Index([], name=chaves[0]))
+    grupos = contagens.groupby(level=chaves, sort=False)
+    acumulado = grupos.cumsum().to_numpy()
+    total = grupos.transform('sum').to_numpy()
+    baldes = contagens.index.get_level_values('BALDE').to_numpy()
+
+    resultado = {'Chamados': grupos.sum()}
+    for nome, q in quantis.items():
+        # Primeiro balde em que a contagem acumulada passa da posição do percentil
+        passou = acumulado > np.floor(q * (total - 1))
+        primeiro = pd.Series(np.where(passou, baldes, np.iinfo('int32').max), index=contagens.index) \
+            .groupby(level=chaves, sort=False).min()
+        resultado[nome] = pd.Series(bucket_value(primeiro.to_numpy()), index=primeiro.index)
+    return pd.DataFrame(resultado)
+
+def lead_time_percentiles(sketches, dimensao, inicio=None, fim=None, valores=None):
+    """Chamados e percentis (horas) por valor da dimensão no período, do mais volumoso ao menor"""
+    percentis = sketch_quantiles(merge_sketches(sketches, dimensao, inicio, fim, valores))
+    return percentis.sort_values('Chamados', ascending=False, kind='stable').rename_axis(dimensao).reset_index()
+
+def weekly_lead_time(sketches, responsavel='Todos', inicio=None, fim=None):
+    """Percentis (horas) semana a semana, da equipe ou de um responsável"""
+    valores = None if responsavel == 'Todos' else [responsavel]
+    return sketch_quantiles(merge_sketches(sketches, 'RESPONSAVEL', inicio, fim, valores, por=('SEMANA',)))
+
+def _segunda(data):
+    """Segunda-feira da semana da data"""
+    return pd.Timestamp(data).to_period('W-SUN').start_time
+
+# Equipe (df.attrs['equipe']) -> {'versao', 'sketches', 'lock'}
+_sketches = {}
+_lock = threading.Lock()
+
+def get_sketches(df, versao=None):
+    """Sketches compartilhados pelo processo, um conjunto por equipe (refeitos quando a versão dos dados muda)"""
+    with _lock:
+        estado = _sketches.setdefault(df.attrs.get('equipe'), {'versao': None, 'sketches': None,
+                                                               'lock': threading.Lock()})
+    with estado['lock']:
+        if estado['sketches'] is None or versao is None or versao != estado['versao']:
+            estado.update(versao=versao, sketches=build_sketches(df))
+        return estado['sketches']
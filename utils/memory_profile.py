@@ -0,0 +1,119 @@
+"""Perfil de memória por etapa com tracemalloc.
+
+Com o perfil ativo (perf.start_rerun(perfil_memoria=True)), cada etapa medida por
+utils.perf guarda o pico de memória e os locais do projeto que mais retiveram
+memória durante a etapa. Os relatórios são dicionários simples, gravados em JSON
+para comparação entre versões (compare_reports).
+"""
+import json
+import os
+import tracemalloc
+from datetime import datetime
+from functools import lru_cache
+import pandas as pd
+
+# Quadros guardados por alocação: o suficiente para sair do pandas e chegar no código do projeto.
+# O custo do tracemalloc cresce com a profundidade (com 12 quadros a preparação fica ~25x mais lenta).
+PROFUNDIDADE = 12
+TOP_LOCAIS = 10
+
+RAIZ_PROJETO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+_IGNORAR = (os.sep + 'site-packages' + os.sep, os.sep + 'dist-packages' + os.sep)
+_ARQUIVOS_INTERNOS = {os.path.abspath(__file__), os.path.join(RAIZ_PROJETO, 'utils', 'perf.py')}
+
+def start_tracing():
+    """Inicia o tracemalloc com quadros suficientes; retorna True se foi iniciado aqui"""
+    if tracemalloc.is_tracing():
+        return False
+    tracemalloc.start(PROFUNDIDADE)
+    return True
+
+def take_snapshot():
+    """Snapshot das alocações vivas (sem filter_traces, que é lento em heaps grandes)"""
+    return tracemalloc.take_snapshot()
+
+@lru_cache(maxsize=None)
+def _arquivo_do_projeto(nome_arquivo):
+    """Caminho relativo se o arquivo é do projeto (fora de site-packages e do perfilador), senão None"""
+    # Módulos congelados ('<frozen ...>') e código gerado não têm caminho absoluto
+    if not os.path.isabs(nome_arquivo):
+        return None
+    arquivo = os.path.abspath(nome_arquivo)
+    if (not arquivo.startswith(RAIZ_PROJETO + os.sep) or arquivo in _ARQUIVOS_INTERNOS
+            or any(trecho in arquivo for trecho in _IGNORAR)):
+        return None
+    return os.path.relpath(arquivo, RAIZ_PROJETO)
+
+def _local_no_projeto(traceback):
+    """Quadro mais interno que pertence ao projeto"""
+    for frame in reversed(traceback):
+        arquivo = _arquivo_do_projeto(frame.filename)
+        if arquivo is not None:
+            return f"{arquivo}:{frame.lineno}"
+    return None
+
+def top_call_sites(inicio, fim, limite=TOP_LOCAIS):
+    """Locais do projeto com maior crescimento de memória entre dois snapshots"""
+    por_local = {}
+    for stat in fim.compare_to(inicio, 'traceback'):
+        if stat.size_diff <= 0:
+            continue
+        local = _local_no_projeto(stat.traceback) or '(fora do projeto)'
+        atual = por_local.setdefault(local, {'local': local, 'bytes': 0, 'blocos': 0})
+        atual['bytes'] += stat.size_diff
+        atual['blocos'] += stat.count_diff
+    return sorted(por_local.values(), key=lambda item: item['bytes'], reverse=True)[:limite]
+
+def build_report(registro, descricao=None):
+    """Relatório de uma execução medida por utils.perf com perfil de memória"""
+    etapas = []
+    for etapa in registro.etapas:
+        etapas.append({
+            'etapa': etapa.nome,
+            'tempo_ms': round(etapa.tempo_s * 1000, 2),
+            'linhas_entrada': etapa.linhas_entrada,
+            'linhas_saida': etapa.linhas_saida,
+            'pico_bytes': etapa.bytes_alocados,
+            'retido_bytes': etapa.bytes_retidos,
+            'principais_locais': etapa.principais_locais or [],
+        })
+    picos = [etapa['pico_bytes'] for etapa in etapas if etapa['pico_bytes'] is not None]
+    return {
+        'data': datetime.fromtimestamp(registro.inicio).isoformat(timespec='seconds'),
+        'descricao': descricao,
+        'tempo_total_ms': round(registro.tempo_s * 1000, 2) if registro.tempo_s is not None else None,
+        'pico_bytes': max(picos) if picos else None,
+        'etapas': etapas,
+    }
+
+def write_report(relatorio, caminho):
+    """Grava o relatório em JSON"""
+    with open(caminho, 'w', encoding='utf-8') as arquivo:
+        json.dump(relatorio, arquivo, indent=2, ensure_ascii=False)
+    return caminho
+
+def dump_report(relatorio, pasta):
+    """Grava o relatório com nome datado na pasta informada e retorna o caminho"""
+    os.makedirs(pasta, exist_ok=True)
+    nome = f"perfil_memoria_{datetime.now().strftime('%Y%m%d_%H%M%S_%f')}.json"
+    return write_report(relatorio, os.path.join(pasta, nome))
+
+def load_report(caminho):
+    with open(caminho, encoding='utf-8') as arquivo:
+        return json.load(arquivo)
+
+def compare_reports(anterior, atual):
+    """Pico e memória retida por etapa (MB) entre dois relatórios, com a razão atual/anterior"""
+    def por_etapa(relatorio):
+        return pd.DataFrame(relatorio['etapas']).set_index('etapa')[['pico_bytes', 'retido_bytes']]
+
+    base = por_etapa(anterior)
+    novo = por_etapa(atual)
+    comparacao = pd.DataFrame({
+        'pico_anterior_mb': base['pico_bytes'] / 1024 ** 2,
+        'pico_atual_mb': novo['pico_bytes'] / 1024 ** 2,
+        'retido_anterior_mb': base['retido_bytes'] / 1024 ** 2,
+        'retido_atual_mb': novo['retido_bytes'] / 1024 ** 2,
+    })
+    comparacao['razao_pico'] = comparacao['pico_atual_mb'] / comparacao['pico_anterior_mb']
+    return comparacao.round(3)
@@ -0,0 +1,195 @@
+import time
+import tracemalloc
+import contextvars
+from contextlib import contextmanager
+from datetime import datetime
+from functools import wraps
+import pandas as pd
+from utils import memory_profile
+
+# Execução (rerun) em andamento na thread/contexto atual
+_execucao_atual = contextvars.ContextVar('execucao_perf', default=None)
+
+class StageRecord:
+    """Medição de uma etapa: tempo, linhas de entrada/saída e bytes alocados"""
+
+    def __init__(self, nome, linhas_entrada=None):
+        self.nome = nome
+        self.linhas_entrada = linhas_entrada
+        self.linhas_saida = None
+        self.tempo_s = None
+        self.fim_s = None
+        self.bytes_alocados = None
+        self.bytes_retidos = None
+        self.principais_locais = None
+        self._inicio = None
+        self._memoria_inicio = None
+        self._snapshot_inicio = None
+        self._pico_parcial = 0
+
+    def set_output(self, saida):
+        """Registra as linhas de saída da etapa (DataFrame, Series ou número)"""
+        self.linhas_saida = _contar_linhas(saida)
+        return saida
+
+    def as_dict(self):
+        return {
+            'etapa': self.nome,
+            'tempo_ms': round(self.tempo_s * 1000, 2) if self.tempo_s is not None else None,
+            'linhas_entrada': self.linhas_entrada,
+            'linhas_saida': self.linhas_saida,
+            'bytes_alocados': self.bytes_alocados,
+        }
+
+class RerunRecord:
+    """Conjunto de etapas medidas em uma execução do script"""
+
+    def __init__(self, medir_memoria=False, perfil_memoria=False):
+        self.inicio = time.time()
+        self._relogio = time.perf_counter()
+        self.tempo_s = None
+        self.etapas = []
+        self.contadores = {}
+        self.medir_memoria = medir_memoria or perfil_memoria
+        self.perfil_memoria = perfil_memoria
+        self._pilha = []
+        self._iniciou_tracemalloc = False
+
+    def count(self, nome, valor=1):
+        """Incrementa um contador da execução (ex.: bytes enviados, cache hits)"""
+        self.contadores[nome] = self.contadores.get(nome, 0) + valor
+
+    def as_frame(self):
+        return pd.DataFrame([etapa.as_dict() for etapa in self.etapas])
+
+def _contar_linhas(obj):
+    if obj is None:
+        return None
+    if isinstance(obj, int):
+        return obj
+    try:
+        return len(obj)
+    except TypeError:
+        return None
+
+def start_rerun(medir_memoria=False, perfil_memoria=False):
+    """Inicia a medição de uma execução (chamar no começo do script)
+
+    perfil_memoria também guarda, por etapa, a memória retida e os locais do projeto
+    que mais alocaram (snapshots do tracemalloc; bem mais lento).
+    """
+    registro = RerunRecord(medir_memoria, perfil_memoria)
+    if perfil_memoria:
+        registro._iniciou_tracemalloc = memory_profile.start_tracing()
+    elif medir_memoria and not tracemalloc.is_tracing():
+        tracemalloc.start()
+        registro._iniciou_tracemalloc = True
+    _execucao_atual.set(registro)
+    return registro
+
+def finish_rerun():
+    """Finaliza a execução atual e retorna o registro (ou None se não havia medição)"""
+    registro = _execucao_atual.get()
+    if registro is None:
+        return None
+    registro.tempo_s = time.time() - registro.inicio
+    if registro._iniciou_tracemalloc:
+        tracemalloc.stop()
+    _execucao_atual.set(None)
+    return registro
+
+def current_rerun():
+    """Execução sendo medida no contexto atual (ou None)"""
+    return _execucao_atual.get()
+
+def count(nome, valor=1):
+    """Incrementa um contador na execução atual, se houver"""
+    registro = _execucao_atual.get()
+    if registro is not None:
+        registro.count(nome, valor)
+
+@contextmanager
+def stage(nome, entrada=None):
+    """Mede uma etapa do script; sem execução ativa, apenas repassa o controle"""
+    registro = _execucao_atual.get()
+    etapa = StageRecord(nome, _contar_linhas(entrada))
+    if registro is None:
+        yield etapa
+        return
+
+    medir_memoria = registro.medir_memoria and tracemalloc.is_tracing()
+    perfil_memoria = medir_memoria and registro.perfil_memoria
+    if medir_memoria:
+        # reset_peak abaixo apagaria o pico da etapa externa até aqui: guardar antes
+        _guardar_pico_externo(registro, tracemalloc.get_traced_memory()[1])
+        if perfil_memoria:
+            etapa._snapshot_inicio = memory_profile.take_snapshot()
+        etapa._memoria_inicio = tracemalloc.get_traced_memory()[0]
+        tracemalloc.reset_peak()
+    registro._pilha.append(etapa)
+    etapa._inicio = time.perf_counter()
+    try:
+        yield etapa
+    finally:
+        fim = time.perf_counter()
+        etapa.tempo_s = fim - etapa._inicio
+        # Instante em que a etapa terminou, contado do início da execução
+        etapa.fim_s = fim - registro._relogio
+        registro._pilha.pop()
+        if medir_memoria:
+            atual, pico = tracemalloc.get_traced_memory()
+            pico = max(pico, etapa._pico_parcial)
+            etapa.bytes_alocados = max(pico - etapa._memoria_inicio, 0)
+            etapa.bytes_retidos = atual - etapa._memoria_inicio
+            if perfil_memoria:
+                etapa.principais_locais = memory_profile.top_call_sites(
+                    etapa._snapshot_inicio, memory_profile.take_snapshot())
+                etapa._snapshot_inicio = None
+            _guardar_pico_externo(registro, pico)
+            # Os snapshots não entram no pico da etapa externa
+            tracemalloc.reset_peak()
+        registro.etapas.append(etapa)
+
+def _guardar_pico_externo(registro, pico):
+    if registro._pilha:
+        pai = registro._pilha[-1]
+        pai._pico_parcial = max(pai._pico_parcial, pico)
+
+def timed_stage(nome):
+    """Decorator: mede a função como etapa (entrada = 1º argumento, saída = retorno)"""
+    def decorator(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            with stage(nome, args[0] if args else None) as etapa:
+                return etapa.set_output(func(*args, **kwargs))
+        return wrapper
+    return decorator
+
+def history_frame(historico):
+    """Tabela com uma linha por execução e o tempo (ms) de cada etapa nas colunas"""
+    linhas = []
+    for registro in historico:
+        linha = {
+            'Execução': datetime.fromtimestamp(registro.inicio).strftime('%H:%M:%S'),
+            'Total (ms)': round(registro.tempo_s * 1000, 1) if registro.tempo_s is not None else None,
+        }
+        for etapa in registro.etapas:
+            linha[etapa.nome] = round(linha.get(etapa.nome, 0) + etapa.tempo_s * 1000, 1)
+        linhas.append(linha)
+    return pd.DataFrame(linhas)
+
+def rolling_percentiles(historico, percentis=(50, 95)):
+    """p50/p95 (ms) por etapa sobre as últimas execuções"""
+    tempos = [
+        {'etapa': etapa.nome, 'tempo_ms': etapa.tempo_s * 1000}
+        for registro in historico for etapa in registro.etapas
+    ]
+    if not tempos:
+        return pd.DataFrame(columns=['etapa', 'execuções'] + [f"p{p} (ms)" for p in percentis])
+
+    df = pd.DataFrame(tempos)
+    agrupado = df.groupby('etapa', sort=False)['tempo_ms']
+    resultado = agrupado.size().rename('execuções').to_frame()
+    for p in percentis:
+        resultado[f"p{p} (ms)"] = agrupado.quantile(p / 100).round(1)
+    return resultado.sort_values(f"p{percentis[-1]} (ms)", ascending=False).reset_index()
@@ -0,0 +1,184 @@
+"""Backend opcional em Polars para a ingestão e a parte estática da preparação.
+
+Com DASHBOARD_BACKEND=polars e o pacote polars instalado, o merge das planilhas, a
+consolidação das colunas, a DATA_ALVO e a preparação que não depende da data (categoria e
+ícone do status, SLA_VIOLADO) viram planos em LazyFrames: o Polars otimiza o plano inteiro
+e executa em todos os núcleos. O pandas só aparece nas pontas (leitura do Excel/parquet e
+o DataFrame entregue à renderização), e o resultado é o mesmo do caminho em pandas, que é
+o padrão e o usado sem o pacote (ver benchmarks/polars_parity.py).
+"""
+import logging
+import threading
+import numpy as np
+import pandas as pd
+from config.settings import BACKEND_DADOS, EQUIPE_PADRAO
+from utils.ingest import COLUNAS_REQ, COLUNAS_MINHA, RENOMEAR_MINHA, CONSOLIDACAO, MAPEAMENTO_COLUNAS
+from utils.data_processor import STATUS_MAPPING, STATUS_OUTROS
+
+logger = logging.getLogger(__name__)
+
+# Colunas convertidas com pd.to_datetime pela preparação em pandas
+COLUNAS_DATAS_PREPARO = ['DATA_ABERTURA', 'DATA_ALVO', 'DATA_RESOLUCAO', 'DATA_PREV_SOLUCAO', 'Data Esperada']
+
+# Prioridade da DATA_ALVO (mesma regra de utils.ingest.add_data_alvo)
+PRIORIDADE_DATA_ALVO = ['Data Esperada', 'DATA_QUEBRA_SLA', 'DATA_PREV_SOLUCAO']
+
+_estado = {'backend': BACKEND_DADOS, 'polars': None, 'verificado': False}
+_lock = threading.Lock()
+
+def configure(backend=BACKEND_DADOS):
+    """Define o backend da ingestão/preparação ('pandas' ou 'polars'); por padrão, o de DASHBOARD_BACKEND"""
+    with _lock:
+        _estado.update(backend=backend, polars=None, verificado=False)
+
+def load_polars():
+    """Módulo polars (RuntimeError se o pacote não estiver instalado)"""
+    try:
+        import polars
+    except ImportError:
+        raise RuntimeError("O pacote polars não está instalado (pip install polars)")
+    return polars
+
+def _polars():
+    """Módulo polars se ele for o backend escolhido e estiver instalado (senão None)"""
+    with _lock:
+        if not _estado['verificado']:
+            _estado['verificado'] = True
+            if _estado['backend'] == 'polars':
+                try:
+                    _estado['polars'] = load_polars()
+                except RuntimeError:
+                    logger.warning("Backend polars escolhido, mas o pacote polars não está instalado; usando pandas.")
+        return _estado['polars']
+
+def enabled():
+    """True quando a ingestão e a preparação devem usar o Polars"""
+    return _polars() is not None
+
+def process_exports(df_req, df_req_minha):
+    """Mesma saída de utils.ingest.process_data_original_logic, em um único plano (chaves já normalizadas)"""
+    pl = load_polars()
+    df_req_minha = _coerce_dates(df_req_minha, ['Data Esperada'])
+    return _to_pandas(_data_alvo(pl, _merge(pl, df_req, df_req_minha)).collect())
+
+def merge_exports(df_req, df_req_minha):
+    """Mesma saída de utils.ingest.merge_exports (chaves já normalizadas por utils.ingest.guard_merge_keys)"""
+    pl = load_polars()
+    return _to_pandas(_merge(pl, df_req, df_req_minha).collect())
+
+def add_data_alvo(df_final):
+    """Mesma saída de utils.ingest.add_data_alvo"""
+    pl = load_polars()
+    df_final = _coerce_dates(df_final, ['Data Esperada'])
+    return _to_pandas(_data_alvo(pl, pl.from_pandas(df_final).lazy()).collect())
+
+def prepare_static(df):
+    """Mesma saída de utils.data_processor._prepare_static para um DataFrame que já tem DATA_ALVO"""
+    pl = load_polars()
+    entrada = _coerce_dates(df, COLUNAS_DATAS_PREPARO)
+    # Só as colunas usadas vão para o Polars; as demais (inclusive as category do esquema) seguem intactas
+    usadas = ['DATA_ALVO', 'STATUS'] + [col for col in ['SLA_VIOLADO'] if col in entrada.columns]
+    plano = pl.from_pandas(entrada[usadas]).lazy().with_row_index('__linha').filter(pl.col('DATA_ALVO').is_not_null())
+
+    # Categoria e ícone: status sem espaços nas pontas; vazio ou fora do mapeamento é OUTROS
+    status = pl.col('STATUS').cast(pl.String).str.strip_chars().fill_null('Desconhecido')
+    colunas = [
+        status.replace_strict({nome: info['categoria'] for nome, info in STATUS_MAPPING.items()},
+                              default=STATUS_OUTROS['categoria'], return_dtype=pl.String).alias('STATUS_CATEGORIA'),
+        status.replace_strict({nome: info['icone'] for nome, info in STATUS_MAPPING.items()},
+                              default=STATUS_OUTROS['icone'], return_dtype=pl.String).alias('STATUS_ICONE'),
+    ]
+    sla_booleano = 'SLA_VIOLADO' in usadas and plano.collect_schema()['SLA_VIOLADO'] == pl.Boolean
+    if sla_booleano:
+        colunas.append(pl.col('SLA_VIOLADO').fill_null(False))
+
+    resultado = plano.select(['__linha'] + colunas).collect()
+    preparado = entrada.iloc[resultado['__linha'].to_numpy()]
+    novas = _to_pandas(resultado.drop('__linha'))
+    novas.index = preparado.index
+    if 'SLA_VIOLADO' not in usadas:
+        novas['SLA_VIOLADO'] = False
+    elif not sla_booleano:
+        # Valores que não são booleanos (ex.: texto) seguem a conversão do pandas
+        novas['SLA_VIOLADO'] = preparado['SLA_VIOLADO'].fillna(False).astype(bool)
+    preparado = preparado.assign(**{col: novas[col] for col in novas.columns})
+    preparado.attrs = dict(df.attrs)
+    return preparado
+
+def _merge(pl, df_req, df_req_minha):
+    """Plano do merge das planilhas (mesmas regras e ordem de linhas/colunas de utils.ingest.merge_exports)"""
+    colunas_req = [col for col in COLUNAS_REQ if col in df_req.columns]
+    req = pl.from_pandas(df_req[colunas_req + [col for col in ['RESOLVEDOR_PADRAO'] if col in df_req.columns]]).lazy()
+    minha = pl.from_pandas(df_req_minha[[col for col in COLUNAS_MINHA if col in df_req_minha.columns]]).lazy()
+
+    # Outras equipes: só os dados do relatório geral (sem os chamados da planilha da equipe)
+    outras = None
+    if 'RESOLVEDOR_PADRAO' in df_req.columns:
+        da_equipe = (pl.col('RESOLVEDOR_PADRAO') == EQUIPE_PADRAO).fill_null(False)
+        filtro = ~da_equipe
+        if 'NUM_CHAMADO' in df_req.columns and 'Requisição de Serviço' in df_req_minha.columns:
+            chamados_minha = pl.from_pandas(df_req_minha['Requisição de Serviço'])
+            filtro = filtro & ~pl.col('NUM_CHAMADO').is_in(chamados_minha)
+        outras = req.filter(filtro).rename({'RESOLVEDOR_PADRAO': 'EQUIPE'}).with_columns(
+            pl.col('EQUIPE').fill_null('Sem Equipe'))
+        req = req.filter(da_equipe).drop('RESOLVEDOR_PADRAO')
+
+    minha = minha.rename({col: novo for col, novo in RENOMEAR_MINHA.items() if col in df_req_minha.columns})
+    colunas_minha = minha.collect_schema().names()
+    # Mesma construção do caminho em pandas: a ordem das colunas novas é a do conjunto
+    colunas_novas = set(colunas_minha) - set(colunas_req)
+
+    if 'NUM_CHAMADO' in colunas_req or 'NUM_CHAMADO' in colunas_minha:
+        # OUTER JOIN ordenado pela chave, como o pd.merge(how='outer'); 1:1, as chaves já não se repetem
+        final = (
+            req.join(minha.select(['NUM_CHAMADO'] + list(colunas_novas)),
+                     on='NUM_CHAMADO', how='full', coalesce=True, validate='1:1')
+            .sort('NUM_CHAMADO', nulls_last=True, maintain_order=True)
+        )
+        esquema = final.collect_schema()
+        for destino, origem, prioridade_minha in CONSOLIDACAO:
+            if origem not in esquema:
+                continue
+            if destino not in esquema:
+                final = final.with_columns(pl.col(origem).alias(destino))
+            elif prioridade_minha:
+                final = final.with_columns(pl.coalesce(origem, destino).cast(esquema[origem]).alias(destino))
+            else:
+                final = final.with_columns(pl.coalesce(destino, origem).cast(esquema[destino]).alias(destino))
+            esquema = final.collect_schema()
+    else:
+        final = req
+
+    final = final.with_columns(pl.lit(EQUIPE_PADRAO).alias('EQUIPE'))
+    if outras is not None:
+        final = pl.concat([final, outras], how='diagonal_relaxed')
+
+    # Tratar colunas nulas essenciais
+    esquema = final.collect_schema()
+    preencher = {'RESPONSAVEL': 'Sem Responsável', 'SOLICITANTE': 'N/A'}
+    return final.with_columns([pl.col(col).fill_null(valor) for col, valor in preencher.items() if col in esquema])
+
+def _data_alvo(pl, plano):
+    """Plano da DATA_ALVO (Data Esperada > DATA_QUEBRA_SLA > DATA_PREV_SOLUCAO) e padronização dos nomes"""
+    esquema = plano.collect_schema()
+    fontes = [col for col in PRIORIDADE_DATA_ALVO if col in esquema]
+    data_alvo = pl.coalesce(fontes) if fontes else pl.lit(None)
+    plano = plano.with_columns(data_alvo.alias('DATA_ALVO'))
+    return plano.rename({col: novo for col, novo in MAPEAMENTO_COLUNAS.items() if col in esquema})
+
+def _coerce_dates(df, colunas):
+    """Converte com pd.to_datetime (como o pandas) as colunas que ainda não são datas"""
+    converter = [col for col in colunas if col in df.columns and not pd.api.types.is_datetime64_any_dtype(df[col])]
+    if not converter:
+        return df
+    return df.assign(**{col: pd.to_datetime(df[col], errors='coerce') for col in converter})
+
+def _to_pandas(quadro):
+    """DataFrame do pandas com os mesmos valores ausentes do caminho em pandas"""
+    pl = load_polars()
+    df = quadro.to_pandas()
+    # Booleanos com nulos viram object: o pandas marca os ausentes com NaN, o Arrow com None
+    for coluna, tipo in quadro.schema.items():
+        if tipo == pl.Boolean and quadro[coluna].null_count() > 0:
+            df[coluna] = df[coluna].where(df[coluna].notna(), np.nan)
+    return df
@@ -0,0 +1,47 @@
+"""Esquema tipado e versionado do parquet dos chamados (requisicoes_data.parquet).
+
+Os tipos são garantidos na gravação: datas em datetime64, SLA_VIOLADO booleano e as colunas
+de poucos valores repetidos (status, responsável, empresa, UF e equipe) como category. Assim,
+a leitura já devolve as colunas prontas, sem conversões. A versão do esquema fica nos
+metadados do arquivo; arquivos de uma versão anterior são atualizados uma vez (ver
+utils.store.upgrade_ticket_dataset).
+"""
+import pandas as pd
+
+# Muda quando os tipos gravados mudam; arquivos com versão menor são regravados
+VERSAO_ESQUEMA = 1
+
+# Chave dos metadados do parquet com a versão do esquema
+CHAVE_ESQUEMA = b'versao_esquema'
+
+COLUNAS_DATA = ['DATA_ABERTURA', 'DATA_PREV_SOLUCAO', 'DATA_QUEBRA_SLA', 'DATA_RESOLUCAO', 'DATA_FECHAMENTO',
+                'Data Esperada', 'DATA_ALVO', 'DATA_ABERTURA_MINHA', 'DATA_RESOLUCAO_MINHA',
+                'DATA_PREV_SOLUCAO_MINHA']
+TIPO_DATA = 'datetime64[us]'
+
+COLUNAS_BOOLEANAS = ['SLA_VIOLADO']
+
+COLUNAS_CATEGORIA = ['STATUS', 'RESPONSAVEL', 'EMPRESA_SOLICITANTE', 'CLIENTE_UF', 'EQUIPE']
+
+def apply_schema(df):
+    """Cópia rasa do DataFrame com os tipos do esquema (colunas ausentes são ignoradas)"""
+    tipos = {}
+    for coluna in COLUNAS_DATA:
+        if coluna in df.columns and df[coluna].dtype != TIPO_DATA:
+            tipos[coluna] = pd.to_datetime(df[coluna], errors='coerce').astype(TIPO_DATA)
+    for coluna in COLUNAS_BOOLEANAS:
+        if coluna in df.columns and df[coluna].dtype != bool:
+            tipos[coluna] = df[coluna].fillna(False).astype(bool)
+    for coluna in COLUNAS_CATEGORIA:
+        if coluna in df.columns and not isinstance(df[coluna].dtype, pd.CategoricalDtype):
+            tipos[coluna] = df[coluna].astype('category')
+    return df.assign(**tipos) if tipos else df
+
+def schema_metadata():
+    """Metadados gravados junto com os dados tipados"""
+    return {CHAVE_ESQUEMA: str(VERSAO_ESQUEMA).encode('utf-8')}
+
+def metadata_version(metadados):
+    """Versão do esquema nos metadados de um parquet (0 para arquivos anteriores ao esquema)"""
+    metadados = metadados or {}
+    return int(metadados[CHAVE_ESQUEMA]) if CHAVE_ESQUEMA in metadados else 0
@@ -0,0 +1,95 @@
+"""Radar de SLA: chamados em aberto com prazo (quebra do SLA ou previsão de solução) próximo.
+
+Para cada coluna de prazo, as datas dos chamados em aberto ficam em um vetor ordenado.
+Uma consulta "vence entre agora e agora + horizonte" são duas buscas binárias
+(searchsorted) e uma fatia do vetor; só os chamados da fatia são lidos. O índice é
+montado uma vez por versão dos dados, e a consulta usa o horário do momento.
+"""
+import threading
+import numpy as np
+import pandas as pd
+
+STATUS_FINALIZADOS = ['Resolvido', 'Fechado', 'Cancelado']
+
+# Coluna de prazo -> rótulo exibido
+PRAZOS = {
+    'DATA_QUEBRA_SLA': "Quebra do SLA",
+    'DATA_PREV_SOLUCAO': "Previsão de solução",
+}
+
+COLUNAS_CHAMADO = ['REQUISICAO', 'RESPONSAVEL', 'STATUS', 'RESUMO', 'EMPRESA_SOLICITANTE']
+
+class DueDateIndex:
+    """Prazos dos chamados em aberto ordenados por data, um vetor por coluna de prazo"""
+
+    def __init__(self, df):
+        abertos = df[~df['STATUS'].isin(STATUS_FINALIZADOS)]
+        colunas = [coluna for coluna in COLUNAS_CHAMADO + list(PRAZOS) if coluna in abertos.columns]
+        self.chamados = abertos[colunas].reset_index(drop=True)
+        self.prazos = {}
+        for coluna in PRAZOS:
+            if coluna not in self.chamados.columns:
+                continue
+            datas = self.chamados[coluna].to_numpy(dtype='datetime64[ns]')
+            linhas = np.flatnonzero(~np.isnat(datas))
+            ordem = np.argsort(datas[linhas], kind='stable')
+            self.prazos[coluna] = (datas[linhas][ordem], linhas[ordem])
+
+    def _fatia(self, coluna, inicio=None, fim=None):
+        """Posições (nos chamados) com prazo em [inicio, fim]; sem limites, o vetor inteiro"""
+        datas, linhas = self.prazos[coluna]
+        i = 0 if inicio is None else np.searchsorted(datas, np.datetime64(pd.Timestamp(inicio), 'ns'), side='left')
+        j = len(datas) if fim is None else np.searchsorted(datas, np.datetime64(pd.Timestamp(fim), 'ns'), side='right')
+        return linhas[i:j]
+
+    def overdue_counts(self, agora, responsavel='Todos'):
+        """Chamados em aberto com cada prazo já vencido"""
+        contagem = {}
+        for coluna in self.prazos:
+            linhas = self._fatia(coluna, fim=agora - pd.Timedelta(1, 'ns'))
+            if responsavel != 'Todos':
+                linhas = linhas[self.chamados['RESPONSAVEL'].to_numpy()[linhas] == responsavel]
+            contagem[coluna] = len(linhas)
+        return contagem
+
+    def at_risk(self, agora, horizonte, responsavel='Todos'):
+        """Chamados com algum prazo entre `agora` e `agora + horizonte`, do prazo mais próximo ao mais distante"""
+        fim = agora + horizonte
+        linhas = np.unique(np.concatenate(
+            [self._fatia(coluna, agora, fim) for coluna in self.prazos] + [np.array([], dtype='int64')]))
+        em_risco = self.chamados.iloc[linhas]
+        if responsavel != 'Todos':
+            em_risco = em_risco[em_risco['RESPONSAVEL'] == responsavel]
+
+        # Prazo da janela mais próximo de cada chamado e de qual coluna ele vem
+        prazos = pd.DataFrame({
+            coluna: em_risco[coluna].where((em_risco[coluna] >= agora) & (em_risco[coluna] <= fim))
+            for coluna in self.prazos
+        }, index=em_risco.index)
+        em_risco = em_risco.assign(
+            PROXIMO_PRAZO=prazos.min(axis=1),
+            TIPO_PRAZO=prazos.idxmin(axis=1).map(PRAZOS) if len(prazos) else pd.Series(dtype='str'),
+        )
+        em_risco['HORAS_RESTANTES'] = ((em_risco['PROXIMO_PRAZO'] - agora).dt.total_seconds() / 3600).round(1)
+        return em_risco.sort_values('PROXIMO_PRAZO', kind='stable').reset_index(drop=True)
+
+def summarize_by_responsavel(em_risco):
+    """Chamados em risco por responsável e o prazo mais próximo de cada um"""
+    return em_risco.groupby('RESPONSAVEL', sort=False).agg(
+        Chamados=('REQUISICAO', 'count'),
+        Proximo_Prazo=('PROXIMO_PRAZO', 'min'),
+    ).sort_values(['Chamados', 'Proximo_Prazo'], ascending=[False, True]).reset_index()
+
+# Equipe (df.attrs['equipe']) -> {'versao', 'indice', 'lock'}
+_indice = {}
+_lock = threading.Lock()
+
+def get_due_index(df, versao=None):
+    """Índice de prazos compartilhado pelo processo, um por equipe (refeito quando a versão dos dados muda)"""
+    with _lock:
+        estado = _indice.setdefault(df.attrs.get('equipe'), {'versao': None, 'indice': None,
+                                                             'lock': threading.Lock()})
+    with estado['lock']:
+        if estado['indice'] is None or versao is None or versao != estado['versao']:
+            estado.update(versao=versao, indice=DueDateIndex(df))
+        return estado['indice']
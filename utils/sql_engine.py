@@ -0,0 +1,93 @@
+"""Motor SQL embutido (DuckDB) para agregações sobre todo o histórico, opcional.
+
+Com DASHBOARD_MOTOR=duckdb e o pacote duckdb instalado, as agregações que varrem todo o
+histórico (ex.: utils.trends) são feitas por consultas SQL e usam todos os núcleos. O DuckDB
+lê tabelas Arrow: as colunas usadas do DataFrame em memória são convertidas uma vez por versão
+dos dados preparados e equipe (arrow_table) e a mesma tabela serve a todas as consultas dessa versão; as
+colunas de texto já são Arrow no pandas, as demais são copiadas nessa conversão. As consultas só agrupam e
+contam; o acabamento (reindexação, taxas, arredondamento) continua em pandas, então os
+resultados são os mesmos do caminho em pandas, que é o padrão e o usado sem o pacote.
+"""
+import logging
+import threading
+import pyarrow as pa
+from config.settings import MOTOR_CONSULTAS
+
+logger = logging.getLogger(__name__)
+
+_estado = {'motor': MOTOR_CONSULTAS, 'conexao': None, 'verificado': False}
+_lock = threading.Lock()
+
+def configure(motor=MOTOR_CONSULTAS):
+    """Define o motor das agregações ('pandas' ou 'duckdb'); por padrão, o de DASHBOARD_MOTOR"""
+    with _lock:
+        _estado.update(motor=motor, conexao=None, verificado=False)
+
+def connect():
+    """Nova conexão DuckDB em memória (RuntimeError se o pacote não estiver instalado)"""
+    try:
+        import duckdb
+    except ImportError:
+        raise RuntimeError("O pacote duckdb não está instalado (pip install duckdb)")
+    return duckdb.connect()
+
+def _conexao():
+    """Conexão DuckDB do processo (None se o motor não for o DuckDB ou o pacote não estiver instalado)"""
+    with _lock:
+        if not _estado['verificado']:
+            _estado['verificado'] = True
+            if _estado['motor'] == 'duckdb':
+                try:
+                    _estado['conexao'] = connect()
+                except RuntimeError:
+                    logger.warning("Motor duckdb escolhido, mas o pacote duckdb não está instalado; usando pandas.")
+        return _estado['conexao']
+
+def enabled():
+    """True quando as agregações devem usar o DuckDB"""
+    return _conexao() is not None
+
+# (Equipe (df.attrs['equipe']), colunas) -> {'versao', 'tabela', 'lock'}
+_tabelas = {}
+
+def arrow_table(df, colunas, versao=None):
+    """Colunas do DataFrame como tabela Arrow, convertidas uma vez por `versao` e equipe
+
+    A `versao` tem de mudar sempre que o conteúdo das colunas muda: com colunas que dependem da
+    data (ex.: SEMANA_ALVO), a dos dados preparados (utils.data_processor.prepared_version), não só
+    a do parquet. Sem `versao` (dados que não vieram do parquet), converte a cada chamada.
+    """
+    if versao is None:
+        return pa.Table.from_pandas(df[colunas], preserve_index=False)
+    with _lock:
+        estado = _tabelas.setdefault((df.attrs.get('equipe'), tuple(colunas)),
+                                     {'versao': None, 'tabela': None, 'lock': threading.Lock()})
+    with estado['lock']:
+        if estado['tabela'] is None or versao != estado['versao']:
+            estado.update(versao=versao, tabela=pa.Table.from_pandas(df[colunas], preserve_index=False))
+        return estado['tabela']
+
+def query(sql, parametros=None, conexao=None, **tabelas):
+    """Executa a consulta e devolve um DataFrame
+
+    Cada argumento nomeado vira uma tabela da consulta: uma tabela Arrow (lida sem cópia; ver
+    arrow_table), um DataFrame (convertido para Arrow a cada chamada) ou o caminho de um parquet
+    (lido direto do arquivo, só as colunas e row groups usados).
+    """
+    base = conexao or _conexao()
+    if base is None:
+        raise RuntimeError("Motor SQL indisponível: defina DASHBOARD_MOTOR=duckdb e instale o pacote duckdb")
+    # Um cursor por consulta: as sessões do Streamlit consultam em threads diferentes
+    cursor = base.cursor()
+    try:
+        for nome, tabela in tabelas.items():
+            if isinstance(tabela, str):
+                cursor.read_parquet(tabela).create_view(nome)
+            elif isinstance(tabela, pa.Table):
+                cursor.register(nome, tabela)
+            else:
+                # Via Arrow: as colunas de texto do pandas já são Arrow e não são convertidas
+                cursor.register(nome, pa.Table.from_pandas(tabela, preserve_index=False))
+        return cursor.execute(sql, parametros or []).df()
+    finally:
+        cursor.close()
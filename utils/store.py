@@ -0,0 +1,104 @@
+import json
+import logging
+import os
+import threading
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+from config.settings import EQUIPE_PADRAO
+from utils.schema import VERSAO_ESQUEMA, apply_schema, schema_metadata, metadata_version
+
+logger = logging.getLogger(__name__)
+
+# Arquivos persistidos pelo sistema
+DATA_PATH = "requisicoes_data.parquet"
+AGGREGATES_PATH = "agregados_semanais.parquet"
+# Sketches do tempo até a resolução por semana (utils.lead_time)
+LEAD_TIME_PATH = "sketches_tempo_resolucao.parquet"
+# Pasta do histórico de alterações dos chamados (utils.history)
+HISTORY_PATH = "historico_chamados"
+
+def write_dataset(df, path=DATA_PATH):
+    """Salva o parquet de forma atômica (arquivo temporário + troca)"""
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    df.to_parquet(tmp_path, index=False)
+    os.replace(tmp_path, path)
+    return path
+
+# Chave dos metadados do parquet com a lista de equipes gravadas
+CHAVE_EQUIPES = b'equipes'
+
+def write_team_dataset(df, path=DATA_PATH, metadados=None):
+    """Salva o parquet ordenado por EQUIPE, com row groups separados por equipe (arquivo temporário + troca)
+
+    Cada equipe ocupa só os seus row groups: a leitura de uma equipe (read_team_dataset)
+    pula os das demais. A lista de equipes (e os `metadados` extras) ficam nos metadados do arquivo.
+    """
+    df = df.sort_values('EQUIPE', kind='stable', ignore_index=True)
+    # Linhas de cada equipe, contíguas após a ordenação (mesma ordem do sort)
+    tamanhos = df.groupby('EQUIPE', sort=True).size()
+    tabela = pa.Table.from_pandas(df, preserve_index=False)
+    tabela = tabela.replace_schema_metadata({**(tabela.schema.metadata or {}), **(metadados or {}),
+                                             CHAVE_EQUIPES: json.dumps(tamanhos.index.tolist()).encode('utf-8')})
+
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with pq.ParquetWriter(tmp_path, tabela.schema) as arquivo:
+        inicio = 0
+        for tamanho in tamanhos:
+            arquivo.write_table(tabela.slice(inicio, tamanho))
+            inicio += tamanho
+    os.replace(tmp_path, path)
+    return path
+
+def write_ticket_dataset(df, path=DATA_PATH):
+    """Salva o parquet dos chamados com os tipos do esquema (utils.schema) e a versão nos metadados"""
+    return write_team_dataset(apply_schema(df), path, schema_metadata())
+
+def dataset_schema_version(path=DATA_PATH):
+    """Versão do esquema do parquet dos chamados (só o rodapé é lido; 0 para arquivos antigos)"""
+    return metadata_version(pq.read_schema(path).metadata)
+
+_lock_esquema = threading.Lock()
+
+def upgrade_ticket_dataset(path=DATA_PATH):
+    """Regrava uma vez, com o esquema atual, um parquet de chamados de formato antigo; True se regravou
+
+    Arquivos sem a coluna EQUIPE são da equipe da planilha da equipe (EQUIPE_PADRAO). Se o arquivo
+    não puder ser regravado (ex.: sem permissão), continua sendo lido como está.
+    """
+    with _lock_esquema:
+        if dataset_schema_version(path) >= VERSAO_ESQUEMA:
+            return False
+        df = pd.read_parquet(path)
+        if 'EQUIPE' not in df.columns:
+            df['EQUIPE'] = EQUIPE_PADRAO
+        try:
+            write_ticket_dataset(df, path)
+        except OSError as e:
+            logger.warning("Não foi possível atualizar o formato de %s: %s", path, e)
+            return False
+        logger.info("Parquet %s atualizado para a versão %s do esquema", path, VERSAO_ESQUEMA)
+        return True
+
+def dataset_teams(path=DATA_PATH):
+    """Equipes gravadas no parquet (só o rodapé do arquivo é lido); vazio para arquivos sem equipe"""
+    metadados = pq.read_schema(path).metadata or {}
+    return json.loads(metadados[CHAVE_EQUIPES]) if CHAVE_EQUIPES in metadados else []
+
+def read_team_dataset(path=DATA_PATH, equipe=None):
+    """Lê o parquet inteiro ou só os row groups de uma equipe (arquivos sem EQUIPE são lidos inteiros)"""
+    if equipe is not None and 'EQUIPE' in pq.read_schema(path).names:
+        return pd.read_parquet(path, filters=[('EQUIPE', '==', equipe)])
+    return pd.read_parquet(path)
+
+def dataset_version(path=DATA_PATH):
+    """Versão do parquet gravado (muda a cada nova gravação); None se não existir"""
+    try:
+        info = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return (info.st_mtime_ns, info.st_size)
+
+def dataset_exists(path=DATA_PATH):
+    """Verifica se o parquet processado existe"""
+    return os.path.exists(path)
@@ -0,0 +1,231 @@
+"""Telemetria de desempenho no formato texto OpenMetrics/Prometheus.
+
+Ativada pela variável DASHBOARD_TELEMETRIA:
+    arquivo -> regrava DASHBOARD_TELEMETRIA_ARQUIVO a cada execução/processamento
+    http    -> expõe /metrics em DASHBOARD_TELEMETRIA_HOST:DASHBOARD_TELEMETRIA_PORTA
+Desativada, as funções de registro retornam imediatamente.
+"""
+import logging
+import os
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+CONTENT_TYPE = "application/openmetrics-text; version=1.0.0; charset=utf-8"
+
+# Limites (segundos) dos histogramas de duração
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+
+# Nome -> (tipo, descrição)
+METRICAS = {
+    'dashboard_rerun_duration_seconds': ('histogram', "Duração total de cada execução do dashboard"),
+    'dashboard_stage_duration_seconds': ('histogram', "Duração de cada etapa do dashboard"),
+    'dashboard_reruns': ('counter', "Execuções do dashboard medidas"),
+    'dashboard_cache_requests': ('counter', "Consultas ao cache por resultado (hit/miss)"),
+    'dashboard_dataset_rows': ('gauge', "Linhas de saída da etapa na última execução"),
+    'dashboard_rerun_payload_bytes': ('gauge', "Bytes enviados ao navegador na última execução medida"),
+    'dashboard_payload_bytes': ('counter', "Bytes enviados ao navegador nas execuções medidas"),
+    'dashboard_process_resident_memory_bytes': ('gauge', "Memória residente (RSS) do processo do dashboard"),
+    'dashboard_ingest_jobs': ('counter', "Processamentos de planilhas por status final"),
+    'dashboard_ingest_duration_seconds': ('histogram', "Duração total do processamento das planilhas"),
+    'dashboard_ingest_stage_duration_seconds': ('histogram', "Duração de cada etapa do processamento das planilhas"),
+    'dashboard_ingest_rows': ('gauge', "Linhas gravadas no último processamento concluído"),
+    'dashboard_ingest_duplicate_rows': ('gauge', "Linhas com chamado repetido ignoradas no último processamento"),
+    'dashboard_ingest_invalid_keys': ('gauge', "Linhas sem número de chamado válido ignoradas no último processamento"),
+}
+
+_lock = threading.Lock()
+_contadores = {}
+_medidores = {}
+_histogramas = {}
+_servidor = None
+
+def enabled():
+    """Telemetria ativada por variável de ambiente"""
+    return settings.TELEMETRIA_MODO in ('arquivo', 'http')
+
+def _chave(nome, rotulos):
+    return nome, tuple(sorted(rotulos.items()))
+
+def inc(nome, valor=1, **rotulos):
+    """Incrementa um contador"""
+    chave = _chave(nome, rotulos)
+    with _lock:
+        _contadores[chave] = _contadores.get(chave, 0) + valor
+
+def set_gauge(nome, valor, **rotulos):
+    """Define o valor atual de um medidor"""
+    with _lock:
+        _medidores[_chave(nome, rotulos)] = valor
+
+def observe(nome, segundos, **rotulos):
+    """Registra uma observação em um histograma"""
+    chave = _chave(nome, rotulos)
+    with _lock:
+        hist = _histogramas.get(chave)
+        if hist is None:
+            hist = _histogramas[chave] = {'buckets': [0] * len(BUCKETS), 'soma': 0.0, 'contagem': 0}
+        for i, limite in enumerate(BUCKETS):
+            if segundos <= limite:
+                hist['buckets'][i] += 1
+        hist['soma'] += segundos
+        hist['contagem'] += 1
+
+def resident_memory_bytes():
+    """RSS do processo (/proc no Linux, psutil se instalado); None se indisponível"""
+    try:
+        with open('/proc/self/statm') as arquivo:
+            return int(arquivo.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, AttributeError):
+        pass
+    try:
+        import psutil
+    except ImportError:
+        return None
+    return psutil.Process().memory_info().rss
+
+def observe_rerun(registro):
+    """Registra uma execução medida por utils.perf (tempos, cache, linhas, payload e RSS)"""
+    if not enabled() or registro is None:
+        return
+    if registro.tempo_s is not None:
+        observe('dashboard_rerun_duration_seconds', registro.tempo_s)
+    inc('dashboard_reruns')
+    for etapa in registro.etapas:
+        observe('dashboard_stage_duration_seconds', etapa.tempo_s, etapa=etapa.nome)
+        if etapa.linhas_saida is not None:
+            set_gauge('dashboard_dataset_rows', etapa.linhas_saida, etapa=etapa.nome)
+
+    # Contadores "cache:<nome>:chamada" e "cache:<nome>:miss" registrados com perf.count
+    caches = {nome.split(':')[1] for nome in registro.contadores if nome.startswith('cache:')}
+    for cache in caches:
+        chamadas = registro.contadores.get(f"cache:{cache}:chamada", 0)
+        misses = registro.contadores.get(f"cache:{cache}:miss", 0)
+        if misses:
+            inc('dashboard_cache_requests', misses, cache=cache, resultado='miss')
+        if chamadas > misses:
+            inc('dashboard_cache_requests', chamadas - misses, cache=cache, resultado='hit')
+
+    payload = registro.contadores.get('payload_bytes')
+    if payload is not None:
+        set_gauge('dashboard_rerun_payload_bytes', payload)
+        inc('dashboard_payload_bytes', payload)
+
+    rss = resident_memory_bytes()
+    if rss is not None:
+        set_gauge('dashboard_process_resident_memory_bytes', rss)
+    _exportar()
+
+def observe_ingest(job):
+    """Registra um processamento de planilhas finalizado (utils.ingest_job.IngestJob)"""
+    if not enabled():
+        return
+    inc('dashboard_ingest_jobs', status=job.status)
+    if job.inicio is not None and job.fim is not None:
+        observe('dashboard_ingest_duration_seconds', job.fim - job.inicio, status=job.status)
+    for etapa, segundos in job.tempos_etapas.items():
+        observe('dashboard_ingest_stage_duration_seconds', segundos, etapa=etapa)
+    if job.linhas is not None:
+        set_gauge('dashboard_ingest_rows', job.linhas)
+    for coluna, info in job.relatorio_chaves.items():
+        set_gauge('dashboard_ingest_duplicate_rows', info['linhas_repetidas'], coluna=coluna)
+        set_gauge('dashboard_ingest_invalid_keys', info['chaves_invalidas'], coluna=coluna)
+    _exportar()
+
+def _formatar_rotulos(rotulos):
+    if not rotulos:
+        return ''
+    pares = []
+    for nome, valor in rotulos:
+        valor = str(valor).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+        pares.append(f'{nome}="{valor}"')
+    return '{' + ','.join(pares) + '}'
+
+def _formatar_numero(valor):
+    if isinstance(valor, float):
+        return repr(valor)
+    return str(valor)
+
+def render():
+    """Texto OpenMetrics com todas as métricas registradas"""
+    with _lock:
+        contadores = dict(_contadores)
+        medidores = dict(_medidores)
+        histogramas = {chave: {'buckets': list(h['buckets']), 'soma': h['soma'], 'contagem': h['contagem']}
+                       for chave, h in _histogramas.items()}
+
+    linhas = []
+    for nome, (tipo, descricao) in METRICAS.items():
+        if tipo == 'counter':
+            series = {chave: v for chave, v in contadores.items() if chave[0] == nome}
+        elif tipo == 'gauge':
+            series = {chave: v for chave, v in medidores.items() if chave[0] == nome}
+        else:
+            series = {chave: v for chave, v in histogramas.items() if chave[0] == nome}
+        if not series:
+            continue
+
+        linhas.append(f"# TYPE {nome} {tipo}")
+        linhas.append(f"# HELP {nome} {descricao}")
+        for (_, rotulos), valor in sorted(series.items()):
+            if tipo == 'counter':
+                linhas.append(f"{nome}_total{_formatar_rotulos(rotulos)} {_formatar_numero(valor)}")
+            elif tipo == 'gauge':
+                linhas.append(f"{nome}{_formatar_rotulos(rotulos)} {_formatar_numero(valor)}")
+            else:
+                for limite, acumulado in zip(BUCKETS, valor['buckets']):
+                    linhas.append(f"{nome}_bucket{_formatar_rotulos(rotulos + (('le', repr(limite)),))} {acumulado}")
+                linhas.append(f"{nome}_bucket{_formatar_rotulos(rotulos + (('le', '+Inf'),))} {valor['contagem']}")
+                linhas.append(f"{nome}_count{_formatar_rotulos(rotulos)} {valor['contagem']}")
+                linhas.append(f"{nome}_sum{_formatar_rotulos(rotulos)} {_formatar_numero(valor['soma'])}")
+    linhas.append("# EOF")
+    return '\n'.join(linhas) + '\n'
+
+def _exportar():
+    """Grava o arquivo ou garante que o endpoint HTTP está no ar"""
+    if settings.TELEMETRIA_MODO == 'arquivo':
+        destino = settings.TELEMETRIA_ARQUIVO
+        tmp_path = f"{destino}.{os.getpid()}.tmp"
+        try:
+            with open(tmp_path, 'w', encoding='utf-8') as arquivo:
+                arquivo.write(render())
+            os.replace(tmp_path, destino)
+        except OSError as e:
+            logger.warning("Não foi possível gravar a telemetria em %s: %s", destino, e)
+    elif settings.TELEMETRIA_MODO == 'http':
+        start_http_server()
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split('?')[0] not in ('/', '/metrics'):
+            self.send_error(404)
+            return
+        corpo = render().encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', CONTENT_TYPE)
+        self.send_header('Content-Length', str(len(corpo)))
+        self.end_headers()
+        self.wfile.write(corpo)
+
+    def log_message(self, formato, *args):
+        logger.debug(formato, *args)
+
+def start_http_server(host=None, porta=None):
+    """Sobe (uma única vez por processo) o endpoint /metrics em uma thread daemon"""
+    global _servidor
+    with _lock:
+        if _servidor is not None:
+            return _servidor or None
+        host = host or settings.TELEMETRIA_HOST
+        porta = porta if porta is not None else settings.TELEMETRIA_PORTA
+        try:
+            _servidor = ThreadingHTTPServer((host, porta), _MetricsHandler)
+        except OSError as e:
+            logger.warning("Não foi possível abrir o endpoint de telemetria em %s:%s: %s", host, porta, e)
+            _servidor = False
+            return None
+        threading.Thread(target=_servidor.serve_forever, name="telemetria-http", daemon=True).start()
+        logger.info("Telemetria disponível em http://%s:%s/metrics", host, porta)
+        return _servidor
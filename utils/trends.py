@@ -0,0 +1,185 @@
+"""Séries de longo prazo (volume diário e taxa de SLA semanal) e redução de pontos para os gráficos.
+
+As séries são agregadas por dia/semana sobre todo o histórico e, quando passam de
+PONTOS_MAX, reduzidas com LTTB (Largest-Triangle-Three-Buckets), que mantém picos e
+vales visíveis com bem menos pontos.
+
+As contagens por dia/semana (separadas por responsável e status) são feitas uma vez por
+versão dos dados preparados e equipe (get_trend_counts): a versão inclui o dia de referência,
+que muda a semana alvo de parte dos chamados. A cada rerun, o recorte escolhido só soma
+as linhas delas. Com o motor SQL ativado (utils.sql_engine), essas contagens são feitas
+pelo DuckDB; o restante é igual nos dois caminhos.
+"""
+import threading
+import numpy as np
+import pandas as pd
+from utils import sql_engine
+from utils.data_processor import prepared_version
+
+# Pontos máximos por série enviados ao navegador
+PONTOS_MAX = 1000
+# Acima deste número de pontos por série os gráficos usam traços WebGL (Scattergl)
+LIMITE_WEBGL = 500
+
+STATUS_FINALIZADOS = ['Resolvido', 'Fechado']
+
+# Níveis de cada contagem, além do dia/semana: os recortes do dashboard (responsável e status)
+RECORTES = ['RESPONSAVEL', 'STATUS']
+
+def daily_volume(df):
+    """Chamados abertos e resolvidos por dia em todo o histórico (dias sem chamados com 0)"""
+    return volume_from_counts(trend_counts(df))
+
+def weekly_sla_rate(df):
+    """Taxa de SLA (%) por semana da DATA_ALVO, apenas resolvidos/fechados, indexada pela segunda-feira"""
+    return sla_rate_from_counts(trend_counts(df))
+
+def trend_counts(df):
+    """Contagens das séries de longo prazo por dia/semana, responsável e status
+
+    Bem menores que os chamados: qualquer recorte do dashboard sai delas somando linhas
+    (volume_from_counts / sla_rate_from_counts), sem percorrer os chamados de novo.
+    """
+    if sql_engine.enabled():
+        return _trend_counts_sql(df)
+    recortes = [df[coluna] for coluna in RECORTES]
+    abertura = df['DATA_ABERTURA'].dt.normalize().rename('Data')
+    abertos = df['REQUISICAO'].groupby([abertura] + recortes, dropna=False, observed=True).size()
+    finalizados = df['STATUS'].isin(STATUS_FINALIZADOS) & df['DATA_RESOLUCAO'].notna()
+    resolucao = df.loc[finalizados, 'DATA_RESOLUCAO'].dt.normalize().rename('Data')
+    resolvidos = df.loc[finalizados, 'REQUISICAO'].groupby(
+        [resolucao] + [recorte[finalizados] for recorte in recortes], dropna=False, observed=True).size()
+    
+    elegiveis = df[df['STATUS'].isin(STATUS_FINALIZADOS) & df['ANO_ALVO'].notna() & df['SEMANA_ALVO'].notna()]
+    semanal = elegiveis.groupby([elegiveis['ANO_ALVO'].astype('int64').rename('ano'),
+                                 elegiveis['SEMANA_ALVO'].astype('int64').rename('semana')]
+                                + [elegiveis[coluna] for coluna in RECORTES], dropna=False, observed=True).agg(
+        chamados=('REQUISICAO', 'count'),
+        violados=('SLA_VIOLADO', 'sum'),
+    )
+    # Dias sem data de abertura ficam de fora, como no value_counts
+    return {'abertos': abertos[abertos.index.get_level_values('Data').notna()], 'resolvidos': resolvidos,
+            'semanal': semanal.astype('int64')}
+
+def slice_counts(contagens, responsavel='Todos', status_filtrados='Todos'):
+    """Contagens só do responsável e dos status escolhidos (mesmos filtros dos gráficos)"""
+    def recortar(tabela):
+        mascara = np.ones(len(tabela), dtype=bool)
+        if responsavel != 'Todos':
+            mascara &= np.asarray(tabela.index.get_level_values('RESPONSAVEL') == responsavel)
+        if status_filtrados != 'Todos':
+            mascara &= np.asarray(tabela.index.get_level_values('STATUS').isin(status_filtrados))
+        return tabela[mascara]
+    return {nome: recortar(tabela) for nome, tabela in contagens.items()}
+
+def volume_from_counts(contagens):
+    """Volume diário (abertos e resolvidos, dias sem chamados com 0) a partir de trend_counts"""
+    abertos = contagens['abertos'].groupby(level='Data').sum()
+    resolvidos = contagens['resolvidos'].groupby(level='Data').sum()
+    datas = abertos.index.union(resolvidos.index)
+    if len(datas) == 0:
+        return pd.DataFrame({'Abertos': [], 'Resolvidos': []}, index=pd.DatetimeIndex([], name='Data'), dtype='int64')
+    dias = pd.date_range(datas.min(), datas.max(), freq='D', name='Data')
+    return pd.DataFrame({
+        'Abertos': abertos.reindex(dias, fill_value=0),
+        'Resolvidos': resolvidos.reindex(dias, fill_value=0),
+    })
+
+def sla_rate_from_counts(contagens):
+    """Taxa de SLA semanal a partir de trend_counts"""
+    semanal = contagens['semanal'].groupby(level=['ano', 'semana']).sum()
+    segundas = pd.to_datetime(
+        [f"{ano}-{semana:02d}-1" for ano, semana in semanal.index], format='%G-%V-%u'
+    )
+    taxa = ((semanal['chamados'] - semanal['violados']) / semanal['chamados'] * 100).round(1)
+    return pd.Series(taxa.values, index=pd.DatetimeIndex(segundas, name='Semana'), name='Taxa_SLA')
+
+# Equipe (df.attrs['equipe']) -> {'versao', 'contagens', 'lock'}
+_contagens = {}
+_lock = threading.Lock()
+
+def get_trend_counts(df, versao=None):
+    """Contagens de trend_counts compartilhadas pelo processo, uma por equipe (refeitas quando a `versao` muda)"""
+    with _lock:
+        estado = _contagens.setdefault(df.attrs.get('equipe'), {'versao': None, 'contagens': None,
+                                                                'lock': threading.Lock()})
+    with estado['lock']:
+        if estado['contagens'] is None or versao is None or versao != estado['versao']:
+            estado.update(versao=versao, contagens=trend_counts(df))
+        return estado['contagens']
+
+def long_horizon_series(df, responsavel='Todos', status_filtrados='Todos'):
+    """Taxa de SLA semanal e volume diário do recorte; por rerun, só soma as contagens em cache"""
+    contagens = slice_counts(get_trend_counts(df, prepared_version(df)), responsavel, status_filtrados)
+    return sla_rate_from_counts(contagens), volume_from_counts(contagens)
+
+def _trend_counts_sql(df):
+    """trend_counts pelo motor SQL (mesmas contagens do caminho em pandas)"""
+    recortes = ", ".join(RECORTES)
+    colunas = ['REQUISICAO', 'DATA_ABERTURA', 'DATA_RESOLUCAO', 'STATUS', 'RESPONSAVEL', 'ANO_ALVO', 'SEMANA_ALVO',
+               'SLA_VIOLADO']
+    # Uma conversão para Arrow por versão dos dados preparados (muda com o dia), usada pelas duas consultas
+    chamados = sql_engine.arrow_table(df, colunas, prepared_version(df))
+    diario = sql_engine.query(f"""
+        SELECT 'A' AS tipo, CAST(DATA_ABERTURA AS DATE) AS dia, {recortes}, count(*) AS n
+        FROM chamados WHERE DATA_ABERTURA IS NOT NULL GROUP BY ALL
+        UNION ALL
+        SELECT 'R', CAST(DATA_RESOLUCAO AS DATE), {recortes}, count(*)
+        FROM chamados WHERE STATUS IN ({_lista_sql(STATUS_FINALIZADOS)}) AND DATA_RESOLUCAO IS NOT NULL GROUP BY ALL
+    """, chamados=chamados)
+    contagens = {}
+    for tipo, nome, coluna in (('A', 'abertos', 'DATA_ABERTURA'), ('R', 'resolvidos', 'DATA_RESOLUCAO')):
+        parte = diario[diario['tipo'] == tipo]
+        # Mesma resolução (ns/us) da coluna de origem, como no caminho em pandas
+        dias = pd.DatetimeIndex(parte['dia'], name='Data').as_unit(df[coluna].dt.unit)
+        indice = pd.MultiIndex.from_arrays([dias] + [parte[recorte].to_numpy() for recorte in RECORTES],
+                                           names=['Data'] + RECORTES)
+        contagens[nome] = pd.Series(parte['n'].to_numpy(dtype='int64'), index=indice)
+    
+    semanal = sql_engine.query(f"""
+        SELECT CAST(ANO_ALVO AS BIGINT) AS ano, CAST(SEMANA_ALVO AS BIGINT) AS semana, {recortes},
+               count(REQUISICAO) AS chamados, coalesce(sum(CAST(SLA_VIOLADO AS BIGINT)), 0) AS violados
+        FROM chamados
+        WHERE STATUS IN ({_lista_sql(STATUS_FINALIZADOS)}) AND ANO_ALVO IS NOT NULL AND SEMANA_ALVO IS NOT NULL
+        GROUP BY ALL
+    """, chamados=chamados)
+    contagens['semanal'] = semanal.set_index(['ano', 'semana'] + RECORTES).astype('int64')
+    return contagens
+
+def _lista_sql(valores):
+    """Valores fixos do código como lista SQL ('a', 'b')"""
+    return ", ".join("'" + valor.replace("'", "''") + "'" for valor in valores)
+
+def lttb_indices(x, y, limite):
+    """Posições dos pontos escolhidos pelo LTTB (sempre inclui o primeiro e o último)"""
+    n = len(x)
+    if limite >= n or limite < 3:
+        return np.arange(n)
+    x = np.asarray(x, dtype='float64')
+    y = np.asarray(y, dtype='float64')
+
+    # Baldes internos (o primeiro e o último ponto ficam fora deles)
+    limites = np.linspace(1, n - 1, limite - 1).astype('int64')
+    escolhidos = np.empty(limite, dtype='int64')
+    escolhidos[0] = 0
+    escolhidos[-1] = n - 1
+    anterior = 0
+    for i in range(limite - 2):
+        inicio, fim = limites[i], limites[i + 1]
+        # Média do balde seguinte (ou o último ponto, no último balde)
+        prox_inicio, prox_fim = fim, limites[i + 2] if i + 2 < len(limites) else n
+        media_x = x[prox_inicio:prox_fim].mean()
+        media_y = y[prox_inicio:prox_fim].mean()
+        # Ponto do balde que forma o maior triângulo com o anterior escolhido e a média seguinte
+        areas = np.abs((x[anterior] - media_x) * (y[inicio:fim] - y[anterior])
+                       - (x[anterior] - x[inicio:fim]) * (media_y - y[anterior]))
+        anterior = inicio + int(areas.argmax())
+        escolhidos[i + 1] = anterior
+    return escolhidos
+
+def downsample(serie, limite=PONTOS_MAX):
+    """Reduz uma série indexada por data para no máximo `limite` pontos com LTTB"""
+    if len(serie) <= limite:
+        return serie
+    x = serie.index.asi8 if isinstance(serie.index, pd.DatetimeIndex) else np.arange(len(serie))
+    return serie.iloc[lttb_indices(x, serie.to_numpy(dtype='float64'), limite)]
@@ -0,0 +1,329 @@
+import numpy as np
+import pandas as pd
+from utils.date_logic import get_week_dates, compute_kanban_display_dates
+
+# Categorias consideradas finalizadas / elegíveis para SLA
+CATEGORIAS_FINALIZADAS = ['RESOLVIDO', 'FECHADO']
+CATEGORIAS_ENCERRADAS = ['RESOLVIDO', 'FECHADO', 'CANCELADO']
+
+def count_values(serie):
+    """value_counts só dos valores presentes (colunas category também listam as categorias sem linhas)"""
+    contagem = serie.value_counts()
+    if isinstance(serie.dtype, pd.CategoricalDtype):
+        contagem = contagem[contagem > 0]
+        contagem.index = contagem.index.astype(serie.cat.categories.dtype)
+    return contagem
+
+def filter_kanban_week(df, ano, semana, responsavel='Todos', status_filtrados='Todos'):
+    """Filtra dados da semana selecionada - INCLUINDO resolvidos na semana"""
+    
+    # PRIMEIRO: Filtrar por DATA_ALVO (lógica original)
+    df_data_alvo = df[
+        (df['ANO_ALVO'] == ano) & 
+        (df['SEMANA_ALVO'] == semana)
+    ].copy()
+    
+    # SEGUNDO: Adicionar chamados RESOLVIDOS/FECHADOS nesta semana (mesmo com DATA_ALVO diferente)
+    # (máscaras sobre as colunas, sem copiar o DataFrame inteiro)
+    data_resolucao = df['DATA_RESOLUCAO']
+    df_resolvidos_semana = df[
+        (df['STATUS'].isin(['Resolvido', 'Fechado'])) &
+        (data_resolucao.notna()) &
+        (data_resolucao.dt.year == ano) &
+        (data_resolucao.dt.isocalendar().week == semana)
+    ]
+    
+    # TERCEIRO: Combinar os dois conjuntos (removendo duplicatas)
+    df_filtered = pd.concat([df_data_alvo, df_resolvidos_semana]).drop_duplicates(subset=['REQUISICAO'])
+    
+    # Aplicar filtros de responsável
+    if responsavel != 'Todos':
+        df_filtered = df_filtered[df_filtered['RESPONSAVEL'] == responsavel]
+    
+    # Aplicar filtro de status
+    if status_filtrados != 'Todos':
+        df_filtered = df_filtered[df_filtered['STATUS'].isin(status_filtrados)]
+    
+    # Aplicar lógica de data de exibição (mantém a lógica original)
+    df_filtered['DATA_DISPLAY'] = compute_kanban_display_dates(df_filtered)
+    
+    return df_filtered
+
+def filter_target_week(df, ano, semana, responsavel='Todos', status_filtrados='Todos'):
+    """Filtra dados para análise - APENAS chamados com DATA_ALVO nesta semana"""
+    
+    # 🔧 CORREÇÃO CRÍTICA: Análise deve mostrar APENAS chamados com DATA_ALVO nesta semana
+    # NÃO incluir chamados resolvidos em outra semana (isso distorce os gráficos)
+    
+    # Filtrar APENAS por DATA_ALVO
+    df_filtered = df[
+        (df['ANO_ALVO'] == ano) & 
+        (df['SEMANA_ALVO'] == semana)
+    ].copy()
+    
+    # Aplicar filtros adicionais
+    if responsavel != 'Todos':
+        df_filtered = df_filtered[df_filtered['RESPONSAVEL'] == responsavel]
+    
+    if status_filtrados != 'Todos':
+        df_filtered = df_filtered[df_filtered['STATUS'].isin(status_filtrados)]
+    
+    return df_filtered
+
+def count_week_tickets(df_filtered):
+    """Conta chamados por DATA_DISPLAY x STATUS_CATEGORIA x SLA_VIOLADO em uma única passada"""
+    if len(df_filtered) == 0:
+        return pd.Series(dtype='int64')
+
+    return df_filtered.groupby(
+        ['DATA_DISPLAY', 'STATUS_CATEGORIA', 'SLA_VIOLADO'], sort=False
+    ).size()
+
+def summarize_week_counts(counts, week_dates):
+    """Resume as contagens agrupadas nas métricas da semana e no total por dia"""
+    resumo = {
+        'total': 0,
+        'resolvidos': 0,
+        'em_aberto': 0,
+        'sla_elegivel': 0,
+        'sla_violados': 0,
+        'por_dia': {date: 0 for date in week_dates},
+    }
+
+    if len(counts) == 0:
+        return resumo
+
+    # Achatar o índice uma única vez e trabalhar apenas com as combinações existentes
+    tabela = counts.rename('QTD').reset_index()
+    tabela = tabela[tabela['DATA_DISPLAY'].isin(week_dates)]
+
+    finalizado = tabela['STATUS_CATEGORIA'].isin(CATEGORIAS_FINALIZADAS)
+    encerrado = tabela['STATUS_CATEGORIA'].isin(CATEGORIAS_ENCERRADAS)
+    violado = tabela['SLA_VIOLADO'].astype(bool)
+
+    resumo['total'] = int(tabela['QTD'].sum())
+    resumo['resolvidos'] = int(tabela.loc[finalizado, 'QTD'].sum())
+    resumo['em_aberto'] = int(tabela.loc[~encerrado, 'QTD'].sum())
+    resumo['sla_elegivel'] = resumo['resolvidos']
+    resumo['sla_violados'] = int(tabela.loc[finalizado & violado, 'QTD'].sum())
+
+    for date, qtd in tabela.groupby('DATA_DISPLAY', sort=False)['QTD'].sum().items():
+        resumo['por_dia'][date] = int(qtd)
+
+    return resumo
+
+def count_programados_extras(df_filtered, week_dates):
+    """Conta programados (resolvidos na DATA_ALVO) e extras (resolvidos em outro dia) por dia"""
+    contagem = pd.DataFrame({'Programados': 0, 'Extras': 0}, index=pd.Index(week_dates, name='Data'))
+    
+    finalizados = df_filtered[
+        (df_filtered['STATUS'].isin(['Resolvido', 'Fechado'])) &
+        (df_filtered['DATA_RESOLUCAO'].notna())
+    ]
+    if len(finalizados) == 0:
+        return contagem
+    
+    dia_resolucao = finalizados['DATA_RESOLUCAO'].dt.date
+    na_semana = dia_resolucao.isin(week_dates)
+    dia_resolucao = dia_resolucao[na_semana]
+    programado = dia_resolucao == finalizados.loc[na_semana, 'DATA_ALVO_DATE']
+    
+    contagem['Programados'] = dia_resolucao[programado].value_counts().reindex(week_dates, fill_value=0).values
+    contagem['Extras'] = dia_resolucao[~programado].value_counts().reindex(week_dates, fill_value=0).values
+    return contagem
+
+def compute_week_summary(df, ano, semana, responsavel='Todos', status_filtrados='Todos'):
+    """Calcula o resumo semanal (métricas do Kanban, taxa SLA e programados/extras)"""
+    df_kanban = filter_kanban_week(df, ano, semana, responsavel, status_filtrados)
+    df_alvo = filter_target_week(df, ano, semana, responsavel, status_filtrados)
+    return summarize_week(df_kanban, df_alvo, ano, semana, responsavel)
+
+def summarize_week(df_kanban, df_alvo, ano, semana, responsavel):
+    """Monta métricas e tabela por dia a partir dos recortes do Kanban e da DATA_ALVO"""
+    week_dates = get_week_dates(ano, semana)
+    resumo = summarize_week_counts(count_week_tickets(df_kanban), week_dates)
+    prog_extras = count_programados_extras(df_alvo, week_dates)
+    
+    elegivel = resumo['sla_elegivel']
+    taxa_sla = ((elegivel - resumo['sla_violados']) / elegivel * 100) if elegivel > 0 else 100.0
+    
+    dias = prog_extras.reset_index()
+    dias.insert(1, 'Chamados', [resumo['por_dia'][date] for date in week_dates])
+    
+    metricas = {
+        'ano': int(ano),
+        'semana': int(semana),
+        'responsavel': responsavel,
+        'total': resumo['total'],
+        'resolvidos': resumo['resolvidos'],
+        'em_aberto': resumo['em_aberto'],
+        'sla_elegivel': elegivel,
+        'sla_violados': resumo['sla_violados'],
+        'taxa_sla': round(taxa_sla, 1),
+        'programados': int(prog_extras['Programados'].sum()),
+        'extras': int(prog_extras['Extras'].sum()),
+    }
+    return metricas, dias
+
+# Colunas dos agregados semanais (mesmas chaves das métricas de summarize_week)
+COLUNAS_AGREGADOS = ['ano', 'semana', 'responsavel', 'total', 'resolvidos', 'em_aberto', 'sla_elegivel',
+                     'sla_violados', 'taxa_sla', 'programados', 'extras']
+
+def build_weekly_aggregates(df):
+    """Pré-calcula as métricas de todas as semanas, para a equipe e por responsável
+
+    Mesmos recortes de filter_kanban_week/filter_target_week, sem filtrar o DataFrame por semana:
+    cada chamado vira um par (chamado, semana) para a semana da DATA_ALVO e, se finalizado, para a
+    semana da resolução. As contagens saem de um único groupby, programados/extras de outro, e a
+    linha 'Todos' de cada semana é a soma dos responsáveis.
+    """
+    if len(df) == 0:
+        return pd.DataFrame(columns=COLUNAS_AGREGADOS)
+    chaves = ['ANO', 'SEMANA', 'RESPONSAVEL']
+    posicoes = np.arange(len(df))
+    finalizados = (df['STATUS'].isin(['Resolvido', 'Fechado']) & df['DATA_RESOLUCAO'].notna()).to_numpy()
+    resolucao = df['DATA_RESOLUCAO'][finalizados]
+    
+    alvo = pd.DataFrame({'LINHA': posicoes, 'ANO': df['ANO_ALVO'].to_numpy(),
+                         'SEMANA': df['SEMANA_ALVO'].to_numpy()}).astype('int64')
+    pares = pd.concat([alvo, pd.DataFrame({
+        'LINHA': posicoes[finalizados],
+        'ANO': resolucao.dt.year.to_numpy(),
+        'SEMANA': resolucao.dt.isocalendar().week.to_numpy(),
+    }).astype('int64')], ignore_index=True).drop_duplicates()
+    
+    # Primeiro dia de cada semana (get_week_dates), calculado uma vez por semana
+    semanas = pares[['ANO', 'SEMANA']].drop_duplicates()
+    semanas['INICIO'] = pd.to_datetime([get_week_dates(ano, semana)[0] for ano, semana in
+                                        zip(semanas['ANO'], semanas['SEMANA'])])
+    pares = pares.merge(semanas, on=['ANO', 'SEMANA'], how='left')
+    alvo = alvo.merge(semanas, on=['ANO', 'SEMANA'], how='left')
+    
+    responsavel = df['RESPONSAVEL'].to_numpy(dtype=object)
+    linhas = pares['LINHA'].to_numpy()
+    pares['RESPONSAVEL'] = responsavel[linhas]
+    
+    # Kanban: chamados cuja data de exibição cai nos dias da semana
+    exibicao = pd.to_datetime(compute_kanban_display_dates(df)).to_numpy()[linhas]
+    dias = (exibicao - pares['INICIO'].to_numpy()) // np.timedelta64(1, 'D')
+    na_semana = (dias >= 0) & (dias <= 6)
+    kanban = pares[na_semana].assign(STATUS_CATEGORIA=df['STATUS_CATEGORIA'].to_numpy()[linhas[na_semana]],
+                                     SLA_VIOLADO=df['SLA_VIOLADO'].to_numpy(dtype=bool)[linhas[na_semana]])
+    tabela = kanban.groupby(chaves + ['STATUS_CATEGORIA', 'SLA_VIOLADO'], dropna=False).size().rename('QTD').reset_index()
+    finalizado = tabela['STATUS_CATEGORIA'].isin(CATEGORIAS_FINALIZADAS)
+    encerrado = tabela['STATUS_CATEGORIA'].isin(CATEGORIAS_ENCERRADAS)
+    qtd = tabela['QTD']
+    tabela = tabela.assign(total=qtd, resolvidos=qtd.where(finalizado, 0), em_aberto=qtd.where(~encerrado, 0),
+                           sla_violados=qtd.where(finalizado & tabela['SLA_VIOLADO'], 0))
+    metricas = tabela.groupby(chaves, dropna=False)[['total', 'resolvidos', 'em_aberto', 'sla_violados']].sum()
+    
+    # Programados/extras: finalizados da semana da DATA_ALVO resolvidos em um dia da semana
+    dia_resolucao = df['DATA_RESOLUCAO'].dt.normalize().to_numpy()[finalizados]
+    alvo = alvo[finalizados].assign(RESPONSAVEL=responsavel[finalizados])
+    dias = (dia_resolucao - alvo['INICIO'].to_numpy()) // np.timedelta64(1, 'D')
+    programado = dia_resolucao == pd.to_datetime(df['DATA_ALVO_DATE']).to_numpy()[finalizados]
+    alvo = alvo.assign(programados=programado, extras=~programado)[(dias >= 0) & (dias <= 6)]
+    prog_extras = alvo.groupby(chaves, dropna=False)[['programados', 'extras']].sum()
+    
+    # Uma linha por responsável com chamados candidatos na semana (mesmo que fora dos dias exibidos)
+    indice = pd.MultiIndex.from_frame(pares[chaves].drop_duplicates())
+    por_resp = pd.concat([metricas.reindex(indice, fill_value=0), prog_extras.reindex(indice, fill_value=0)],
+                         axis=1).astype('int64')
+    todos = por_resp.groupby(level=['ANO', 'SEMANA']).sum().assign(RESPONSAVEL='Todos', ORDEM=0)
+    por_resp = por_resp[por_resp.index.get_level_values('RESPONSAVEL').notna()].reset_index().assign(ORDEM=1)
+    
+    agregados = pd.concat([todos.reset_index(), por_resp], ignore_index=True)
+    agregados = agregados.sort_values(['ANO', 'SEMANA', 'ORDEM', 'RESPONSAVEL'], kind='stable', ignore_index=True)
+    agregados = agregados.rename(columns={'ANO': 'ano', 'SEMANA': 'semana', 'RESPONSAVEL': 'responsavel'})
+    agregados['sla_elegivel'] = agregados['resolvidos']
+    elegivel = agregados['sla_elegivel']
+    taxa_sla = ((elegivel - agregados['sla_violados']) / elegivel.where(elegivel > 0) * 100).fillna(100.0)
+    agregados['taxa_sla'] = taxa_sla.round(1)
+    return agregados[COLUNAS_AGREGADOS]
+
+def status_distribution(df_filtered):
+    """Quantidade e % por status, com linha de total"""
+    status_counts = count_values(df_filtered['STATUS'])
+    
+    quantidade_list = [int(x) for x in status_counts.values]
+    total_status = sum(quantidade_list)
+    percentual_list = [round((x / total_status * 100), 1) for x in quantidade_list]
+    
+    df_status = pd.DataFrame({
+        'Status': status_counts.index,
+        'Quantidade': quantidade_list,
+        '% Total': percentual_list
+    }).sort_values('Quantidade', ascending=False)
+    
+    total_row = {
+        'Status': '🔹 TOTAL',
+        'Quantidade': int(total_status),
+        '% Total': 100.0
+    }
+    return pd.concat([df_status, pd.DataFrame([total_row])], ignore_index=True)
+
+def empresa_distribution(df_filtered):
+    """Quantidade e % por empresa solicitante (vazio se não houver a coluna ou dados)"""
+    if 'EMPRESA_SOLICITANTE' not in df_filtered.columns:
+        return pd.DataFrame(columns=['Empresa', 'Quantidade', '% Total'])
+    
+    empresa_counts = count_values(df_filtered['EMPRESA_SOLICITANTE'].dropna())
+    
+    quantidade_list = [int(x) for x in empresa_counts.values]
+    total_empresa = sum(quantidade_list)
+    percentual_list = [round((x / total_empresa * 100), 1) for x in quantidade_list]
+    
+    return pd.DataFrame({
+        'Empresa': empresa_counts.index,
+        'Quantidade': quantidade_list,
+        '% Total': percentual_list
+    })
+
+def resumo_distribution(df_filtered):
+    """Previstos vs realizados por tipo de resumo, com linha de total"""
+    colunas = ['Tipo de Resumo', 'Previstos', 'Realizados', 'Pendentes', '% Conclusão']
+    if 'RESUMO' not in df_filtered.columns:
+        return pd.DataFrame(columns=colunas)
+    
+    # Uma única passada: previstos e realizados por resumo (na ordem em que aparecem)
+    com_resumo = df_filtered[df_filtered['RESUMO'].notna()]
+    realizados = com_resumo['STATUS'].isin(['Resolvido', 'Fechado'])
+    grupos = realizados.groupby(com_resumo['RESUMO'], sort=False)
+    previstos = grupos.size()
+    realizados = grupos.sum()
+    
+    df_resumo_stats = pd.DataFrame({
+        'Tipo de Resumo': previstos.index,
+        'Previstos': previstos.values.astype(int),
+        'Realizados': realizados.values.astype(int),
+    }, columns=colunas[:3])
+    df_resumo_stats['Pendentes'] = df_resumo_stats['Previstos'] - df_resumo_stats['Realizados']
+    df_resumo_stats['% Conclusão'] = [round(r / p * 100, 1) for p, r in
+                                      zip(df_resumo_stats['Previstos'], df_resumo_stats['Realizados'])]
+    df_resumo_stats = df_resumo_stats.sort_values('Previstos', ascending=False)
+    
+    total_previstos = int(df_resumo_stats['Previstos'].sum())
+    total_realizados = int(df_resumo_stats['Realizados'].sum())
+    total_percentual = (total_realizados / total_previstos * 100) if total_previstos > 0 else 0
+    
+    total_row = {
+        'Tipo de Resumo': '🔹 TOTAL',
+        'Previstos': total_previstos,
+        'Realizados': total_realizados,
+        'Pendentes': total_previstos - total_realizados,
+        '% Conclusão': round(total_percentual, 1)
+    }
+    return pd.concat([df_resumo_stats, pd.DataFrame([total_row])], ignore_index=True)
+
+def sla_violated_tickets(df_filtered):
+    """Chamados resolvidos/fechados com SLA violado, ordenados pela DATA_ALVO"""
+    display_cols = ['REQUISICAO', 'DATA_ALVO', 'DATA_RESOLUCAO', 'RESUMO', 'RESPONSAVEL']
+    available_cols = [col for col in display_cols if col in df_filtered.columns]
+    
+    df_violado = df_filtered[
+        df_filtered['STATUS'].isin(['Resolvido', 'Fechado']) & 
+        (df_filtered['SLA_VIOLADO'] == True)
+    ]
+    if 'DATA_ALVO' in df_violado.columns:
+        df_violado = df_violado.sort_values('DATA_ALVO', ascending=True)
+    return df_violado[available_cols]
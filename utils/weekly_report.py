@@ -0,0 +1,103 @@
+"""Relatório Semanal em Excel: métricas, programados/extras, distribuições e SLA violado.
+
+A semana é filtrada uma única vez (recorte do Kanban e da DATA_ALVO) e todas as abas
+saem desses dois recortes. Na geração em lote, os recortes de cada responsável são
+separados a partir dos da equipe e cada planilha é gravada em um processo próprio.
+"""
+import io
+import os
+import multiprocessing as mp
+from concurrent.futures import ProcessPoolExecutor
+import pandas as pd
+from utils.week_metrics import (filter_kanban_week, filter_target_week, summarize_week, status_distribution,
+                                empresa_distribution, resumo_distribution, sla_violated_tickets)
+
+# Rótulos da aba de métricas, na ordem em que aparecem
+ROTULOS_METRICAS = {
+    'total': "📋 Total",
+    'resolvidos': "✅ Resolvidos",
+    'em_aberto': "⏳ Em Aberto",
+    'sla_elegivel': "Resolvidos/Fechados (elegíveis ao SLA)",
+    'sla_violados': "🚨 SLA Violado",
+    'taxa_sla': "🎯 Taxa SLA (%)",
+    'programados': "Programados",
+    'extras': "Extras",
+}
+
+def build_weekly_report(df, ano, semana, responsavel='Todos'):
+    """Abas do relatório (nome -> DataFrame) de uma semana e responsável"""
+    df_kanban = filter_kanban_week(df, ano, semana, responsavel)
+    df_alvo = filter_target_week(df, ano, semana, responsavel)
+    return _report_from_week(df_kanban, df_alvo, ano, semana, responsavel)
+
+def _report_from_week(df_kanban, df_alvo, ano, semana, responsavel):
+    """Monta as abas a partir dos recortes da semana já filtrados"""
+    metricas, dias = summarize_week(df_kanban, df_alvo, ano, semana, responsavel)
+
+    cabecalho = [("Semana", f"{semana}/{ano}"), ("Responsável", responsavel)]
+    df_metricas = pd.DataFrame(cabecalho + [(rotulo, metricas[chave]) for chave, rotulo in ROTULOS_METRICAS.items()],
+                               columns=['Indicador', 'Valor'])
+
+    total = {'Data': 'TOTAL', 'Chamados': metricas['total'],
+             'Programados': metricas['programados'], 'Extras': metricas['extras']}
+    df_dias = pd.concat([dias.astype({'Data': object}), pd.DataFrame([total])], ignore_index=True)
+
+    return {
+        'Métricas': df_metricas,
+        'Programados e Extras': df_dias,
+        'Status': status_distribution(df_alvo),
+        'Empresa': empresa_distribution(df_alvo),
+        'Resumo': resumo_distribution(df_alvo),
+        'SLA Violado': sla_violated_tickets(df_alvo),
+    }
+
+def write_weekly_report(abas, destino):
+    """Grava as abas em um arquivo .xlsx (caminho ou arquivo binário)"""
+    with pd.ExcelWriter(destino, engine='openpyxl') as writer:
+        for nome, tabela in abas.items():
+            tabela.to_excel(writer, sheet_name=nome, index=False)
+            # Largura das colunas pelo maior conteúdo (limitada para textos longos)
+            planilha = writer.sheets[nome]
+            for i, coluna in enumerate(tabela.columns, start=1):
+                largura = max([len(str(coluna))] + [len(str(valor)) for valor in tabela[coluna]])
+                planilha.column_dimensions[planilha.cell(row=1, column=i).column_letter].width = min(largura + 2, 60)
+    return destino
+
+def weekly_report_bytes(df, ano, semana, responsavel='Todos'):
+    """Conteúdo .xlsx do relatório (para download no dashboard)"""
+    buffer = io.BytesIO()
+    write_weekly_report(build_weekly_report(df, ano, semana, responsavel), buffer)
+    return buffer.getvalue()
+
+def report_file_name(ano, semana, responsavel='Todos'):
+    nome = 'equipe' if responsavel == 'Todos' else responsavel.replace(' ', '_')
+    nome = ''.join(c for c in nome if c.isalnum() or c in '_-')
+    return f"relatorio_semanal_{ano}_S{int(semana):02d}_{nome}.xlsx"
+
+def _write_report_job(df_kanban, df_alvo, ano, semana, responsavel, destino):
+    """Executado nos processos de trabalho: monta e grava um relatório"""
+    write_weekly_report(_report_from_week(df_kanban, df_alvo, ano, semana, responsavel), destino)
+    return responsavel, destino
+
+def generate_weekly_reports(df, ano, semana, pasta, processos=None):
+    """Gera o relatório da equipe e o de cada responsável da semana em processos paralelos"""
+    os.makedirs(pasta, exist_ok=True)
+
+    # Filtrar a semana uma única vez e separar os recortes de cada responsável
+    df_kanban = filter_kanban_week(df, ano, semana)
+    df_alvo = filter_target_week(df, ano, semana)
+    tarefas = [(df_kanban, df_alvo, 'Todos')]
+    kanban_por_resp = dict(tuple(df_kanban.groupby('RESPONSAVEL', sort=True)))
+    alvo_por_resp = dict(tuple(df_alvo.groupby('RESPONSAVEL', sort=True)))
+    for responsavel in sorted(set(kanban_por_resp) | set(alvo_por_resp)):
+        tarefas.append((kanban_por_resp.get(responsavel, df_kanban.iloc[0:0]),
+                        alvo_por_resp.get(responsavel, df_alvo.iloc[0:0]), responsavel))
+
+    # spawn, como no processamento das planilhas: não herda o estado do servidor Streamlit
+    with ProcessPoolExecutor(max_workers=processos, mp_context=mp.get_context('spawn')) as executor:
+        futuros = [
+            executor.submit(_write_report_job, kanban, alvo, ano, semana, responsavel,
+                            os.path.join(pasta, report_file_name(ano, semana, responsavel)))
+            for kanban, alvo, responsavel in tarefas
+        ]
+        return dict(futuro.result() for futuro in futuros)